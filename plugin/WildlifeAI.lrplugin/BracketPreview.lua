@@ -142,6 +142,9 @@ local function createResultsTable(f, detectionResults, props)
       if bracket.confidence < 70 then
         table.insert(issues, 'Low confidence')
       end
+      if bracket.imageConfidence and bracket.imageConfidence < 70 then
+        table.insert(issues, 'Frames differ')
+      end
       if not bracket.exposureAnalysis.valid and bracket.exposureAnalysis.reason then
         table.insert(issues, bracket.exposureAnalysis.reason)
       end
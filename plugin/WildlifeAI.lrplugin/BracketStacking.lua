@@ -3,18 +3,35 @@
 -- Supports both individual HDR brackets and bracketed panoramas
 
 local LrApplication = import 'LrApplication'
+local LrFileUtils = import 'LrFileUtils'
 local LrPrefs = import 'LrPrefs'
 local LrPathUtils = import 'LrPathUtils'
 local LrProgressScope = import 'LrProgressScope'
 local LrTasks = import 'LrTasks'
 
 local Log = dofile( LrPathUtils.child(_PLUGIN.path, 'utils/Log.lua') )
+local json = dofile( LrPathUtils.child(_PLUGIN.path, 'utils/dkjson.lua') )
 
 local BracketStacking = {}
 
 -- Constants
 local EPSILON = 0.001 -- For floating point comparisons
 
+-- Selections at least this large are planned by the runner's vectorized engine
+local RUNNER_PLAN_THRESHOLD = 500
+
+-- Preferences the runner's bracket planner applies
+local PLAN_NUMBER_PREFS = {
+  'minBracketSize', 'maxBracketSize', 'defaultBracketSize', 'customBracketSize',
+  'withinBracketInterval', 'individualBracketGap', 'panoramaBracketGap',
+  'minExposureStep', 'maxExposureStep', 'minPanoramaPositions', 'maxPanoramaPositions',
+  'panoramaOrientation'
+}
+local PLAN_FLAG_PREFS = {
+  'useExposureValuesForDetection', 'useOrientationAsPanoramaHint',
+  'handleIncompleteBrackets', 'mergeIncompleteAttempts', 'confirmBracketsWithImages'
+}
+
 -- Safely retrieve metadata with error handling
 local function safeGetRawMetadata(photo, key)
   local ok, result = LrTasks.pcall(function()
@@ -775,6 +792,75 @@ function BracketStacking.detectBracketsFromMetadata(photoData, progressCallback)
   }
 end
 
+-- Bracket detection for large selections: the runner plans the whole table in
+-- one pass and returns the same structure as detectBracketsFromMetadata.
+-- The runner is also used for any selection when brackets are confirmed
+-- against the photos' previews. Falls back to the built-in detection if the
+-- runner is unavailable.
+function BracketStacking.detectBracketsWithRunner(photoData, progressCallback)
+  local prefs = LrPrefs.prefsForPlugin()
+  local useRunner = #photoData >= RUNNER_PLAN_THRESHOLD or prefs.confirmBracketsWithImages
+  if not prefs.enableBracketStacking or not useRunner then
+    return BracketStacking.detectBracketsFromMetadata(photoData, progressCallback)
+  end
+
+  Log.info(string.format("=== BRACKET DETECTION IN RUNNER (%d photos) ===", #photoData))
+  local ok, plan = LrTasks.pcall(function()
+    local SmartBridge = dofile( LrPathUtils.child(_PLUGIN.path, 'SmartBridge.lua') )
+    local tempDir = LrPathUtils.getStandardFilePath('temp')
+    local stamp = tostring(os.time())
+    local metadataPath = LrPathUtils.child(tempDir, 'wai_bracket_metadata_' .. stamp .. '.json')
+    local planPath = LrPathUtils.child(tempDir, 'wai_stack_plan_' .. stamp .. '.json')
+
+    local columns = { uuid = {}, timestamp = {}, exposureValue = {}, orientation = {}, path = {} }
+    for i, data in ipairs(photoData) do
+      columns.uuid[i] = data.uuid
+      columns.timestamp[i] = data.timestamp
+      columns.exposureValue[i] = data.exposureValue or json.null
+      columns.orientation[i] = data.orientation
+      columns.path[i] = data.photoPath or ''
+    end
+    local planPrefs = {}
+    for _, key in ipairs(PLAN_NUMBER_PREFS) do planPrefs[key] = prefs[key] end
+    for _, key in ipairs(PLAN_FLAG_PREFS) do planPrefs[key] = prefs[key] == true end
+
+    local out = assert(io.open(metadataPath, 'w'))
+    out:write(json.encode({ prefs = planPrefs, photos = columns }))
+    out:close()
+
+    local success, err = SmartBridge.planBrackets(metadataPath, planPath)
+    LrFileUtils.delete(metadataPath)
+    if not success then error(err) end
+
+    local f = assert(io.open(planPath, 'r'))
+    local content = f:read('*a')
+    f:close()
+    LrFileUtils.delete(planPath)
+    local decoded = json.decode(content)
+    if type(decoded) ~= 'table' or type(decoded.sequences) ~= 'table' then
+      error('Invalid stack plan')
+    end
+
+    -- Point the plan back at the extracted records (index is 0-based)
+    for _, sequence in ipairs(decoded.sequences) do
+      for _, bracket in ipairs(sequence.brackets) do
+        for k, photo in ipairs(bracket.photos) do
+          bracket.photos[k] = photoData[photo.index + 1] or photo
+        end
+      end
+    end
+    return decoded
+  end)
+
+  if ok and plan then
+    Log.info(string.format("Runner bracket plan: %d sequences, %d stacks, %d/%d photos",
+      plan.stats.totalSequences, plan.stats.totalStacks, plan.stats.processedPhotos, plan.stats.totalPhotos))
+    return plan
+  end
+  Log.warning("Runner bracket planning failed, using built-in detection: " .. tostring(plan))
+  return BracketStacking.detectBracketsFromMetadata(photoData, progressCallback)
+end
+
 -- Legacy bracket detection function (for backward compatibility)
 function BracketStacking.detectBrackets(photos, progressCallback)
   local prefs = LrPrefs.prefsForPlugin()
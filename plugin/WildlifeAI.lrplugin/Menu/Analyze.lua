@@ -107,6 +107,9 @@ LrTasks.startAsyncTask(function()
             set('wai_quality', formatPrecision(quality, true))
             set('wai_rating', rating > 0 and tostring(rating) or 'Not Rated')
             set('wai_sceneCount', tostring(sceneCount))
+            set('wai_clusterId', tostring(resultData.cluster_id or sceneCount))
+            set('wai_sceneRank', resultData.scene_rank)
+            set('wai_profile', resultData.profile or 'full')
             set('wai_featureSimilarity', formatPrecision(resultData.feature_similarity, true))
             set('wai_featureConfidence', formatPrecision(resultData.feature_confidence, true))
             set('wai_colorSimilarity', formatPrecision(resultData.color_similarity, true))
@@ -99,7 +99,7 @@ LrTasks.startAsyncTask(function()
     Log.info("=== STEP 1: INTELLIGENT BRACKET DETECTION ===")
     Log.info("Using cached metadata - NO photo object access")
 
-    local detectionResults = BracketStacking.detectBracketsFromMetadata(photoData)
+    local detectionResults = BracketStacking.detectBracketsWithRunner(photoData)
 
     -- Check if any brackets were detected
     if not detectionResults.sequences or #detectionResults.sequences == 0 then
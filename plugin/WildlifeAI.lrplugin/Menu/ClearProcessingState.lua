@@ -133,6 +133,9 @@ LrTasks.startAsyncTask(function()
               clear('wai_quality')
               clear('wai_rating')
               clear('wai_sceneCount')
+              clear('wai_clusterId')
+              clear('wai_sceneRank')
+              clear('wai_profile')
               clear('wai_featureSimilarity')
               clear('wai_featureConfidence')
               clear('wai_colorSimilarity')
@@ -170,6 +173,9 @@ LrTasks.startAsyncTask(function()
               clear('wai_quality')
               clear('wai_rating')
               clear('wai_sceneCount')
+              clear('wai_clusterId')
+              clear('wai_sceneRank')
+              clear('wai_profile')
               clear('wai_featureSimilarity')
               clear('wai_featureConfidence')
               clear('wai_colorSimilarity')
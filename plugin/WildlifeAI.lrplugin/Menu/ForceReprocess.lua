@@ -41,6 +41,9 @@ LrTasks.startAsyncTask(function()
         set('wai_quality', d.quality)
         set('wai_rating', d.rating)
         set('wai_sceneCount', d.scene_count)
+        set('wai_clusterId', d.cluster_id or d.scene_count)
+        set('wai_sceneRank', d.scene_rank)
+        set('wai_profile', d.profile or 'full')
         set('wai_featureSimilarity', d.feature_similarity)
         set('wai_featureConfidence', d.feature_confidence)
         set('wai_colorSimilarity', d.color_similarity)
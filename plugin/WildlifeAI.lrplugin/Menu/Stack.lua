@@ -9,19 +9,26 @@ LrTasks.startAsyncTask(function()
     local catalog = LrApplication.activeCatalog()
     local photos = catalog:getTargetPhotos()
     if #photos==0 then LrDialogs.message('WildlifeAI','No photos selected'); return end
+    -- Read each photo once and keep the best frame per group: lowest scene
+    -- rank, or highest quality for results that predate ranking
     local groups = {}
     for _,p in ipairs(photos) do
-      local sc = tonumber(p:getPropertyForPlugin(_PLUGIN,'wai_sceneCount') or '0') or 0
-      groups[sc] = groups[sc] or {}; table.insert(groups[sc], p)
+      local sc = tonumber(p:getPropertyForPlugin(_PLUGIN,'wai_clusterId') or '')
+              or tonumber(p:getPropertyForPlugin(_PLUGIN,'wai_sceneCount') or '0') or 0
+      local rank = tonumber(p:getPropertyForPlugin(_PLUGIN,'wai_sceneRank') or '') or math.huge
+      local quality = tonumber(p:getPropertyForPlugin(_PLUGIN,'wai_quality') or '0') or 0
+      local g = groups[sc]
+      if not g then g = { members = {} }; groups[sc] = g end
+      table.insert(g.members, p)
+      if not g.top or rank < g.rank or (rank == g.rank and quality > g.quality) then
+        g.top, g.rank, g.quality = p, rank, quality
+      end
     end
     catalog:withWriteAccessDo('WAI Stack', function()
-      for _,arr in pairs(groups) do
-        table.sort(arr, function(a,b)
-          return (tonumber(a:getPropertyForPlugin(_PLUGIN,'wai_quality') or '0') or 0) >
-                 (tonumber(b:getPropertyForPlugin(_PLUGIN,'wai_quality') or '0') or 0)
-        end)
-        local top = arr[1]
-        for i=2,#arr do catalog:createPhotoStack(top, arr[i]) end
+      for _,g in pairs(groups) do
+        for _,p in ipairs(g.members) do
+          if p ~= g.top then catalog:createPhotoStack(g.top, p) end
+        end
       end
     end,{timeout=120})
     LrDialogs.message('WildlifeAI','Stacking complete')
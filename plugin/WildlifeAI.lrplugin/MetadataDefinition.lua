@@ -12,6 +12,9 @@ return {
     { id='wai_quality',            title='WildlifeAI: Quality',            dataType='string', searchable=true, browsable=true },
     { id='wai_rating',             title='WildlifeAI: Rating',             dataType='string', searchable=true, browsable=true },
     { id='wai_sceneCount',         title='WildlifeAI: Scene Count',        dataType='string', searchable=true, browsable=true },
+    { id='wai_clusterId',          title='WildlifeAI: Cluster ID',         dataType='string', searchable=true, browsable=true },
+    { id='wai_sceneRank',          title='WildlifeAI: Scene Rank',         dataType='string', searchable=true, browsable=true },
+    { id='wai_profile',            title='WildlifeAI: Analysis Profile',   dataType='string', searchable=true, browsable=true },
     { id='wai_featureSimilarity',  title='WildlifeAI: Feature Similarity', dataType='string', searchable=true, browsable=true },
     { id='wai_featureConfidence',  title='WildlifeAI: Feature Confidence', dataType='string', searchable=true, browsable=true },
     { id='wai_colorSimilarity',    title='WildlifeAI: Color Similarity',   dataType='string', searchable=true, browsable=true },
@@ -19,5 +22,5 @@ return {
     { id='wai_jsonPath',           title='WildlifeAI: JSON Result Path',   dataType='url',    searchable=false, browsable=false },
     { id='wai_processed',          title='WildlifeAI: Processing State',   dataType='string', searchable=true, browsable=true },
   },
-  schemaVersion = 25,  -- Force Lightroom to refresh metadata schema
+  schemaVersion = 28,  -- Force Lightroom to refresh metadata schema
 }
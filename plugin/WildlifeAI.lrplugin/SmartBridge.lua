@@ -243,6 +243,30 @@ function M.findSystemPythonRunner()
   return pythonBinary, scriptPath
 end
 
+-- Run the runner's bracket planner on an exported metadata table (blocks until done)
+function M.planBrackets(metadataPath, planPath)
+  local runner = findBestRunner()
+  local cmd
+  if runner then
+    cmd = string.format('%s --plan-brackets %s --stack-plan %s',
+      quote(runner), quote(metadataPath), quote(planPath))
+  else
+    local pythonBinary, scriptPath = M.findSystemPythonRunner()
+    if not pythonBinary then
+      return false, 'No runner available'
+    end
+    cmd = string.format('%s %s --plan-brackets %s --stack-plan %s',
+      quote(pythonBinary), quote(scriptPath), quote(metadataPath), quote(planPath))
+  end
+
+  Log.info('Executing: ' .. cmd)
+  local exitCode = LrTasks.execute('"' .. cmd .. '"')
+  if exitCode ~= 0 then
+    return false, 'Runner exited with code ' .. tostring(exitCode)
+  end
+  return true
+end
+
 function M.clearProcessingState(photos)
   -- Function to clear processing state for reprocessing
   local clk = Log.enter('SmartBridge.clearProcessingState')
@@ -292,6 +316,9 @@ local function applySimpleNonYieldingMetadata(photo, data, prefs)
   set('wai_quality', formatPrecision(quality, true)) -- 0-100 scale  
   set('wai_rating', rating > 0 and tostring(rating) or 'Not Rated')
   set('wai_sceneCount', tostring(sceneCount))
+  set('wai_clusterId', tostring(data.cluster_id or sceneCount))
+  set('wai_sceneRank', data.scene_rank)
+  set('wai_profile', data.profile or 'full')
   set('wai_featureSimilarity', formatPrecision(data.feature_similarity, true)) -- 0-100 scale
   set('wai_featureConfidence', formatPrecision(data.feature_confidence, true)) -- 0-100 scale
   set('wai_colorSimilarity', formatPrecision(data.color_similarity, true)) -- 0-100 scale
@@ -637,6 +664,9 @@ local function applyNonYieldingMetadata(photo, data, catalog, prefs)
   set('wai_quality', formatPrecision(quality, true)) -- 0-100 scale  
   set('wai_rating', rating > 0 and tostring(rating) or 'Not Rated')
   set('wai_sceneCount', tostring(sceneCount))
+  set('wai_clusterId', tostring(data.cluster_id or sceneCount))
+  set('wai_sceneRank', data.scene_rank)
+  set('wai_profile', data.profile or 'full')
   set('wai_featureSimilarity', formatPrecision(data.feature_similarity, true)) -- 0-100 scale
   set('wai_featureConfidence', formatPrecision(data.feature_confidence, true)) -- 0-100 scale
   set('wai_colorSimilarity', formatPrecision(data.color_similarity, true)) -- 0-100 scale
@@ -1001,6 +1031,9 @@ local function applyMetadataToPhoto(photo, results, catalog, prefs)
   set('wai_quality', formatPrecision(quality, true)) -- 0-100 scale  
   set('wai_rating', rating > 0 and tostring(rating) or 'Not Rated')
   set('wai_sceneCount', tostring(sceneCount))
+  set('wai_clusterId', tostring(d.cluster_id or sceneCount))
+  set('wai_sceneRank', d.scene_rank)
+  set('wai_profile', d.profile or 'full')
   set('wai_featureSimilarity', formatPrecision(d.feature_similarity, true)) -- 0-100 scale
   set('wai_featureConfidence', formatPrecision(d.feature_confidence, true)) -- 0-100 scale
   set('wai_colorSimilarity', formatPrecision(d.color_similarity, true)) -- 0-100 scale
@@ -1343,16 +1376,22 @@ function M.run(photos, progressCallback, forceReprocess, metadataCallback)
   local results = {}
   local photosMap = {} -- Map photo paths to photo objects for metadata updates
   
+  -- Photos analysed by a triage pass are upgraded to a full analysis when selected again
+  local upgrading = false
   for _, photo in ipairs(photos) do
     local photoPath = photo:getRawMetadata('path')
     photosMap[photoPath] = photo
     
     -- Use Lightroom metadata as source of truth - if wai_processed is not 'true', we need to process
     local processed = photo:getPropertyForPlugin(_PLUGIN, 'wai_processed')
-    if forceReprocess or processed ~= 'true' then
+    local triaged = processed == 'true' and photo:getPropertyForPlugin(_PLUGIN, 'wai_profile') == 'triage'
+    if forceReprocess or processed ~= 'true' or triaged then
       -- Force processing - ignore existing result files if Lightroom says not processed
       if processed ~= 'true' then
         Log.info('Lightroom metadata indicates not processed, forcing fresh analysis for: ' .. LrPathUtils.leafName(photoPath))
+      elseif triaged then
+        Log.info('Upgrading triage result to a full analysis for: ' .. LrPathUtils.leafName(photoPath))
+        upgrading = true
       end
       table.insert(photosToProcess, photo)
     else
@@ -1505,6 +1544,9 @@ function M.run(photos, progressCallback, forceReprocess, metadataCallback)
   
   -- Add flags for enhanced runner
   if prefs.useGPU then cmd = cmd .. ' --gpu' end
+  if forceReprocess then cmd = cmd .. ' --no-cache' end
+  -- New photos get a quick triage pass; selections holding triaged photos get the full analysis
+  if prefs.triageFirstPass and not forceReprocess and not upgrading then cmd = cmd .. ' --profile triage' end
   if prefs.generateCrops ~= false then cmd = cmd .. ' --generate-crops' end
   if prefs.enableLogging or prefs.verboseRunner or prefs.debugMode then cmd = cmd .. ' --verbose' end
   
@@ -1611,6 +1653,9 @@ function M.run(photos, progressCallback, forceReprocess, metadataCallback)
                         quality = parseNumeric(result.quality),
                         rating = parseNumeric(result.rating),
                         scene_count = parseNumeric(result.scene_count),
+                        cluster_id = parseNumeric(result.cluster_id or result.scene_count),
+                        scene_rank = parseNumeric(result.scene_rank),
+                        profile = result.profile,
                         feature_similarity = parseNumeric(result.feature_similarity),
                         feature_confidence = parseNumeric(result.feature_confidence),
                         color_similarity = parseNumeric(result.color_similarity),
@@ -1841,6 +1886,9 @@ function M.run(photos, progressCallback, forceReprocess, metadataCallback)
               quality = parseNumeric(result.quality),
               rating = parseNumeric(result.rating),
               scene_count = parseNumeric(result.scene_count),
+              cluster_id = parseNumeric(result.cluster_id or result.scene_count),
+              scene_rank = parseNumeric(result.scene_rank),
+              profile = result.profile,
               feature_similarity = parseNumeric(result.feature_similarity),
               feature_confidence = parseNumeric(result.feature_confidence),
               color_similarity = parseNumeric(result.color_similarity),
@@ -21,7 +21,7 @@ local function createCompatibleTagset()
     id = 'wildlifeAI_tagset',
     title = 'WildlifeAI',
     items = {
-      'wai_detectedSpecies','wai_speciesConfidence','wai_quality','wai_rating','wai_sceneCount',
+      'wai_detectedSpecies','wai_speciesConfidence','wai_quality','wai_rating','wai_sceneCount','wai_clusterId','wai_sceneRank','wai_profile',
       'wai_featureSimilarity','wai_featureConfidence','wai_colorSimilarity','wai_colorConfidence','wai_jsonPath','wai_processed'
     }
   }
@@ -78,7 +78,7 @@ else
     id = 'wildlifeAI_tagset',
     title = 'WildlifeAI',
     items = {
-      'wai_detectedSpecies','wai_speciesConfidence','wai_quality','wai_rating','wai_sceneCount',
+      'wai_detectedSpecies','wai_speciesConfidence','wai_quality','wai_rating','wai_sceneCount','wai_clusterId','wai_sceneRank','wai_profile',
       'wai_featureSimilarity','wai_featureConfidence','wai_colorSimilarity','wai_colorConfidence','wai_jsonPath'
     }
   }
@@ -156,6 +156,7 @@ return function(context)
   if prefs.mirrorJobId == nil then prefs.mirrorJobId = false end
   if prefs.enableLogging == nil then prefs.enableLogging = false end
   if prefs.generateCrops == nil then prefs.generateCrops = true end
+  if prefs.triageFirstPass == nil then prefs.triageFirstPass = false end
   
   -- Rating and labeling defaults
   if prefs.enableRating == nil then prefs.enableRating = false end
@@ -264,6 +265,7 @@ return function(context)
   prefs.individualStackColorLabel = prefs.individualStackColorLabel or 'green'
   if prefs.handleIncompleteBrackets == nil then prefs.handleIncompleteBrackets = true end
   if prefs.mergeIncompleteAttempts == nil then prefs.mergeIncompleteAttempts = true end
+  if prefs.confirmBracketsWithImages == nil then prefs.confirmBracketsWithImages = false end
   
   -- Preview settings
   if prefs.showBracketPreview == nil then prefs.showBracketPreview = true end
@@ -456,6 +458,10 @@ return function(context)
       f:checkbox { 
         title = 'Generate crop images', 
         value = bind('generateCrops') 
+      },
+      f:checkbox {
+        title = 'Quick triage of new photos (analyze again for full precision)',
+        value = bind('triageFirstPass')
       }
     },
     
@@ -1480,6 +1486,12 @@ return function(context)
         },
         title = 'Merge Incomplete Attempts',
         value = bind('mergeIncompleteAttempts')
+      },
+
+      f:checkbox {
+        enabled = bind('enableBracketStacking'),
+        title = 'Confirm Brackets Using Image Previews',
+        value = bind('confirmBracketsWithImages')
       }
     },
 
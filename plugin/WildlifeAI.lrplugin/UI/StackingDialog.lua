@@ -284,6 +284,8 @@ return function(context, photos)
             local quality = tonumber(photo:getPropertyForPlugin(_PLUGIN, 'wai_quality')) or 0
             local rating = tonumber(photo:getPropertyForPlugin(_PLUGIN, 'wai_rating')) or 0
             local sceneCount = tonumber(photo:getPropertyForPlugin(_PLUGIN, 'wai_sceneCount')) or 1
+            local clusterId = tonumber(photo:getPropertyForPlugin(_PLUGIN, 'wai_clusterId')) or sceneCount
+            local sceneRank = tonumber(photo:getPropertyForPlugin(_PLUGIN, 'wai_sceneRank')) or math.huge
             local species = photo:getPropertyForPlugin(_PLUGIN, 'wai_detectedSpecies') or 'Unknown'
             
             if quality >= minQuality then
@@ -292,6 +294,8 @@ return function(context, photos)
                 quality = quality,
                 rating = rating,
                 sceneCount = sceneCount,
+                clusterId = clusterId,
+                sceneRank = sceneRank,
                 species = species,
                 processed = processed == 'true'
               })
@@ -311,14 +315,14 @@ return function(context, photos)
           local method = prefs.stackingMethod
           
           if method == 'scene_then_quality' then
-            groupKey = string.format('scene_%d', data.sceneCount)
+            groupKey = string.format('scene_%d', data.clusterId)
           elseif method == 'quality_only' then
             local qualityBucket = math.floor(data.quality / 20) -- 0-19, 20-39, etc.
             groupKey = string.format('quality_%d', qualityBucket)
           elseif method == 'species_then_quality' then
             groupKey = string.format('species_%s', data.species)
           elseif method == 'species_scene_quality' then
-            groupKey = string.format('species_%s_scene_%d', data.species, data.sceneCount)
+            groupKey = string.format('species_%s_scene_%d', data.species, data.clusterId)
           elseif method == 'rating_then_quality' then
             groupKey = string.format('rating_%d', data.rating)
           end
@@ -342,9 +346,13 @@ return function(context, photos)
           end
           
           if #groupPhotos >= prefs.minStackSize then
-            -- Sort by quality
+            -- Sort by quality; scene groups put the runner's best-ranked frame first
+            local byRank = prefs.qualityOrder == 'highest_first' and
+              (prefs.stackingMethod == 'scene_then_quality' or prefs.stackingMethod == 'species_scene_quality')
             table.sort(groupPhotos, function(a, b)
-              if prefs.qualityOrder == 'highest_first' then
+              if byRank and a.sceneRank ~= b.sceneRank then
+                return a.sceneRank < b.sceneRank
+              elseif prefs.qualityOrder == 'highest_first' then
                 return a.quality > b.quality
               else
                 return a.quality < b.quality
@@ -0,0 +1,115 @@
+"""Cheap bird/no-bird prefilter run before Mask R-CNN.
+
+Many frames of a shoot hold no bird at all: the bird has flown, the lens
+was hunting for focus, or the cap was still on. The prefilter scores a
+256-pixel grayscale proxy of each frame on two statistics, each mapped to
+0..1:
+
+* contrast: the spread of intensities (a capped lens or a black frame has none),
+* peak detail: the Laplacian energy of the most detailed 16-pixel tile. A
+  bird against sky or water stands out as one busy tile in an otherwise
+  smooth frame, while an empty sky or a focus-hunting frame has no sharp
+  tile anywhere.
+
+The frame's score is the weaker of the two, and frames scoring below the
+threshold skip the detection, species and quality models. Busy backgrounds
+such as foliage always pass, so the prefilter only removes frames it is
+sure about. The threshold trades skipped frames against missed birds;
+``calibrate_threshold`` picks the highest one that keeps a target share of
+labelled bird frames.
+"""
+from typing import Dict, Iterable, Optional
+
+import cv2
+import numpy as np
+
+# Longest side (pixels) of the proxy the statistics are computed on
+PROXY_SIZE = 256
+# Side (pixels) of the proxy tiles whose detail is compared
+TILE_SIZE = 16
+# (low, high) ramps mapping each statistic to 0..1
+CONTRAST_RAMP = (0.02, 0.08)
+DETAIL_RAMP = (1.0, 2.0)
+# Frames scoring below this are treated as empty
+DEFAULT_THRESHOLD = 0.3
+# Share of bird frames the calibrated threshold must keep
+DEFAULT_RECALL = 0.99
+
+
+def _ramp(value: float, low_high) -> float:
+    low, high = low_high
+    return float(np.clip((value - low) / (high - low), 0.0, 1.0))
+
+
+def proxy(img: np.ndarray) -> np.ndarray:
+    """Grayscale float32 copy of ``img`` in 0..1, at most ``PROXY_SIZE`` pixels on its longest side."""
+    scale = 1.0 / np.iinfo(img.dtype).max if np.issubdtype(img.dtype, np.integer) else 1.0
+    gray = img.astype(np.float32) * scale
+    if gray.ndim == 3:
+        gray = cv2.cvtColor(gray[..., :3], cv2.COLOR_RGB2GRAY)
+    height, width = gray.shape
+    factor = PROXY_SIZE / max(height, width)
+    if factor < 1:
+        size = (max(1, round(width * factor)), max(1, round(height * factor)))
+        gray = cv2.resize(gray, size, interpolation=cv2.INTER_AREA)
+    return gray
+
+
+def peak_detail(gray: np.ndarray) -> float:
+    """log10 of the mean squared Laplacian (8-bit units) of the most detailed tile of ``gray``."""
+    energy = cv2.Laplacian(gray * 255, cv2.CV_32F) ** 2
+    rows, cols = max(1, gray.shape[0] // TILE_SIZE), max(1, gray.shape[1] // TILE_SIZE)
+    energy = cv2.resize(energy, (cols, rows), interpolation=cv2.INTER_AREA)
+    return float(np.log10(1.0 + energy.max()))
+
+
+def prefilter_features(img: np.ndarray) -> Dict[str, float]:
+    """The raw contrast and peak detail statistics of a decoded image."""
+    gray = proxy(img)
+    low, high = np.percentile(gray, (1, 99))
+    return {"contrast": float(high - low), "detail": peak_detail(gray)}
+
+
+def prefilter_score(img: np.ndarray) -> float:
+    """How likely ``img`` is to hold a bird, from 0 (certainly empty) to 1."""
+    features = prefilter_features(img)
+    return min(_ramp(features["contrast"], CONTRAST_RAMP), _ramp(features["detail"], DETAIL_RAMP))
+
+
+def calibrate_threshold(scores: Iterable[float], has_bird: Iterable[bool],
+                        recall: float = DEFAULT_RECALL) -> Optional[float]:
+    """Highest threshold that keeps at least ``recall`` of the bird frames.
+
+    Returns None when there are no bird frames to calibrate on.
+    """
+    scores = np.asarray(list(scores), dtype=np.float64)
+    has_bird = np.asarray(list(has_bird), dtype=bool)
+    bird_scores = np.sort(scores[has_bird])
+    if not len(bird_scores):
+        return None
+    # Frames scoring exactly the threshold are kept, so rejecting k bird frames
+    # means the threshold can rise to the (k+1)-th lowest bird score
+    allowed = int(np.floor(len(bird_scores) * (1.0 - recall) + 1e-9))
+    return float(bird_scores[min(allowed, len(bird_scores) - 1)])
+
+
+def prefilter_report(scores: Iterable[float], has_bird: Iterable[bool], threshold: float,
+                     recall: float = DEFAULT_RECALL) -> Dict:
+    """Skip rate and false rejects of ``threshold`` on labelled frames."""
+    scores = np.asarray(list(scores), dtype=np.float64)
+    has_bird = np.asarray(list(has_bird), dtype=bool)
+    skipped = scores < threshold
+    birds = int(has_bird.sum())
+    false_rejects = int((skipped & has_bird).sum())
+    return {
+        "threshold": threshold,
+        "photos": len(scores),
+        "skipped": int(skipped.sum()),
+        "skip_rate": float(skipped.mean()) if len(scores) else 0.0,
+        "empty_skipped": int((skipped & ~has_bird).sum()),
+        "empty_photos": int((~has_bird).sum()),
+        "false_rejects": false_rejects,
+        "recall": (birds - false_rejects) / birds if birds else 1.0,
+        "recall_target": recall,
+        "calibrated_threshold": calibrate_threshold(scores, has_bird, recall),
+    }
@@ -0,0 +1,610 @@
+"""Vectorized bracket and panorama detection over a whole catalog export.
+
+This is the NumPy counterpart of ``BracketStacking.lua``: photos are grouped
+by capture time, each group's exposure steps are analysed, groups are joined
+into panorama sequences and incomplete retries are merged, following the same
+rules and preferences as the plug-in. Instead of walking photos one by one
+every step works on whole columns, so a catalog of 100k photos is planned in a
+fraction of a second. The result is a stack plan in the shape
+``BracketStacking.createStacks`` consumes.
+"""
+import csv
+import gc
+import json
+import logging
+import sqlite3
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+import numpy as np
+
+from exif_reader import read_exif_batch
+
+if TYPE_CHECKING:
+    from bracket_evidence import SignatureStore
+
+# Plug-in defaults, see ConfigDialog.lua
+DEFAULT_PREFS = {
+    "minBracketSize": 3,
+    "maxBracketSize": 9,
+    "defaultBracketSize": 3,
+    "customBracketSize": 3,
+    "withinBracketInterval": 3.0,
+    "individualBracketGap": 30.0,
+    "panoramaBracketGap": 8.0,
+    "useExposureValuesForDetection": True,
+    "minExposureStep": 0.5,
+    "maxExposureStep": 3.0,
+    "useOrientationAsPanoramaHint": True,
+    "panoramaOrientation": "vertical",
+    "minPanoramaPositions": 3,
+    "maxPanoramaPositions": 20,
+    "handleIncompleteBrackets": True,
+    "mergeIncompleteAttempts": True,
+    "confirmBracketsWithImages": False,
+}
+
+# Metadata columns and the alternative names Lightroom and EXIF use for them
+COLUMN_ALIASES = {
+    "uuid": ("uuid",),
+    "path": ("path", "photoPath"),
+    "timestamp": ("timestamp", "captureTime", "dateTime"),
+    "aperture": ("aperture", "fNumber", "apertureValue"),
+    "shutter": ("shutter", "shutterSpeed", "exposureTime"),
+    "iso": ("iso", "isoSpeedRating", "isoSpeedRatings", "photographicSensitivity"),
+    "orientation": ("orientation",),
+    # EV already computed by the exporter; used where present
+    "exposureValue": ("exposureValue", "ev"),
+}
+
+# Lightroom orientation codes of portrait photos
+VERTICAL_ORIENTATIONS = ("AB", "CD", "vertical")
+
+# Image evidence: neighbouring frames less similar than this show different views
+SPLIT_SIMILARITY = 0.75
+# Adjacent brackets whose boundary frames are at least this similar show one view
+MERGE_SIMILARITY = 0.9
+# Similarity mapped to an image confidence of 0 and 100
+IMAGE_CONFIDENCE_RANGE = (0.5, 0.95)
+
+
+def _pref_number(prefs: Dict, key: str) -> float:
+    """Numeric preference, falling back to the default like ``tonumber(x) or default``."""
+    try:
+        return float(prefs.get(key))
+    except (TypeError, ValueError):
+        return float(DEFAULT_PREFS[key])
+
+
+def _target_size(prefs: Dict) -> int:
+    size = prefs.get("defaultBracketSize", DEFAULT_PREFS["defaultBracketSize"])
+    if size == "custom":
+        size = prefs.get("customBracketSize") or 3
+    try:
+        return int(float(size))
+    except (TypeError, ValueError):
+        return 3
+
+
+def parse_exposure_value(value) -> float:
+    """Parse ``1/250``, ``f/2.8`` or plain numbers; NaN when unparseable."""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    if isinstance(value, str):
+        text = value.strip()
+        if "/" in text and not text.lower().startswith("f"):
+            num, _, den = text.partition("/")
+            try:
+                den = float(den)
+                return float(num) / den if den != 0 else float("nan")
+            except ValueError:
+                return float("nan")
+        if text.lower().startswith("f"):
+            text = text[1:].lstrip("/")
+        try:
+            return float(text)
+        except ValueError:
+            pass
+    return float("nan")
+
+
+def _numeric_column(values) -> np.ndarray:
+    try:
+        return np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        # A shoot only uses a handful of distinct settings; parse each once
+        parsed = {v: parse_exposure_value(v) for v in set(values)}
+        return np.fromiter(map(parsed.__getitem__, values), dtype=np.float64, count=len(values))
+
+
+def _column(table: Dict[str, list], name: str, length: int) -> Optional[list]:
+    for alias in COLUMN_ALIASES[name]:
+        values = table.get(alias)
+        if values is not None:
+            if len(values) != length:
+                raise ValueError(f"Column {alias} has {len(values)} values, expected {length}")
+            return values
+    return None
+
+
+def exposure_values(aperture: np.ndarray, shutter: np.ndarray, iso: np.ndarray) -> np.ndarray:
+    """EV = log2(aperture^2 / shutter) + log2(iso / 100); NaN where any input is missing."""
+    valid = (aperture > 0) & (shutter > 0) & (iso > 0)
+    ev = np.full(aperture.shape, np.nan)
+    ev[valid] = np.log2(aperture[valid] ** 2 / shutter[valid]) + np.log2(iso[valid] / 100)
+    return ev
+
+
+def to_columns(table) -> Dict[str, list]:
+    """Accept either a list of row dicts or a dict of columns."""
+    if isinstance(table, dict):
+        return table
+    columns: Dict[str, list] = {}
+    rows = list(table)
+    for key in {k for row in rows for k in row}:
+        columns[key] = [row.get(key) for row in rows]
+    return columns
+
+
+def fill_from_exif(columns: Dict[str, list], max_workers: int = 8) -> Dict[str, list]:
+    """Fill in missing capture times, exposure settings and orientations from EXIF headers.
+
+    Only rows with a ``path`` and at least one empty field are read, so an
+    export that already carries Lightroom's metadata costs nothing.
+    """
+    n = max((len(v) for v in columns.values()), default=0)
+    paths = _column(columns, "path", n)
+    if paths is None:
+        return columns
+    fields = {
+        "timestamp": lambda e: e.capture_time,
+        "shutter": lambda e: e.exposure_time,
+        "aperture": lambda e: e.f_number,
+        "iso": lambda e: e.iso,
+        "orientation": lambda e: None if e.orientation is None else ("vertical" if e.vertical else "horizontal"),
+    }
+    current = {name: _column(columns, name, n) or [None] * n for name in fields}
+    given_ev = _column(columns, "exposureValue", n) or [None] * n
+
+    def incomplete(i):
+        missing = {name for name in fields if current[name][i] in (None, "")}
+        if given_ev[i] not in (None, ""):
+            # A precomputed EV makes the exposure settings unnecessary
+            missing -= {"shutter", "aperture", "iso"}
+        return bool(missing)
+
+    rows = [i for i in range(n) if paths[i] and incomplete(i)]
+    if not rows:
+        return columns
+    exif = read_exif_batch([paths[i] for i in rows], max_workers=max_workers)
+    filled = dict(columns)
+    for name, getter in fields.items():
+        values = list(current[name])
+        for i in rows:
+            if values[i] in (None, ""):
+                values[i] = getter(exif[str(paths[i])])
+        # Write back under the name the export used, so aliases stay unambiguous
+        alias = next((a for a in COLUMN_ALIASES[name] if a in columns), name)
+        filled[alias] = values
+    logging.info(f"Read EXIF headers of {len(rows)} photos with incomplete metadata")
+    return filled
+
+
+def load_metadata_table(path) -> Dict:
+    """Read an exported metadata table.
+
+    JSON files hold either ``{"prefs": {...}, "photos": <rows or columns>}``
+    or just the rows/columns; CSV files hold one photo per row.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with open(path, newline="", encoding="utf-8") as f:
+            return {"prefs": {}, "photos": to_columns(csv.DictReader(f))}
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict) and "photos" in data:
+        return {"prefs": data.get("prefs") or {}, "photos": to_columns(data["photos"])}
+    return {"prefs": {}, "photos": to_columns(data)}
+
+
+def plan_brackets(table, prefs: Optional[Dict] = None) -> Dict:
+    """Detect brackets and panorama sequences in an exported metadata table.
+
+    ``table`` maps column names (see ``COLUMN_ALIASES``) to equal-length
+    lists, or is a list of row dicts. Returns ``{"sequences": [...],
+    "stats": {...}}`` in the layout of ``detectBracketsFromMetadata``; each
+    photo record carries ``index``, its row in ``table``.
+    """
+    prefs = {**DEFAULT_PREFS, **(prefs or {})}
+    columns = to_columns(table)
+    n = max((len(v) for v in columns.values()), default=0)
+
+    timestamps = _column(columns, "timestamp", n)
+    timestamps = _numeric_column(timestamps) if timestamps is not None else np.zeros(n)
+    # Missing capture times are treated as "now", like the plug-in does
+    timestamps = np.where(np.isfinite(timestamps) & (timestamps != 0), timestamps, time.time())
+
+    numeric = {}
+    for name in ("aperture", "shutter", "iso"):
+        values = _column(columns, name, n)
+        numeric[name] = _numeric_column(values) if values is not None else np.full(n, np.nan)
+    ev = exposure_values(numeric["aperture"], numeric["shutter"], numeric["iso"])
+    given = _column(columns, "exposureValue", n)
+    if given is not None:
+        given = _numeric_column(given)
+        ev = np.where(np.isfinite(given), given, ev)
+
+    orientation = _column(columns, "orientation", n) or [None] * n
+    vertical = np.fromiter((o in VERTICAL_ORIENTATIONS for o in orientation), dtype=bool, count=n)
+
+    order = np.argsort(timestamps, kind="stable")
+    t = timestamps[order]
+    ev = ev[order]
+    vertical = vertical[order]
+
+    # Time groups: consecutive photos at most withinBracketInterval apart
+    interval = _pref_number(prefs, "withinBracketInterval")
+    starts = np.flatnonzero(np.concatenate(([True], np.diff(t) > interval))) if n else np.zeros(0, dtype=np.intp)
+    sizes = np.diff(np.append(starts, n))
+    keep = (sizes >= _pref_number(prefs, "minBracketSize")) & (sizes <= _pref_number(prefs, "maxBracketSize"))
+    starts, sizes = starts[keep], sizes[keep]
+    ends = starts + sizes - 1
+    count = len(starts)
+
+    bracket_of = np.full(n, -1, dtype=np.intp)
+    if count:
+        marks = np.zeros(n + 1, dtype=np.intp)
+        np.add.at(marks, starts, 1)
+        np.add.at(marks, ends + 1, -1)
+        inside = np.cumsum(marks[:n]) > 0
+        bracket_of[inside] = np.repeat(np.arange(count), sizes)
+
+    analysis = _analyze_exposures(ev, bracket_of, count, prefs)
+
+    # Orientation consistency and the predominant orientation (ties go to horizontal)
+    vertical_before = np.concatenate(([0], np.cumsum(vertical)))
+    vertical_counts = vertical_before[starts + sizes] - vertical_before[starts]
+    consistency = np.maximum(vertical_counts, sizes - vertical_counts) / np.maximum(sizes, 1)
+    predominant_vertical = vertical_counts * 2 > sizes
+
+    target = _target_size(prefs)
+    confidence = (50 + 30 * analysis["valid"] + 10 * (sizes == target) + 10 * (consistency >= 0.8)).clip(max=100)
+
+    # Sequences: brackets close in time (and, optionally, of the panorama orientation)
+    start_times, end_times = t[starts], t[ends]
+    if prefs.get("useOrientationAsPanoramaHint") and prefs.get("panoramaOrientation") != "both":
+        orientation_match = predominant_vertical == (prefs.get("panoramaOrientation") == "vertical")
+    else:
+        orientation_match = np.ones(count, dtype=bool)
+    gaps = start_times[1:] - end_times[:-1]
+    joins = (gaps <= _pref_number(prefs, "panoramaBracketGap")) & orientation_match[1:]
+    new_sequence = np.concatenate(([True], ~joins)) if count else np.zeros(0, dtype=bool)
+    sequence_of = np.cumsum(new_sequence) - 1
+    sequence_sizes = np.bincount(sequence_of, minlength=int(new_sequence.sum()))
+    panorama = (sequence_sizes >= _pref_number(prefs, "minPanoramaPositions")) & \
+        (sequence_sizes <= _pref_number(prefs, "maxPanoramaPositions"))
+    if count <= 1:
+        panorama[:] = False
+
+    # Incomplete retries: a short bracket directly followed by a full one merges into it
+    merge_into_next = np.zeros(count, dtype=bool)
+    if prefs.get("handleIncompleteBrackets") and prefs.get("mergeIncompleteAttempts") and count > 1:
+        merge_into_next[:-1] = (
+            (sequence_of[:-1] == sequence_of[1:])
+            & (sizes[:-1] < target)
+            & (sizes[1:] >= target)
+            & (gaps <= _pref_number(prefs, "individualBracketGap") * 0.5)
+        )
+
+    # The plan is hundreds of thousands of small acyclic dicts; pausing the
+    # cyclic garbage collector while they are built halves the build time
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return _build_plan(
+            order, t, ev, vertical, bracket_of, columns, n, starts, sizes, analysis, consistency,
+            predominant_vertical, confidence, sequence_of, panorama, merge_into_next,
+            single_sequence=count <= 1,
+        )
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+
+def _analyze_exposures(ev: np.ndarray, bracket_of: np.ndarray, count: int, prefs: Dict) -> Dict[str, np.ndarray]:
+    """Per-bracket exposure step analysis, as ``analyzeExposurePattern``."""
+    valid = np.zeros(count, dtype=bool)
+    consistency = np.zeros(count)
+    exposure_range = np.zeros(count)
+    step_count = np.zeros(count, dtype=np.intp)
+    if not prefs.get("useExposureValuesForDetection"):
+        return {"valid": valid, "consistency": consistency, "range": exposure_range,
+                "steps": step_count, "has_steps": np.zeros(count, dtype=bool), "disabled": True}
+
+    known = (bracket_of >= 0) & np.isfinite(ev)
+    groups, values = bracket_of[known], ev[known]
+    order = np.lexsort((values, groups))
+    groups, values = groups[order], values[order]
+    exposures = np.bincount(groups, minlength=count)
+
+    same = groups[1:] == groups[:-1]
+    steps = np.abs(np.diff(values))[same]
+    step_groups = groups[1:][same]
+    in_range = (steps >= _pref_number(prefs, "minExposureStep")) & (steps <= _pref_number(prefs, "maxExposureStep"))
+    step_count = np.bincount(step_groups, minlength=count)
+    valid_steps = np.bincount(step_groups, weights=in_range, minlength=count)
+
+    has_steps = exposures >= 2
+    consistency[has_steps] = valid_steps[has_steps] / step_count[has_steps]
+    valid = has_steps & (consistency >= 0.6)
+    if len(values):
+        firsts = np.flatnonzero(np.concatenate(([True], ~same)))
+        present = groups[firsts]
+        exposure_range[present] = np.maximum.reduceat(values, firsts) - np.minimum.reduceat(values, firsts)
+    return {"valid": valid, "consistency": consistency, "range": exposure_range,
+            "steps": step_count, "has_steps": has_steps, "disabled": False}
+
+
+def _exposure_analyses(analysis: Dict[str, np.ndarray]) -> List[Dict]:
+    """The per-bracket ``exposureAnalysis`` records of the plan."""
+    count = len(analysis["valid"])
+    if analysis["disabled"]:
+        return [{"valid": False, "reason": "Exposure analysis disabled"} for _ in range(count)]
+    records = []
+    for has_steps, valid, consistency, exposure_range, steps in zip(
+            analysis["has_steps"].tolist(), analysis["valid"].tolist(), analysis["consistency"].tolist(),
+            analysis["range"].tolist(), analysis["steps"].tolist()):
+        if not has_steps:
+            records.append({"valid": False, "reason": "Insufficient exposure data"})
+            continue
+        records.append({
+            "valid": valid,
+            "stepConsistency": consistency,
+            "exposureRange": exposure_range,
+            "stepCount": steps,
+            "reason": "Valid exposure pattern" if valid else "Inconsistent exposure steps",
+        })
+    return records
+
+
+def _build_plan(order, t, ev, vertical, bracket_of, columns, n, starts, sizes, analysis, consistency,
+                predominant_vertical, confidence, sequence_of, panorama, merge_into_next,
+                single_sequence: bool) -> Dict:
+    uuids = _column(columns, "uuid", n)
+    paths = _column(columns, "path", n)
+
+    # Photo records of every bracketed position, built in one pass; brackets are contiguous runs
+    positions = np.flatnonzero(bracket_of >= 0)
+    indices = order[positions].tolist()
+    records = [
+        {
+            "index": index,
+            "uuid": uuids[index] if uuids is not None else f"photo_{index + 1}",
+            "timestamp": timestamp,
+            "orientation": "vertical" if is_vertical else "horizontal",
+            "photoIndex": index + 1,
+            "photoPath": paths[index] if paths is not None else "",
+        }
+        for index, timestamp, is_vertical in zip(indices, t[positions].tolist(), vertical[positions].tolist())
+    ]
+    exposures = ev[positions]
+    for k, value in zip(np.flatnonzero(np.isfinite(exposures)).tolist(), exposures[np.isfinite(exposures)].tolist()):
+        records[k]["exposureValue"] = value
+    offsets = np.concatenate(([0], np.cumsum(sizes))).tolist()
+
+    # Plain lists: indexing NumPy arrays element by element is slow in this loop
+    start_times = t[starts].tolist()
+    end_times = t[starts + sizes - 1].tolist()
+    confidence = confidence.tolist()
+    consistency = consistency.tolist()
+    predominant_vertical = predominant_vertical.tolist()
+    sequence_of = sequence_of.tolist()
+    panorama = panorama.tolist()
+    merge_into_next = merge_into_next.tolist()
+    analyses = _exposure_analyses(analysis)
+
+    sequences: List[Dict] = []
+    pending_photos: List[Dict] = []
+    pending_start = pending_confidence = None
+    for i in range(len(start_times)):
+        photos = records[offsets[i]:offsets[i + 1]]
+        if merge_into_next[i]:
+            pending_photos += photos
+            pending_start = start_times[i] if pending_start is None else pending_start
+            pending_confidence = max(pending_confidence or 0, confidence[i])
+            continue
+
+        seq = sequence_of[i]
+        kind = "panorama" if panorama[seq] else "individual"
+        if not sequences or sequences[-1]["sequenceId"] != seq + 1:
+            sequences.append({"type": kind, "brackets": [], "sequenceId": seq + 1,
+                              "startTime": start_times[i], "endTime": end_times[i]})
+        sequence = sequences[-1]
+
+        bracket_start = start_times[i]
+        bracket_confidence = confidence[i]
+        if pending_photos:
+            photos = pending_photos + photos
+            bracket_start = pending_start
+            bracket_confidence = max(bracket_confidence, pending_confidence)
+            pending_photos, pending_start, pending_confidence = [], None, None
+        sequence["brackets"].append({
+            "photos": photos,
+            "startTime": bracket_start,
+            "endTime": end_times[i],
+            "duration": end_times[i] - start_times[i],
+            "size": len(photos),
+            "confidence": bracket_confidence,
+            "exposureAnalysis": analyses[i],
+            "orientationConsistency": consistency[i],
+            "predominantOrientation": "vertical" if predominant_vertical[i] else "horizontal",
+            "type": kind,
+            "sequenceId": seq + 1,
+        })
+        sequence["endTime"] = end_times[i]
+
+    if single_sequence:
+        # A lone bracket (or none) is reported as one individual sequence
+        brackets = [b for s in sequences for b in s["brackets"]]
+        for bracket in brackets:
+            bracket["type"], bracket["sequenceId"] = "individual", 1
+        sequences = [{"type": "individual", "brackets": brackets}]
+
+    return {"sequences": sequences, "stats": _plan_stats(sequences, n)}
+
+
+def _plan_stats(sequences: List[Dict], n: int) -> Dict:
+    stats = {
+        "totalPhotos": n,
+        "processedPhotos": sum(b["size"] for s in sequences for b in s["brackets"]),
+        "totalSequences": len(sequences),
+        "panoramaSequences": sum(s["type"] == "panorama" for s in sequences),
+        "individualSequences": sum(len(s["brackets"]) for s in sequences if s["type"] != "panorama"),
+    }
+    stats["totalStacks"] = stats["panoramaSequences"] + stats["individualSequences"]
+    stats["unmatchedPhotos"] = n - stats["processedPhotos"]
+    return stats
+
+
+def _rebuild_bracket(photos: List[Dict], template: Dict, prefs: Dict) -> Dict:
+    """Bracket record for ``photos``, scored like ``plan_brackets`` scores a time group."""
+    size = len(photos)
+    ev = np.array([p.get("exposureValue", np.nan) for p in photos], dtype=np.float64)
+    analysis = _analyze_exposures(ev, np.zeros(size, dtype=np.intp), 1, prefs)
+    vertical = sum(p.get("orientation") == "vertical" for p in photos)
+    consistency = max(vertical, size - vertical) / size
+    confidence = 50 + 30 * bool(analysis["valid"][0]) + 10 * (size == _target_size(prefs)) + 10 * (consistency >= 0.8)
+    start, end = photos[0]["timestamp"], photos[-1]["timestamp"]
+    return {
+        **template,
+        "photos": photos,
+        "startTime": start,
+        "endTime": end,
+        "duration": end - start,
+        "size": size,
+        "confidence": min(confidence, 100),
+        "exposureAnalysis": _exposure_analyses(analysis)[0],
+        "orientationConsistency": consistency,
+        "predominantOrientation": "vertical" if vertical * 2 > size else "horizontal",
+    }
+
+
+def confirm_brackets(plan: Dict, prefs: Optional[Dict] = None, store: Optional["SignatureStore"] = None,
+                     max_workers: int = 8) -> Dict:
+    """Check a stack plan against the photos themselves.
+
+    Brackets are split where neighbouring frames show different views (a
+    quick handheld pan, a burst following a subject), and an incomplete
+    bracket is merged with its neighbour when their boundary frames show the
+    same view. Every bracket with previews gets ``imageSimilarity`` (its
+    least similar pair of neighbours) and ``imageConfidence`` (0-100).
+    Photos without a preview never cause a split or merge. Needs OpenCV,
+    which the rest of the planner does not.
+    """
+    from bracket_evidence import signature_similarity, signatures_for
+
+    prefs = {**DEFAULT_PREFS, **(prefs or {})}
+    n = plan["stats"]["totalPhotos"]
+    signatures = signatures_for(
+        (p.get("photoPath") for s in plan["sequences"] for b in s["brackets"] for p in b["photos"]),
+        store, max_workers,
+    )
+
+    def similarity(a: Dict, b: Dict) -> Optional[float]:
+        sa, sb = signatures.get(a.get("photoPath")), signatures.get(b.get("photoPath"))
+        return None if sa is None or sb is None else signature_similarity(sa, sb)
+
+    min_size = _pref_number(prefs, "minBracketSize")
+    max_size = _pref_number(prefs, "maxBracketSize")
+    target = _target_size(prefs)
+    splits = merges = 0
+
+    for sequence in plan["sequences"]:
+        confirmed = []
+        for bracket in sequence["brackets"]:
+            photos = bracket["photos"]
+            parts = [[photos[0]]]
+            for previous, photo in zip(photos, photos[1:]):
+                link = similarity(previous, photo)
+                if link is not None and link < SPLIT_SIMILARITY:
+                    parts.append([])
+                parts[-1].append(photo)
+            if len(parts) == 1:
+                confirmed.append(bracket)
+                continue
+            splits += 1
+            confirmed += [_rebuild_bracket(part, bracket, prefs) for part in parts if len(part) >= min_size]
+        sequence["brackets"] = confirmed
+
+    # Incomplete brackets split off by a long exposure rejoin their neighbour
+    gap_limit = _pref_number(prefs, "individualBracketGap") * 0.5
+    originals = [b for s in plan["sequences"] for b in s["brackets"]]
+    current: List[Optional[Dict]] = list(originals)
+    for k in range(len(current) - 1):
+        a, b = current[k], current[k + 1]
+        if a is None or a["type"] == "panorama" or b["type"] == "panorama":
+            continue
+        if min(a["size"], b["size"]) >= target or a["size"] + b["size"] > max_size \
+                or b["startTime"] - a["endTime"] > gap_limit:
+            continue
+        link = similarity(a["photos"][-1], b["photos"][0])
+        if link is not None and link >= MERGE_SIMILARITY:
+            current[k], current[k + 1] = None, _rebuild_bracket(a["photos"] + b["photos"], b, prefs)
+            merges += 1
+    final = {id(b): c for b, c in zip(originals, current)}
+    for sequence in plan["sequences"]:
+        sequence["brackets"] = [final[id(b)] for b in sequence["brackets"] if final[id(b)] is not None]
+    plan["sequences"] = [s for s in plan["sequences"] if s["brackets"]]
+
+    low, high = IMAGE_CONFIDENCE_RANGE
+    for sequence in plan["sequences"]:
+        for bracket in sequence["brackets"]:
+            photos = bracket["photos"]
+            links = [x for x in map(similarity, photos, photos[1:]) if x is not None]
+            if links:
+                bracket["imageSimilarity"] = min(links)
+                bracket["imageConfidence"] = int(round(float(np.clip((min(links) - low) / (high - low), 0, 1)) * 100))
+        if "startTime" in sequence and sequence["brackets"]:
+            sequence["startTime"] = sequence["brackets"][0]["startTime"]
+            sequence["endTime"] = sequence["brackets"][-1]["endTime"]
+
+    plan["stats"] = {**_plan_stats(plan["sequences"], n), "imageSplits": splits, "imageMerges": merges,
+                     "imageSignatures": len(signatures)}
+    return plan
+
+
+def write_stack_plan(metadata_path, plan_path, confirm: bool = False) -> Dict:
+    """Plan brackets for an exported metadata table and write the plan as JSON.
+
+    With ``confirm`` (or the ``confirmBracketsWithImages`` preference) the
+    plan is checked against the photos' previews, see ``confirm_brackets``.
+    """
+    table = load_metadata_table(metadata_path)
+    start = time.time()
+    plan = plan_brackets(fill_from_exif(table["photos"]), table["prefs"])
+    if confirm or table["prefs"].get("confirmBracketsWithImages"):
+        from bracket_evidence import SignatureStore, default_store_path
+
+        try:
+            store = SignatureStore(default_store_path())
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Bracket signature cache unavailable, computing every signature: {e}")
+            store = None
+        try:
+            plan = confirm_brackets(plan, table["prefs"], store)
+        finally:
+            if store is not None:
+                store.close()
+        logging.info(
+            f"Image check: {plan['stats']['imageSplits']} brackets split, "
+            f"{plan['stats']['imageMerges']} merged"
+        )
+    stats = plan["stats"]
+    logging.info(
+        f"Bracket plan: {stats['totalStacks']} stacks in {stats['totalSequences']} sequences, "
+        f"{stats['processedPhotos']}/{stats['totalPhotos']} photos ({time.time() - start:.2f}s)"
+    )
+    with open(plan_path, "w", encoding="utf-8") as f:
+        json.dump(plan, f)
+    return plan
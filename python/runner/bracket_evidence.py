@@ -0,0 +1,190 @@
+"""Exposure-independent image signatures for confirming bracket groups.
+
+A bracket is several exposures of one view, so its frames differ in
+brightness but not in structure. Signatures here are histograms of gradient
+orientations over a coarse grid of a small log-intensity thumbnail: scaling
+the exposure only adds a constant to the log image, which leaves the
+gradients, and so the signature, unchanged. A camera pan or a moving subject
+changes them. Thumbnails come from the preview embedded in the file, and
+signatures are cached in a small SQLite database keyed on file identity.
+"""
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from exif_reader import read_thumbnail
+
+try:
+    import rawpy
+except ImportError:
+    rawpy = None
+
+# Bump when the signature layout changes
+SIGNATURE_VERSION = 1
+THUMB_SIZE = 64
+GRID_CELLS = 4
+ORIENTATION_BINS = 8
+# Thumbnail pixels whose gradient is below this (log units) are noise
+MIN_GRADIENT = 0.02
+
+
+def default_store_path() -> Path:
+    return Path(tempfile.gettempdir()) / "wildlifeai_bracket_signatures.sqlite"
+
+
+def load_preview(photo_path) -> Optional[np.ndarray]:
+    """Small grayscale preview of a photo, without decoding the full image.
+
+    Uses the EXIF thumbnail when there is one, then rawpy's embedded
+    preview for RAW files, then a reduced-size JPEG decode.
+    """
+    data = read_thumbnail(photo_path)
+    if data is None and rawpy is not None:
+        try:
+            with rawpy.imread(str(photo_path)) as raw:
+                thumb = raw.extract_thumb()
+            if thumb.format == rawpy.ThumbFormat.JPEG:
+                data = thumb.data
+            else:
+                return cv2.cvtColor(np.asarray(thumb.data), cv2.COLOR_RGB2GRAY)
+        except Exception:
+            data = None
+    try:
+        with Image.open(io.BytesIO(data) if data is not None else photo_path) as img:
+            # JPEGs decode at 1/2..1/8 scale almost for free
+            img.draft("L", (THUMB_SIZE * 2, THUMB_SIZE * 2))
+            return np.asarray(img.convert("L"))
+    except Exception as e:
+        logging.debug(f"No preview for {photo_path}: {e}")
+        return None
+
+
+def gradient_signature(gray: np.ndarray) -> np.ndarray:
+    """Per-cell gradient orientation histograms of an 8-bit grayscale image, normalised per cell."""
+    thumb = cv2.resize(gray.astype(np.float32), (THUMB_SIZE, THUMB_SIZE), interpolation=cv2.INTER_AREA)
+    log = np.log1p(thumb)
+    gx = cv2.Sobel(log, cv2.CV_32F, 1, 0, ksize=3)
+    gy = cv2.Sobel(log, cv2.CV_32F, 0, 1, ksize=3)
+    magnitude = np.hypot(gx, gy)
+    magnitude[magnitude < MIN_GRADIENT] = 0
+    # Unsigned orientation: a gradient and its reverse are the same edge
+    angle = np.mod(np.arctan2(gy, gx), np.pi)
+    bins = np.minimum((angle * (ORIENTATION_BINS / np.pi)).astype(np.intp), ORIENTATION_BINS - 1)
+    cell = THUMB_SIZE // GRID_CELLS
+    rows, cols = np.indices(bins.shape) // cell
+    slot = (rows * GRID_CELLS + cols) * ORIENTATION_BINS + bins
+    hist = np.bincount(slot.ravel(), weights=magnitude.ravel(),
+                       minlength=GRID_CELLS * GRID_CELLS * ORIENTATION_BINS)
+    hist = hist.reshape(GRID_CELLS * GRID_CELLS, ORIENTATION_BINS)
+    hist /= np.linalg.norm(hist, axis=1, keepdims=True) + 1e-6
+    # Centre each cell so unrelated views score near zero rather than near one
+    hist -= hist.mean(axis=1, keepdims=True)
+    return hist.ravel().astype(np.float32)
+
+
+def signature_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Correlation of two signatures, clipped to [0, 1]."""
+    norm = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return max(0.0, float(np.dot(a, b)) / norm) if norm else 0.0
+
+
+def _stat(photo_path) -> Optional[Tuple[int, int]]:
+    try:
+        st = os.stat(photo_path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+class SignatureStore:
+    """SQLite cache of gradient signatures, validated against file size and mtime."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS signatures ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " version INTEGER NOT NULL,"
+                " signature BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    def get(self, photo_path) -> Optional[np.ndarray]:
+        stat = _stat(photo_path)
+        if stat is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, version, signature FROM signatures WHERE path = ?",
+                (os.path.normcase(os.path.abspath(str(photo_path))),),
+            ).fetchone()
+        if row is None or tuple(row[:2]) != stat or row[2] != SIGNATURE_VERSION:
+            return None
+        return np.frombuffer(row[3], dtype=np.float32)
+
+    def put_many(self, items: Iterable[Tuple[str, np.ndarray]]):
+        rows = []
+        for photo_path, signature in items:
+            stat = _stat(photo_path)
+            if stat is not None:
+                rows.append((os.path.normcase(os.path.abspath(str(photo_path))), *stat,
+                             SIGNATURE_VERSION, signature.astype(np.float32).tobytes()))
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._conn.executemany("INSERT OR REPLACE INTO signatures VALUES (?, ?, ?, ?, ?)", rows)
+                self._conn.commit()
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to cache bracket signatures: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def compute_signature(photo_path) -> Optional[np.ndarray]:
+    preview = load_preview(photo_path)
+    return gradient_signature(preview) if preview is not None else None
+
+
+def signatures_for(paths: Iterable[str], store: Optional[SignatureStore] = None,
+                   max_workers: int = 8) -> Dict[str, np.ndarray]:
+    """Signatures of ``paths``, from the store where cached and computed in parallel otherwise.
+
+    Photos without a usable preview are left out of the result.
+    """
+    paths = list(dict.fromkeys(p for p in paths if p))
+    found: Dict[str, np.ndarray] = {}
+    missing = []
+    for path in paths:
+        cached = store.get(path) if store is not None else None
+        if cached is not None:
+            found[path] = cached
+        else:
+            missing.append(path)
+    if missing:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            computed = [(p, s) for p, s in zip(missing, executor.map(compute_signature, missing)) if s is not None]
+        found.update(computed)
+        if store is not None:
+            store.put_many(computed)
+    return found
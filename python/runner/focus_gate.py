@@ -0,0 +1,103 @@
+"""Classical focus score of the subject crop, used to gate the quality model.
+
+The Keras quality model looks at the Sobel gradient magnitude of the bird
+inside its mask, so the same signal gives a cheap estimate of focus. Three
+statistics of the 1024-pixel subject crop, each taken inside the mask and
+mapped to 0..1, are averaged into a focus score:
+
+* gradient energy: mean 5x5 Sobel magnitude, the quality model's own input,
+* Laplacian variance: the ``subject_sharpness`` reported with each result,
+* high-frequency ratio: the share of the subject's contrast left after a
+  small Gaussian blur is subtracted.
+
+Every statistic only reaches two pixels beyond the mask, so the score is
+the same on a crop whose background the stage cache blanked. The score is
+on the quality model's 0..1 scale. Frames scoring below the gate's low end
+are unambiguously blurry and frames at or above its high end unambiguously
+sharp; with the gate on, both take the focus score as their quality score
+instead of running the Keras model. ``focus_gate_report`` measures, on
+frames the model did score, how many the gate would skip and how often the
+rating it would give agrees with the model's.
+"""
+from typing import Dict, Iterable, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from rescoring import RATING_THRESHOLDS, rate_quality
+
+# (low, high) ramps mapping each statistic to 0..1
+GRADIENT_RAMP = (2.2, 3.0)
+LAPLACIAN_RAMP = (1.8, 2.6)
+HIGH_FREQUENCY_RAMP = (0.04, 0.1)
+# Focus scores outside [low, high) skip the quality model when the gate is on
+DEFAULT_GATE = (0.1, 0.9)
+
+
+def _ramp(value: float, low_high) -> float:
+    low, high = low_high
+    return float(np.clip((value - low) / (high - low), 0.0, 1.0))
+
+
+def focus_features(crop: np.ndarray, mask: np.ndarray) -> Optional[Dict[str, float]]:
+    """Gradient energy and Laplacian variance (log10, 8-bit units) and high-frequency ratio inside ``mask``.
+
+    Returns None when the mask is empty.
+    """
+    inside = np.asarray(mask).astype(bool)
+    if not inside.any():
+        return None
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY) if crop.ndim == 3 else crop
+    gray = gray.astype(np.float32)
+    sobel_x = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=5)
+    sobel_y = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=5)
+    gradient = np.sqrt(sobel_x ** 2 + sobel_y ** 2)[inside]
+    laplacian = cv2.Laplacian(gray, cv2.CV_32F)[inside]
+    detail = (gray - cv2.GaussianBlur(gray, (5, 5), 1.0))[inside]
+    contrast = float(gray[inside].var())
+    return {
+        "gradient": float(np.log10(1.0 + gradient.mean())),
+        "laplacian": float(np.log10(1.0 + laplacian.var())),
+        "high_frequency": float((detail ** 2).mean() / contrast) if contrast > 0 else 0.0,
+    }
+
+
+def focus_score(crop: np.ndarray, mask: np.ndarray) -> float:
+    """How sharp the subject is, from 0 (blurred) to 1, or -1 for an empty mask."""
+    features = focus_features(crop, mask)
+    if features is None:
+        return -1
+    return float(np.mean([_ramp(features["gradient"], GRADIENT_RAMP),
+                          _ramp(features["laplacian"], LAPLACIAN_RAMP),
+                          _ramp(features["high_frequency"], HIGH_FREQUENCY_RAMP)]))
+
+
+def is_unambiguous(score: float, gate: Tuple[float, float] = DEFAULT_GATE) -> bool:
+    """Whether a focus score is clear enough to stand in for the quality model."""
+    low, high = gate
+    return score != -1 and (score < low or score >= high)
+
+
+def focus_gate_report(scores: Iterable[float], quality: Iterable[float], gate: Tuple[float, float] = DEFAULT_GATE,
+                      thresholds: Sequence[float] = RATING_THRESHOLDS) -> Dict:
+    """Skip rate of ``gate`` and its rating agreement with the quality model's scores.
+
+    Frames without a focus score or a quality score (-1) are left out.
+    """
+    scores = np.asarray(list(scores), dtype=np.float64)
+    quality = np.asarray(list(quality), dtype=np.float64)
+    scored = (scores != -1) & (quality != -1)
+    scores, quality = scores[scored], quality[scored]
+    low, high = gate
+    skipped = (scores < low) | (scores >= high)
+    agree = rate_quality(scores[skipped], thresholds) == rate_quality(quality[skipped], thresholds)
+    return {
+        "gate": [low, high],
+        "photos": len(scores),
+        "skipped": int(skipped.sum()),
+        "skip_rate": float(skipped.mean()) if len(scores) else 0.0,
+        "blurry": int((scores < low).sum()),
+        "sharp": int((scores >= high).sum()),
+        "rating_agreement": float(agree.mean()) if len(agree) else 1.0,
+        "mean_quality_difference": float(np.abs(scores[skipped] - quality[skipped]).mean()) if len(agree) else 0.0,
+    }
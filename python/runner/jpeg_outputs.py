@@ -0,0 +1,128 @@
+"""Export and crop JPEGs cut from the frame the models already analysed.
+
+The export is the whole frame and the crop is a square around the detected
+bird. Frames without a bird fall back to a centre crop. Both are shrunk with
+area interpolation from the in-memory frame (or its proxy), so the photo is
+not decoded a second time. They are encoded with OpenCV's libjpeg-turbo
+build on a small pool of background threads. Inference workers hand the
+two small images over and move on; they only wait when ``max_pending``
+images are already queued, which bounds the memory held by images waiting
+to be written.
+"""
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from proxy_cache import make_proxy
+
+# Longest side of the export JPEG
+EXPORT_SIZE = 1920
+# Side of the square crop JPEG
+CROP_SIZE = 300
+# Space left around the bird's box, as a share of its longer side
+CROP_MARGIN = 0.15
+JPEG_QUALITY = 85
+ENCODER_WORKERS = 2
+
+
+def _rgb8(frame: np.ndarray) -> np.ndarray:
+    """8-bit RGB view of a decoded frame (grey and RGBA frames are converted)."""
+    frame = make_proxy(frame, 0)
+    if frame.ndim == 2:
+        return np.repeat(frame[..., None], 3, axis=2)
+    return frame[..., :3]
+
+
+def export_image(frame: np.ndarray, size: int = EXPORT_SIZE) -> np.ndarray:
+    """The whole frame, at most ``size`` pixels on its longest side."""
+    return make_proxy(_rgb8(frame), size)
+
+
+def subject_box(box: Optional[Sequence], image_shape: Tuple[int, ...], margin: float = CROP_MARGIN
+                ) -> Tuple[int, int, int]:
+    """``(x0, y0, side)`` of a square around the bird's box, inside the frame.
+
+    Without a box the square is the centre of the frame, as large as fits.
+    """
+    height, width = image_shape[:2]
+    limit = min(height, width)
+    if box is None:
+        return (width - limit) // 2, (height - limit) // 2, limit
+    (bx0, by0), (bx1, by1) = box
+    side = int(min(limit, max(bx1 - bx0, by1 - by0, 1) * (1 + 2 * margin)))
+    cx, cy = (bx0 + bx1) / 2, (by0 + by1) / 2
+    x0 = int(np.clip(round(cx - side / 2), 0, width - side))
+    y0 = int(np.clip(round(cy - side / 2), 0, height - side))
+    return x0, y0, side
+
+
+def crop_image(frame: np.ndarray, box: Optional[Sequence], size: int = CROP_SIZE) -> np.ndarray:
+    """A ``size`` x ``size`` square of the frame around the bird (or its centre)."""
+    x0, y0, side = subject_box(box, frame.shape)
+    square = _rgb8(frame[y0:y0 + side, x0:x0 + side])
+    interpolation = cv2.INTER_AREA if side >= size else cv2.INTER_LINEAR
+    return cv2.resize(square, (size, size), interpolation=interpolation)
+
+
+def write_jpeg(path: Path, rgb: np.ndarray, quality: int = JPEG_QUALITY) -> bool:
+    ok, data = cv2.imencode(".jpg", cv2.cvtColor(rgb, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise ValueError(f"JPEG encoding failed for {path}")
+    Path(path).write_bytes(data.tobytes())
+    return True
+
+
+class JpegWriter:
+    """Bounded pool of background threads encoding and writing JPEGs."""
+
+    def __init__(self, max_workers: int = ENCODER_WORKERS, max_pending: Optional[int] = None, timer=None):
+        self.max_workers = max_workers
+        # Optional ``stage_timing.StageTimer`` recording each write as "jpeg_encode"
+        self.timer = timer
+        self._slots = threading.BoundedSemaphore(max_pending or 2 * max_workers)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jpeg")
+        self._lock = threading.Lock()
+        self._pending: List[Future] = []
+
+    def submit(self, path: Path, rgb: np.ndarray) -> Future:
+        """Queue ``rgb`` to be written to ``path``, waiting while ``max_pending`` images are queued."""
+        self._slots.acquire()
+        try:
+            future = self._executor.submit(self._write, path, rgb)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        with self._lock:
+            # Finished writes drop out; failures stay for wait() to report
+            self._pending = [f for f in self._pending if not f.done() or f.exception() is not None]
+            self._pending.append(future)
+        return future
+
+    def _write(self, path: Path, rgb: np.ndarray) -> bool:
+        if self.timer is None:
+            return write_jpeg(path, rgb)
+        with self.timer.stage("jpeg_encode"):
+            return write_jpeg(path, rgb)
+
+    def wait(self) -> int:
+        """Wait for every queued image; returns how many failed (each is logged)."""
+        with self._lock:
+            pending, self._pending = self._pending, []
+        failed = 0
+        for future in pending:
+            try:
+                future.result()
+            except Exception as e:
+                logging.warning(f"Failed to write JPEG: {e}")
+                failed += 1
+        return failed
+
+    def close(self):
+        self.wait()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,111 @@
+"""Append-only store for ``kestrel_database.csv``.
+
+The Project Kestrel analyzer records one row per processed file. Rows are
+appended to the CSV as they are produced, so the cost of recording a result
+does not grow with the size of the database, and the file keeps the exact
+column schema the rest of the tooling reads.
+"""
+import csv
+import os
+from numbers import Integral, Real
+
+DATABASE_NAME = "kestrel_database.csv"
+
+COLUMNS = [
+    "filename", "species", "species_confidence",
+    "quality", "export_path", "crop_path", "rating",
+    "scene_count", "feature_similarity", "feature_confidence", "color_similarity", "color_confidence",
+]
+
+
+def _format_value(value):
+    """Format a value the way ``DataFrame.to_csv(float_format='%.16f')`` did."""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, Integral):
+        return str(int(value))
+    if isinstance(value, Real):
+        return "%.16f" % float(value)
+    return value
+
+
+class KestrelDatabase:
+    """Incremental writer for a folder's ``kestrel_database.csv``.
+
+    Opening the database reads the existing file once to learn which files
+    were already processed and the highest scene count; afterwards every
+    :meth:`append` writes a single row and flushes it to disk.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.columns = list(COLUMNS)
+        self.filenames = set()
+        self.max_scene_count = 0
+        self._file = None
+        self._writer = None
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            if reader.fieldnames:
+                # Keep the column order of an existing database
+                self.columns = list(reader.fieldnames)
+            for row in reader:
+                self._track(row.get("filename"), row.get("scene_count"))
+
+    def _track(self, filename, scene_count):
+        if filename:
+            self.filenames.add(filename)
+        try:
+            self.max_scene_count = max(self.max_scene_count, int(float(scene_count)))
+        except (TypeError, ValueError):
+            pass
+
+    def __contains__(self, filename):
+        return filename in self.filenames
+
+    def __len__(self):
+        return len(self.filenames)
+
+    def new_files(self, filenames):
+        """Return the entries of ``filenames`` that are not in the database yet."""
+        return [f for f in filenames if f not in self.filenames]
+
+    def append(self, entry):
+        """Append one result row and flush it to disk."""
+        if self._writer is None:
+            write_header = not os.path.exists(self.path) or os.path.getsize(self.path) == 0
+            self._file = open(self.path, "a", newline="", encoding="utf-8")
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns, extrasaction="ignore")
+            if write_header:
+                self._writer.writeheader()
+        self._writer.writerow({k: _format_value(entry.get(k)) for k in self.columns})
+        self._file.flush()
+        self._track(entry.get("filename"), entry.get("scene_count"))
+
+    def iter_rows(self):
+        """Yield the database rows as dictionaries without loading the whole file."""
+        if self._file is not None:
+            self._file.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, newline="", encoding="utf-8") as f:
+            yield from csv.DictReader(f)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
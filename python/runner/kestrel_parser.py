@@ -1,5 +1,15 @@
+import csv
+import json
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+from kestrel_database import DATABASE_NAME
+from scene_index import path_key
+
+SIDECAR_DIR = ".wildlifeai"
+
 
 def to_lightroom_json(raw, src_path, output_dir):
     json_path = Path(output_dir) / Path(src_path).with_suffix('.json').name
@@ -12,6 +22,197 @@ def to_lightroom_json(raw, src_path, output_dir):
         'rating': int(raw.get('rating', 0)),
         'scene_count': int(raw.get('scene_count', 0)),
         'feature_similarity': int(raw.get('feature_similarity', 0)),
+        'feature_confidence': int(raw.get('feature_confidence', 0)),
         'color_similarity': int(raw.get('color_similarity', 0)),
         'color_confidence': int(raw.get('color_confidence', 0)),
     }
+
+
+def _float(value, default=0.0):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _percent(value):
+    """Scale a 0-1 score to an int percentage, keeping the -1 'not computed' marker."""
+    return int(value * 100) if value > 0 else int(value)
+
+
+def kestrel_row_to_result(row):
+    """Convert a kestrel_database.csv row into the runner's result record.
+
+    The CSV stores raw model scores; the runner reports them as integer
+    percentages, scaled the same way ``EnhancedModelRunner`` does.
+    """
+    species_confidence = _float(row.get('species_confidence'))
+    quality = _float(row.get('quality'), -1)
+    return {
+        'filename': row.get('filename', ''),
+        'species': row.get('species', ''),
+        'species_confidence': int(species_confidence * 100) if species_confidence != 0 else 0,
+        'quality': int(quality * 100) if quality != -1 else -1,
+        'export_path': row.get('export_path', ''),
+        'crop_path': row.get('crop_path', ''),
+        'rating': int(_float(row.get('rating'))),
+        'scene_count': int(_float(row.get('scene_count'))),
+        'feature_similarity': _percent(_float(row.get('feature_similarity'), -1)),
+        'feature_confidence': _percent(_float(row.get('feature_confidence'), -1)),
+        'color_similarity': int(_float(row.get('color_similarity'), -1)),
+        'color_confidence': _percent(_float(row.get('color_confidence'), -1)),
+        'processing_time': 0,
+    }
+
+
+def find_kestrel_databases(paths):
+    """Yield every kestrel_database.csv named by ``paths``.
+
+    A path may be a database file, a photo folder containing
+    ``.kestrel/kestrel_database.csv``, or a folder tree to search.
+    """
+    for path in paths:
+        path = str(path)
+        if os.path.isfile(path):
+            yield path
+            continue
+        if not os.path.isdir(path):
+            logging.warning(f"Kestrel database not found: {path}")
+            continue
+        for root, dirs, files in os.walk(path):
+            if os.path.basename(root) == '.kestrel':
+                if DATABASE_NAME in files:
+                    yield os.path.join(root, DATABASE_NAME)
+                dirs[:] = []
+                continue
+            # Only descend into .kestrel among the hidden folders
+            dirs[:] = sorted(d for d in dirs if d == '.kestrel' or not d.startswith('.'))
+
+
+def _scan_files(folder):
+    """Map the names of the files in ``folder`` to their ``(size, mtime_ns)``."""
+    files = {}
+    try:
+        with os.scandir(folder) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    st = entry.stat()
+                    files[entry.name] = (st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        pass
+    return files
+
+
+def _write_sidecar(path, data):
+    with open(path, 'w', encoding='utf-8') as out:
+        out.write(json.dumps(data))
+
+
+def _remap_scenes(entries, photo_dir, scene_index):
+    """Replace a database's own scene numbers with ids allocated from ``scene_index``.
+
+    Every kestrel database numbers its scenes from 1, so they are moved to
+    ids unique across the index and the imported frames are recorded there.
+    Photos the index already knows keep their scene, and so does the rest
+    of their Kestrel scene, so importing a database again changes nothing.
+    """
+    known = scene_index.folder_scenes(photo_dir)
+    scenes = {}
+    for photo_path, result, _ in entries:
+        indexed = known.get(path_key(photo_path))
+        if indexed is not None:
+            scenes.setdefault(result['scene_count'], indexed)
+    new = sorted({r['scene_count'] for _, r, _ in entries} - set(scenes))
+    if new:
+        first = scene_index.allocate_scenes(len(new))
+        scenes.update({number: first + k for k, number in enumerate(new)})
+
+    frames = []
+    for photo_path, result, stat in entries:
+        indexed = known.get(path_key(photo_path))
+        scene_id = indexed if indexed is not None else scenes[result['scene_count']]
+        if indexed is None:
+            frames.append((photo_path, stat[1] / 1e9, scene_id))
+        result['scene_count'] = result['cluster_id'] = scene_id
+    scene_index.record_many(frames)
+
+
+def import_kestrel_database(database_path, cache=None, overwrite=False, executor=None, scene_index=None):
+    """Write plugin sidecars (and cache entries) for one kestrel database.
+
+    Photos are expected in the folder that holds the ``.kestrel`` directory.
+    With ``scene_index`` the database's scene numbers are remapped to scene
+    ids of the index (see ``_remap_scenes``). Sidecar writes are handed to
+    ``executor`` when one is given. Returns ``(imported, skipped)`` row counts.
+    """
+    database_path = Path(database_path)
+    kestrel_dir = database_path.parent
+    photo_dir = kestrel_dir.parent if kestrel_dir.name == '.kestrel' else kestrel_dir
+    sidecar_dir = photo_dir / SIDECAR_DIR
+    sidecar_dir.mkdir(exist_ok=True)
+
+    # One directory listing each instead of several stat calls per row
+    photos = _scan_files(photo_dir)
+    existing_sidecars = set() if overwrite else set(_scan_files(sidecar_dir))
+    photo_root = str(photo_dir)
+    sidecar_root = str(sidecar_dir)
+
+    skipped = 0
+    entries = []
+    with open(database_path, newline='', encoding='utf-8') as f:
+        for row in csv.DictReader(f):
+            filename = row.get('filename')
+            if not filename or filename not in photos:
+                skipped += 1
+                continue
+            entries.append((os.path.join(photo_root, filename), kestrel_row_to_result(row), photos[filename]))
+    if scene_index is not None and entries:
+        _remap_scenes(entries, photo_dir, scene_index)
+
+    writes = []
+    for photo_path, result, _ in entries:
+        sidecar_name = f"{os.path.basename(photo_path)}.json"
+        if sidecar_name in existing_sidecars:
+            continue
+        sidecar_path = os.path.join(sidecar_root, sidecar_name)
+        data = to_lightroom_json(result, photo_path, sidecar_root)
+        data.update({
+            'json_path': sidecar_path,
+            'photo_path': photo_path,
+            'export_path': result['export_path'],
+            'crop_path': result['crop_path'],
+            'processing_time': 0,
+        })
+        if 'cluster_id' in result:
+            data['cluster_id'] = result['cluster_id']
+        if executor is not None:
+            writes.append(executor.submit(_write_sidecar, sidecar_path, data))
+        else:
+            _write_sidecar(sidecar_path, data)
+
+    if cache is not None and entries:
+        cache.put_many([(path, result) for path, result, _ in entries], {path: stat for path, _, stat in entries})
+    for future in writes:
+        future.result()
+    return len(entries), skipped
+
+
+def import_kestrel_databases(paths, cache=None, overwrite=False, max_workers=8, scene_index=None):
+    """Import every kestrel database found under ``paths``; returns the total counts.
+
+    Sidecar files are written by a small thread pool since creating many
+    small files is bound by file-system latency, not CPU.
+    """
+    databases = imported = skipped = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for database_path in find_kestrel_databases(paths):
+            try:
+                count, missing = import_kestrel_database(database_path, cache, overwrite, executor, scene_index)
+            except (OSError, csv.Error) as e:
+                logging.error(f"Failed to import {database_path}: {e}")
+                continue
+            logging.info(f"Imported {count} results from {database_path} ({missing} photos missing)")
+            databases += 1
+            imported += count
+            skipped += missing
+    return {"databases": databases, "imported": imported, "skipped": skipped}
@@ -0,0 +1,172 @@
+"""Run-length encoded bird masks and a per-folder container for them.
+
+Masks are encoded like COCO's uncompressed RLE: the image is read column by
+column and ``counts`` holds the lengths of alternating runs of background
+and bird pixels, starting with background. A bird mask of a 24-megapixel
+photo is one or two runs per column, a few kilobytes instead of megabytes of
+booleans. Encoding and decoding are vectorised, and ``crop`` inflates only
+the columns of the requested box.
+
+``MaskStore`` keeps the masks of one folder's photos in a single SQLite file
+next to the plug-in's ``.wildlifeai`` sidecars, validated against each
+photo's size and modification time like the result cache.
+"""
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Name of the container file in a folder's sidecar directory
+MASK_CONTAINER_NAME = "masks.sqlite"
+
+Rle = Dict[str, object]
+
+
+def encode(mask: np.ndarray) -> Rle:
+    """``{"size": [height, width], "counts": uint32 runs}`` of a 2-D boolean mask."""
+    mask = np.asarray(mask, dtype=bool)
+    flat = mask.ravel(order="F")
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    counts = np.diff(np.concatenate(([0], changes, [flat.size])))
+    if flat.size and flat[0]:
+        counts = np.concatenate(([0], counts))
+    return {"size": [int(n) for n in mask.shape], "counts": counts.astype(np.uint32)}
+
+
+def _runs(rle: Rle) -> Tuple[int, int, np.ndarray]:
+    height, width = (int(n) for n in rle["size"])
+    return height, width, np.asarray(rle["counts"], dtype=np.int64)
+
+
+def decode(rle: Rle) -> np.ndarray:
+    """The full boolean mask of ``rle``."""
+    height, width, counts = _runs(rle)
+    values = np.arange(len(counts)) % 2 == 1
+    return np.repeat(values, counts).reshape((height, width), order="F")
+
+
+def area(rle: Rle) -> int:
+    """Number of mask pixels."""
+    return int(_runs(rle)[2][1::2].sum())
+
+
+def bbox(rle: Rle) -> Optional[Tuple[int, int, int, int]]:
+    """``(x0, y0, x1, y1)`` bounds of the mask (exclusive upper bounds), None when it is empty."""
+    height, _, counts = _runs(rle)
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    bird = (np.arange(len(counts)) % 2 == 1) & (counts > 0)
+    if not bird.any():
+        return None
+    starts, last = starts[bird], ends[bird] - 1
+    first_col, last_col = starts // height, last // height
+    # A run that wraps into the next column covers the bottom of one and the top of the other
+    wraps = first_col != last_col
+    y0 = 0 if wraps.any() else int((starts % height).min())
+    y1 = height if wraps.any() else int((last % height).max()) + 1
+    return int(first_col.min()), y0, int(last_col.max()) + 1, y1
+
+
+def crop(rle: Rle, box: Tuple[int, int, int, int]) -> np.ndarray:
+    """The mask inside ``box`` (x0, y0, x1, y1), inflating only the box's columns."""
+    height, width, counts = _runs(rle)
+    x0, y0, x1, y1 = box
+    x0, x1 = max(0, int(x0)), min(width, int(x1))
+    y0, y1 = max(0, int(y0)), min(height, int(y1))
+    if x1 <= x0 or y1 <= y0:
+        return np.zeros((max(0, y1 - y0), max(0, x1 - x0)), dtype=bool)
+    start, stop = x0 * height, x1 * height
+    ends = np.cumsum(counts)
+    starts = ends - counts
+    first = int(np.searchsorted(ends, start, side="right"))
+    last = int(np.searchsorted(starts, stop, side="left"))
+    lengths = np.minimum(ends[first:last], stop) - np.maximum(starts[first:last], start)
+    values = np.arange(first, last) % 2 == 1
+    band = np.repeat(values, lengths).reshape((height, x1 - x0), order="F")
+    return band[y0:y1]
+
+
+def to_json(rle: Rle) -> Dict:
+    """JSON-serialisable form of ``rle`` (COCO's uncompressed RLE)."""
+    return {"size": list(rle["size"]), "counts": np.asarray(rle["counts"]).tolist()}
+
+
+def mask_container_path(folder, sidecar_dir: str) -> Path:
+    """Where the masks of the photos in ``folder`` are kept."""
+    return Path(folder) / sidecar_dir / MASK_CONTAINER_NAME
+
+
+class MaskStore:
+    """SQLite container of one folder's run-length encoded masks, shared between threads under a lock."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS masks ("
+                " name TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " height INTEGER NOT NULL,"
+                " width INTEGER NOT NULL,"
+                " counts BLOB NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _key(photo_path) -> Tuple[str, Optional[Tuple[int, int]]]:
+        try:
+            st = os.stat(photo_path)
+        except OSError:
+            return os.path.basename(str(photo_path)), None
+        return os.path.basename(str(photo_path)), (st.st_size, st.st_mtime_ns)
+
+    def get(self, photo_path) -> Optional[Rle]:
+        """The stored mask of a photo, or None when there is none or the photo changed since."""
+        name, stat = self._key(photo_path)
+        if stat is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, height, width, counts FROM masks WHERE name = ?", (name,)
+            ).fetchone()
+        if row is None or (row[0], row[1]) != stat:
+            return None
+        return {"size": [row[2], row[3]], "counts": np.frombuffer(row[4], dtype=np.uint32)}
+
+    def put(self, photo_path, rle: Rle) -> bool:
+        name, stat = self._key(photo_path)
+        if stat is None:
+            return False
+        height, width = (int(n) for n in rle["size"])
+        counts = np.asarray(rle["counts"], dtype=np.uint32).tobytes()
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.execute("INSERT OR REPLACE INTO masks VALUES (?, ?, ?, ?, ?, ?)",
+                                       (name, stat[0], stat[1], height, width, counts))
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to store mask of {name} in {self.path}: {e}")
+                return False
+        return True
+
+    def names(self) -> List[str]:
+        with self._lock:
+            return [row[0] for row in self._conn.execute("SELECT name FROM masks ORDER BY name")]
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM masks").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,270 @@
+"""Memory watermarks of a run and a governor that keeps it under a budget.
+
+Every photo in flight holds its decoded frame, the Mask R-CNN input tensor
+and masks, and the crops cut from it. A 45 MP frame alone is 135 MB of RGB,
+so with one worker per CPU thread a large shoot can exhaust RAM and swap.
+
+``MemoryWatermarks`` samples the resident set size (RSS) of the process
+around each timed stage. It keeps the highest RSS reached in each stage and
+the most a single stage grew it. ``process_rss`` reads the RSS from psutil
+when it is installed, otherwise from ``/proc`` on Linux and
+``GetProcessMemoryInfo`` on Windows. Where none of these are available the
+watermarks stay empty.
+
+``MemoryGovernor`` admits a photo only while the estimated memory of the
+photos in flight fits in the budget left over by the models. A photo is
+estimated at ``BYTES_PER_PIXEL`` times the largest frame decoded so far.
+Admission also waits while the measured RSS is over the budget. Photos are
+throttled instead of failing. A single photo is always admitted, so a budget
+that is too small degrades to one photo at a time.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+
+MB = 1024 ** 2
+GB = 1024 ** 3
+# Peak bytes per pixel of a photo in flight. That is 3 for the RGB frame,
+# 12 for the float Mask R-CNN input tensor, 4 for each full-size float mask
+# (about two) and 1 for the bool mask.
+BYTES_PER_PIXEL = 24
+# Frame assumed before the first photo of a run has been decoded
+DEFAULT_FRAME_PIXELS = 24_000_000
+# How often a waiting admission checks the RSS again
+POLL_INTERVAL = 0.25
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _windows_rss(pid: int) -> Optional[int]:
+    import ctypes
+    from ctypes import wintypes
+
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in (
+                "PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage", "QuotaPagedPoolUsage",
+                "QuotaPeakNonPagedPoolUsage", "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")
+        ]
+
+    kernel32 = ctypes.WinDLL("kernel32", use_last_error=True)
+    kernel32.OpenProcess.restype = wintypes.HANDLE
+    # PROCESS_QUERY_LIMITED_INFORMATION | PROCESS_VM_READ
+    handle = kernel32.GetCurrentProcess() if pid == os.getpid() else kernel32.OpenProcess(0x1010, False, pid)
+    if not handle:
+        return None
+    try:
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not kernel32.K32GetProcessMemoryInfo(handle, ctypes.byref(counters), counters.cb):
+            return None
+        return counters.WorkingSetSize
+    finally:
+        if pid != os.getpid():
+            kernel32.CloseHandle(handle)
+
+
+def _proc_rss(pid: int) -> Optional[int]:
+    with open(f"/proc/{pid}/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def process_rss(pids: Optional[Iterable[int]] = None) -> Optional[int]:
+    """Resident bytes of this process, or the sum over ``pids``; None when RSS cannot be read."""
+    total = 0
+    for pid in (os.getpid(),) if pids is None else pids:
+        try:
+            if psutil is not None:
+                rss = psutil.Process(pid).memory_info().rss
+            elif sys.platform == "win32":
+                rss = _windows_rss(pid)
+            else:
+                rss = _proc_rss(pid)
+        except Exception:
+            # Processes that have exited no longer count
+            if pid == os.getpid():
+                return None
+            continue
+        if rss is None and pid == os.getpid():
+            return None
+        total += rss or 0
+    return total
+
+
+def frame_bytes(shape) -> int:
+    """Estimated peak memory of a photo in flight whose frame has ``shape``."""
+    return int(shape[0]) * int(shape[1]) * BYTES_PER_PIXEL
+
+
+def _mb(nbytes: Optional[float]) -> Optional[float]:
+    return round(nbytes / MB, 1) if nbytes is not None else None
+
+
+class MemoryWatermarks:
+    """Highest RSS reached and largest growth per stage, and the peak of the run."""
+
+    def __init__(self, rss: Callable[[], Optional[int]] = process_rss):
+        self.rss = rss
+        self._lock = threading.Lock()
+        self.available = rss() is not None
+        self.reset()
+
+    def reset(self):
+        """Start a new run from the current RSS."""
+        start = self.rss() if self.available else None
+        with self._lock:
+            self.start = self.peak = start
+            self._stages: Dict[str, Dict[str, int]] = {}
+
+    def sample(self) -> Optional[int]:
+        """Current RSS, also folded into the run peak."""
+        if not self.available:
+            return None
+        rss = self.rss()
+        if rss is not None:
+            with self._lock:
+                self.peak = max(self.peak or 0, rss)
+        return rss
+
+    def record(self, stage: str, before: Optional[int], after: Optional[int]):
+        """Fold in the RSS sampled before and after ``stage`` ran."""
+        if before is None or after is None:
+            return
+        with self._lock:
+            stats = self._stages.setdefault(stage, {"peak": 0, "growth": 0})
+            stats["peak"] = max(stats["peak"], after)
+            stats["growth"] = max(stats["growth"], after - before)
+
+    def merge(self, stages: Dict[str, Dict[str, float]]):
+        """Fold in the stage watermarks (MB) reported by a worker process."""
+        with self._lock:
+            for stage, stats in stages.items():
+                mine = self._stages.setdefault(stage, {"peak": 0, "growth": 0})
+                mine["peak"] = max(mine["peak"], int(stats["rss_peak_mb"] * MB))
+                mine["growth"] = max(mine["growth"], int(stats["max_growth_mb"] * MB))
+
+    def summary(self) -> Dict:
+        """RSS at the start and peak of the run, and each stage's watermarks, in MB."""
+        self.sample()
+        with self._lock:
+            return {
+                "rss_start_mb": _mb(self.start),
+                "rss_peak_mb": _mb(self.peak),
+                "stages": {stage: {"rss_peak_mb": _mb(stats["peak"]), "max_growth_mb": _mb(stats["growth"])}
+                           for stage, stats in sorted(self._stages.items())},
+            }
+
+
+class MemoryGovernor:
+    """Admits photos while their estimated memory fits in ``budget`` bytes."""
+
+    def __init__(self, budget: int, rss: Callable[[], Optional[int]] = process_rss):
+        self.budget = int(budget)
+        self.rss = rss
+        self._cond = threading.Condition()
+        self._local = threading.local()
+        self._reserved: Dict[int, int] = {}
+        self._next_token = 0
+        self.photo_bytes = frame_bytes((DEFAULT_FRAME_PIXELS, 1))
+        self._measured = False
+        self.start()
+
+    def start(self):
+        """Measure the memory the models already use; photos share what is left of the budget."""
+        with self._cond:
+            self.baseline = self.rss() or 0
+            self.headroom = max(self.budget - self.baseline, 0)
+            self.peak_in_flight = 0
+            self.throttled = 0
+            self.wait_time = 0.0
+        if not self.headroom:
+            logging.warning(f"Memory budget of {self.budget / GB:.1f} GB is already used by the models "
+                            f"({self.baseline / MB:.0f} MB); photos will be analysed one at a time")
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._reserved)
+
+    def _over_budget(self) -> bool:
+        rss = self.rss()
+        return rss is not None and rss > self.budget
+
+    def _fits(self) -> bool:
+        if not self._reserved:
+            return True
+        return sum(self._reserved.values()) + self.photo_bytes <= self.headroom and not self._over_budget()
+
+    def admit(self, block: bool = True) -> Optional[int]:
+        """Reserve memory for one photo; returns its token, or None when ``block`` is off and it does not fit.
+
+        The token is also remembered for the calling thread, so ``allocated``
+        and ``release`` can be called from it without one.
+        """
+        with self._cond:
+            if not self._fits():
+                if not block:
+                    return None
+                self.throttled += 1
+                start = time.perf_counter()
+                while not self._fits():
+                    self._cond.wait(POLL_INTERVAL)
+                self.wait_time += time.perf_counter() - start
+            token = self._next_token
+            self._next_token += 1
+            self._reserved[token] = self.photo_bytes
+            self.peak_in_flight = max(self.peak_in_flight, len(self._reserved))
+        self._local.token = token
+        return token
+
+    def allocated(self, shape, token: Optional[int] = None):
+        """Size a photo's reservation from its decoded frame; later photos are estimated from the largest."""
+        nbytes = frame_bytes(shape)
+        token = getattr(self._local, "token", None) if token is None else token
+        with self._cond:
+            if token in self._reserved:
+                self._reserved[token] = nbytes
+            # The first frame replaces the default guess
+            self.photo_bytes = max(self.photo_bytes, nbytes) if self._measured else nbytes
+            self._measured = True
+            self._cond.notify_all()
+
+    def release(self, token: Optional[int] = None):
+        """Return a finished photo's reservation."""
+        if token is None:
+            token = getattr(self._local, "token", None)
+            self._local.token = None
+        with self._cond:
+            self._reserved.pop(token, None)
+            self._cond.notify_all()
+
+    def summary(self) -> Dict:
+        with self._cond:
+            return {
+                "budget_mb": _mb(self.budget),
+                "baseline_mb": _mb(self.baseline),
+                "photo_estimate_mb": _mb(self.photo_bytes),
+                "peak_in_flight": self.peak_in_flight,
+                "throttled": self.throttled,
+                "wait_time": round(self.wait_time, 2),
+            }
+
+
+def memory_lines(memory: Dict) -> list:
+    """Run peak, governor figures and stage watermarks, for the log and the regression report."""
+    lines = []
+    if memory.get("rss_peak_mb") is not None:
+        lines.append(f"peak RSS {memory['rss_peak_mb']:.0f} MB (started at {memory['rss_start_mb']:.0f} MB)")
+    governor = memory.get("governor")
+    if governor:
+        lines.append(f"budget {governor['budget_mb']:.0f} MB: up to {governor['peak_in_flight']} photo(s) of "
+                     f"~{governor['photo_estimate_mb']:.0f} MB in flight, {governor['throttled']} admission(s) "
+                     f"waited {governor['wait_time']:.1f}s")
+    for stage, stats in sorted(memory.get("stages", {}).items(), key=lambda item: -item[1]["max_growth_mb"]):
+        lines.append(f"{stage}: peak {stats['rss_peak_mb']:.0f} MB, grew up to {stats['max_growth_mb']:.1f} MB")
+    return lines
@@ -0,0 +1,112 @@
+"""Analysis profiles: a fast triage pass and the full-fidelity analysis.
+
+After a long day a shoot holds tens of thousands of frames, and a rough
+rating of all of them is worth more than an exact rating of a few. The
+``triage`` profile trades precision for speed at every step:
+
+* it analyses the photo's embedded preview (a reduced-size decode for
+  JPEGs) instead of decoding the full image,
+* the analysed frame is at most ``frame_edge`` pixels on its longest side,
+  and Mask R-CNN resizes it to ``detection_size`` rather than its default
+  800 x 1333 input,
+* scenes are told apart with the ``tiered`` detector, whose image hash and
+  colour histogram settle most frame pairs without AKAZE,
+* no export or crop JPEGs are written.
+
+``full`` is the regular analysis. Every result is tagged with the profile
+that produced it. A triage result never stands in for a full one, so a
+full run of the keepers re-analyses exactly the photos that were triaged.
+"""
+import io
+import logging
+import math
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+try:
+    import rawpy
+except ImportError:
+    rawpy = None
+
+
+class Profile(NamedTuple):
+    name: str
+    # Higher fidelity results can stand in for lower ones, never the reverse
+    fidelity: int
+    # Analyse the embedded preview rather than the decoded photo
+    preview: bool = False
+    # Longest side of the analysed frame (None = as decoded)
+    frame_edge: Optional[int] = None
+    # Mask R-CNN (min_size, max_size) input size (None = torchvision's default)
+    detection_size: Optional[Tuple[int, int]] = None
+    # Overrides --scene-detector (None = as chosen)
+    scene_detector: Optional[str] = None
+    generate_crops: bool = True
+
+    @property
+    def fingerprint(self) -> Tuple:
+        """Settings that change what the cached stages produce (empty for ``full``)."""
+        if not (self.preview or self.frame_edge or self.detection_size):
+            return ()
+        return (self.name, self.preview, self.frame_edge, self.detection_size)
+
+
+PROFILES: Dict[str, Profile] = {
+    "full": Profile("full", fidelity=1),
+    "triage": Profile("triage", fidelity=0, preview=True, frame_edge=1600, detection_size=(512, 1024),
+                      scene_detector="tiered", generate_crops=False),
+}
+DEFAULT_PROFILE = "full"
+
+JPEG_EXTENSIONS = {".jpg", ".jpeg"}
+RAW_EXTENSIONS = {".arw", ".cr2", ".nef", ".dng", ".rw2", ".orf"}
+
+
+def satisfies(result: Dict, profile: Profile) -> bool:
+    """Whether a stored result is at least as precise as ``profile`` asks for.
+
+    Results without a profile (older runs, Project Kestrel imports) are full
+    analyses.
+    """
+    stored = PROFILES.get(result.get("profile", DEFAULT_PROFILE), PROFILES[DEFAULT_PROFILE])
+    return stored.fidelity >= profile.fidelity
+
+
+def _decode_jpeg(source, edge: int) -> np.ndarray:
+    with Image.open(source) as img:
+        # JPEGs decode at 1/2..1/8 scale almost for free; keep the longest side at least ``edge``
+        scale = min(1.0, edge / max(img.size))
+        img.draft("RGB", (math.ceil(img.width * scale), math.ceil(img.height * scale)))
+        return np.asarray(img.convert("RGB"))
+
+
+def read_preview(photo_path, edge: int) -> Optional[np.ndarray]:
+    """RGB preview of a photo with a longest side of at least ``edge / 2``, or None.
+
+    JPEGs are decoded at a reduced scale; RAW files give their largest
+    embedded preview (through rawpy). The preview is not rotated upright.
+    Returns None for other formats, without rawpy, and when the preview is
+    too small to analyse, so the caller can decode the photo instead.
+    """
+    ext = Path(photo_path).suffix.lower()
+    try:
+        if ext in JPEG_EXTENSIONS:
+            frame = _decode_jpeg(photo_path, edge)
+        elif ext in RAW_EXTENSIONS and rawpy is not None:
+            with rawpy.imread(str(photo_path)) as raw:
+                thumb = raw.extract_thumb()
+            if thumb.format == rawpy.ThumbFormat.JPEG:
+                frame = _decode_jpeg(io.BytesIO(thumb.data), edge)
+            else:
+                frame = np.asarray(thumb.data)
+        else:
+            return None
+    except Exception as e:
+        logging.debug(f"No preview for {photo_path}: {e}")
+        return None
+    if frame.ndim != 3 or max(frame.shape[:2]) < edge / 2:
+        return None
+    return frame
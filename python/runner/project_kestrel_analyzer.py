@@ -1,4 +1,9 @@
+import argparse
+import glob
 import os
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed, wait, FIRST_COMPLETED
+
 import torchvision
 import cv2
 import numpy as np
@@ -6,34 +11,43 @@ from PIL import Image
 import torchvision.transforms as T
 import onnxruntime as ort
 from wand.image import Image as WandImage
-import pandas as pd
 import keras
 
+from kestrel_database import KestrelDatabase, DATABASE_NAME
+
 SPECIESCLASSIFIER_PATH = "models/model.onnx"
 SPECIESCLASSIFIER_LABELS = "models/labels.txt"
 
 QUALITYCLASSIFIER_PATH = "models/quality.keras"
 
-# prompt user for ONNX inference provider
-onnx_provider_input = input(
-    "Do you want to use GPU for ONNX inference? (y/n): "
-).strip().lower()
-
-# Default to CPU inference unless user explicitly selects GPU
-ONNX_USE_GPU = False
-if onnx_provider_input == 'y':
-    ONNX_USE_GPU = True
-elif onnx_provider_input == 'n':
-    pass
-else:
-    print(
-        "Warning: invalid input for GPU selection. Using CPU for ONNX inference."
-    )
+RAW_EXTENSIONS = [".cr2",".cr3", ".nef", ".arw", ".dng", ".orf", ".raf", ".rw2", ".pef", ".sr2", ".x3f"]
+JPEG_EXTENSIONS = [".jpg", ".jpeg", ".png"]
+
+
+def get_onnx_providers(use_gpu):
+    """Return the ONNX Runtime execution providers for the requested device."""
+    if use_gpu:
+        return ['DmlExecutionProvider']
+    return ['CPUExecutionProvider']
+
 
-if ONNX_USE_GPU:
-    ONNX_PROVIDER = ['DmlExecutionProvider']
-else:
-    ONNX_PROVIDER = ['CPUExecutionProvider']
+def prompt_onnx_providers():
+    """Ask the user whether ONNX inference should run on the GPU."""
+    onnx_provider_input = input(
+        "Do you want to use GPU for ONNX inference? (y/n): "
+    ).strip().lower()
+
+    # Default to CPU inference unless user explicitly selects GPU
+    onnx_use_gpu = False
+    if onnx_provider_input == 'y':
+        onnx_use_gpu = True
+    elif onnx_provider_input == 'n':
+        pass
+    else:
+        print(
+            "Warning: invalid input for GPU selection. Using CPU for ONNX inference."
+        )
+    return get_onnx_providers(onnx_use_gpu)
 
 class maskRCNN:
     def __init__(self):
@@ -235,14 +249,14 @@ class maskRCNN:
         return species_classifier_crop
     
 class BirdSpeciesClassifier:
-    def __init__(self, model_path, labels_path):
+    def __init__(self, model_path, labels_path, onnx_providers=None):
         self.model_path = model_path
         self.labels_path = labels_path
         with open(labels_path, "r") as f:
             self.labels = [line.strip() for line in f.readlines()]
             self.labels = np.array(self.labels)
 
-        self.session = ort.InferenceSession(self.model_path,providers=ONNX_PROVIDER)
+        self.session = ort.InferenceSession(self.model_path,providers=onnx_providers or get_onnx_providers(False))
     
     def __preprocess_image(self,image):
         """Preprocess the image data to the model input tensor dimensions."""
@@ -446,149 +460,155 @@ def compute_image_similarity_akaze(img1, img2, max_dim=1600):
             'confidence': 0
         }
 
-# Prompt user for input directory.
-input_directory = input("Enter the path to the directory containing images: ")
-if not os.path.isdir(input_directory):
-    print("Invalid directory path. Please try again.")
-    exit(1)
-
-# Find all images in the input directory that are RAW files
-raw_extensions = [".cr2",".cr3", ".nef", ".arw", ".dng", ".orf", ".raf", ".rw2", ".pef", ".sr2", ".x3f"]
-raw_files = [f for f in os.listdir(input_directory) if os.path.isfile(os.path.join(input_directory, f)) and os.path.splitext(f)[1].lower() in raw_extensions]
-
-# if there are no RAW files, find jpeg files instead.
-if not raw_files:
-    print("No RAW files found. Searching for JPEG files instead.")
-    jpeg_extensions = [".jpg", ".jpeg", ".png"]
-    raw_files = [f for f in os.listdir(input_directory) if os.path.isfile(os.path.join(input_directory, f)) and os.path.splitext(f)[1].lower() in jpeg_extensions]
-# Sort files by name
-raw_files.sort()
-
-print(f"Found {len(raw_files)} files in the directory.")
-
-# Prompt user for continue? Y/N
-continue_prompt = input("Do you want to continue processing these files? (Y/N): ").strip().lower()
-if continue_prompt != 'y':
-    print("Exiting without processing files.")
-    exit(0)
-
-# Create .kestrel directory.
-kestrel_directory = os.path.join(input_directory, ".kestrel")
-# Create .kestrel/export, .kestrel/crop directories.
-export_directory = os.path.join(kestrel_directory, "export")
-crop_directory = os.path.join(kestrel_directory, "crop")
-os.makedirs(export_directory, exist_ok=True)
-os.makedirs(crop_directory, exist_ok=True)
-
-# Initialize file database.
-# This will be a pandas DataFrame to store the results.
-#     columns: filename, species, species_confidence,
-#              quality, export_path, crop_path, rating
-
-database_name = "kestrel_database.csv"
-# First load the database if it exists.
-database_path = os.path.join(kestrel_directory, database_name)
-if os.path.exists(database_path):
-    database = pd.read_csv(database_path)
-else:
-    # Create a new database
-    database = pd.DataFrame(columns=["filename", "species", "species_confidence",
-                                     "quality", "export_path", "crop_path", "rating",
-                                     "scene_count", "feature_similarity", "feature_confidence", "color_similarity", "color_confidence"])
-
-# Find files that are not in the database.
-new_files = [f for f in raw_files if f not in database['filename'].values]
-if not new_files:
-    print("No new files to process.")
-else:
-    print(f"Processing {len(new_files)} new files.")
-
-# Prompt user for continue? Y/N
-continue_prompt = input("Do you want to continue processing these files? (Y/N): ").strip().lower()
-if continue_prompt != 'y':
-    print("Exiting without processing files.")
-    exit(0)
-
-# Initialize the 3 models.
-mask_rcnn = maskRCNN()
-species_classifier = BirdSpeciesClassifier(SPECIESCLASSIFIER_PATH, SPECIESCLASSIFIER_LABELS)
-quality_classifier = QualityClassifier(QUALITYCLASSIFIER_PATH)
-
-previous_image = None
-# Get scene count from the database.
-scene_count = database['scene_count'].max() if not database.empty else 0
-
-# Begin processing files.
-for raw_file in new_files:
+def _default_entry(raw_file, species, scene_count, similarity=None, export_path="N/A", crop_path="N/A"):
+    """Database entry for a file that produced no quality score."""
+    similarity = similarity or {}
+    return {
+        "filename": raw_file,
+        "species": species,
+        "species_confidence": 0,
+        "quality": -1,
+        "export_path": export_path,
+        "crop_path": crop_path,
+        "scene_count": scene_count,
+        "rating": 0 ,
+        "feature_similarity": similarity.get('feature_similarity', -1),
+        "feature_confidence": similarity.get('feature_confidence', -1),
+        "color_similarity": similarity.get('color_similarity', -1),
+        "color_confidence": similarity.get('color_confidence', -1)
+    }
+
+
+class KestrelModels:
+    """The three Project Kestrel models, loaded once and shared by every folder."""
+
+    def __init__(self, onnx_providers=None):
+        self.mask_rcnn = maskRCNN()
+        self.species_classifier = BirdSpeciesClassifier(SPECIESCLASSIFIER_PATH, SPECIESCLASSIFIER_LABELS,
+                                                        onnx_providers)
+        self.quality_classifier = QualityClassifier(QUALITYCLASSIFIER_PATH)
+
+    @classmethod
+    def from_runner(cls, runner):
+        """The model instances an ``EnhancedModelRunner`` has loaded.
+
+        The runner's models are ports of the ones above with the same inputs
+        and outputs, so a batch run analyzes exactly as the prompts do.
+        """
+        models = cls.__new__(cls)
+        models.mask_rcnn = runner.mask_rcnn
+        models.species_classifier = runner.species_classifier
+        models.quality_classifier = runner.quality_classifier
+        return models
+
+    def missing(self):
+        """Names of the models that failed to load."""
+        missing = []
+        if getattr(self.mask_rcnn, "model", None) is None:
+            missing.append("Mask R-CNN")
+        if self.species_classifier is None:
+            missing.append("species classifier")
+        if self.quality_classifier is None:
+            missing.append("quality classifier")
+        return missing
+
+
+def find_image_files(input_directory):
+    """Return the sorted RAW files in ``input_directory``, or its JPEG files if it has no RAWs."""
+    raw_files = []
+    jpeg_files = []
+    with os.scandir(input_directory) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            ext = os.path.splitext(entry.name)[1].lower()
+            if ext in RAW_EXTENSIONS:
+                raw_files.append(entry.name)
+            elif ext in JPEG_EXTENSIONS:
+                jpeg_files.append(entry.name)
+    # Sort files by name
+    return sorted(raw_files or jpeg_files)
+
+
+def iter_image_folders(paths, recursive=False):
+    """Yield each folder named by ``paths`` (directories or glob patterns) as it is discovered.
+
+    With ``recursive`` the sub-folders of every match are walked too. The
+    ``.kestrel`` output folders and other hidden folders are skipped.
+    """
+    seen = set()
+
+    def walk(folder):
+        key = os.path.realpath(folder)
+        if key in seen:
+            return
+        seen.add(key)
+        yield folder
+        if not recursive:
+            return
+        try:
+            with os.scandir(folder) as entries:
+                subfolders = sorted(e.path for e in entries
+                                    if e.is_dir() and not e.name.startswith('.'))
+        except OSError as e:
+            print(f"Cannot list {folder}: {e}. Skipping.")
+            return
+        for subfolder in subfolders:
+            yield from walk(subfolder)
+
+    for path in paths:
+        if not glob.has_magic(path):
+            if os.path.isdir(path):
+                yield from walk(path)
+            else:
+                print(f"Not a directory: {path}. Skipping.")
+            continue
+        matches = [m for m in sorted(glob.glob(path, recursive=True)) if os.path.isdir(m)]
+        if not matches:
+            print(f"No folders match {path}.")
+        for match in matches:
+            yield from walk(match)
+
+
+def analyze_file(models, input_directory, raw_file, previous_image, scene_count, export_directory, crop_directory):
+    """Run the models on one file.
+
+    Returns:
+        (entry, previous_image, scene_count): the database entry for the file and
+        the scene tracking state to pass to the next file of the folder.
+    """
     try:
         print(f"Processing file: {raw_file}")
         # Read the image
         image_path = os.path.join(input_directory, raw_file)
         img = read_image(image_path)
-        
+
         if img is None:
             print(f"Failed to read image: {image_path}. Skipping.")
-
-            # Save a default entry in the database for this file.
-            new_entry = {
-                "filename": raw_file,
-                "species": "Failed to Read",
-                "species_confidence": 0,
-                "quality": -1,
-                "export_path": "N/A",
-                "crop_path": "N/A",
-                "scene_count": scene_count,
-                "rating": 0 ,
-                "feature_similarity": -1,
-                "feature_confidence": -1,
-                "color_similarity": -1,
-                "color_confidence": -1
-            }
-            # Append the new entry to the database. This is a pandas dataframe.
-            database = pd.concat([database, pd.DataFrame([new_entry])], ignore_index=True)
-            database.to_csv(database_path, index=False, float_format='%.16f')
-            continue
+            return _default_entry(raw_file, "Failed to Read", scene_count), previous_image, scene_count
 
         similarity = compute_image_similarity_akaze(previous_image, img)
         if not similarity['similar']:
             scene_count += 1
-        
+
         # Update previous_image for next iteration - THIS MUST HAPPEN REGARDLESS OF BIRD DETECTION
         previous_image = img.copy()
-        
+
         # Get predictions from Mask-RCNN
-        masks, pred_boxes, pred_class, pred_score = mask_rcnn.get_prediction(img)
+        masks, pred_boxes, pred_class, pred_score = models.mask_rcnn.get_prediction(img)
         if masks is None or pred_boxes is None or pred_class is None or pred_score is None:
             print(f"No valid predictions found in {raw_file}. Skipping.")
-            # Save a default entry in the database for this file.
-            new_entry = {
-                "filename": raw_file,
-                "species": "No Bird",
-                "species_confidence": 0,
-                "quality": -1,
-                "export_path": "N/A",
-                "crop_path": "N/A",
-                "scene_count": scene_count,
-                "rating": 0 ,
-                "feature_similarity": similarity['feature_similarity'],
-                "feature_confidence": similarity['feature_confidence'],
-                "color_similarity": similarity['color_similarity'],
-                "color_confidence": similarity['color_confidence']
-            }
-            # Append the new entry to the database
-            database = pd.concat([database, pd.DataFrame([new_entry])], ignore_index=True)
-            database.to_csv(database_path, index=False, float_format='%.16f')
-            continue
+            return _default_entry(raw_file, "No Bird", scene_count, similarity), previous_image, scene_count
 
         # Get the index of the all 'bird' predictions
         bird_indices = [i for i, c in enumerate(pred_class) if c == 'bird']
 
         if not bird_indices:
             print(f"No bird predictions found in {raw_file}. Skipping.")
-            
+
             # Save the export file
             export_path = os.path.join(export_directory, f"{os.path.splitext(raw_file)[0]}_export.jpg")
-            
+
             img = cv2.resize(img, (1200, int(1200 * img.shape[0] / img.shape[1])))  # Resize to max dimension of 1200
             cv2.imwrite(export_path, cv2.cvtColor(img,cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 70])  # Convert RGB to BGR for OpenCV
 
@@ -598,50 +618,35 @@ for raw_file in new_files:
             blank_crop = np.zeros((1024, 1024, 3), dtype=np.uint8)
             cv2.imwrite(crop_path, cv2.cvtColor(blank_crop, cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 85])  # Convert RGB to BGR for OpenCV
 
-            new_entry = {
-                "filename": raw_file,
-                "species": "No Bird",
-                "species_confidence": 0,
-                "quality": -1,
-                "export_path": export_path,
-                "crop_path": crop_path,
-                "scene_count": scene_count,
-                "rating": 0 ,
-                "feature_similarity": similarity['feature_similarity'],
-                "feature_confidence": similarity['feature_confidence'],
-                "color_similarity": -1,
-                "color_confidence": -1
-            }
+            # Color similarity is not reported for frames without a bird
+            entry = _default_entry(raw_file, "No Bird", scene_count,
+                                   {'feature_similarity': similarity['feature_similarity'],
+                                    'feature_confidence': similarity['feature_confidence']},
+                                   export_path, crop_path)
+            return entry, previous_image, scene_count
 
-            # Append the new entry to the database
-            database = pd.concat([database, pd.DataFrame([new_entry])], ignore_index=True)
-            database.to_csv(database_path, index=False, float_format='%.16f')
-            continue # Skip to the next file
-        
         highest_confidence_index = bird_indices[np.argmax([pred_score[i] for i in bird_indices])]
 
         # Get the best mask, box, class, and score
         best_mask = masks[highest_confidence_index]
         best_box = pred_boxes[highest_confidence_index]
-        best_class = pred_class[highest_confidence_index]
-        best_score = pred_score[highest_confidence_index]
 
         # Get the species crop
-        species_crop = mask_rcnn.get_species_crop(best_box, img)
+        species_crop = models.mask_rcnn.get_species_crop(best_box, img)
 
         # Classify the species
-        species_label, species_confidence, top_k_labels, top_k_scores = species_classifier.classify_bird(species_crop)
+        species_label, species_confidence, top_k_labels, top_k_scores = models.species_classifier.classify_bird(species_crop)
 
         # Get the quality crop and mask
-        quality_crop, quality_mask = mask_rcnn.get_square_crop(best_mask, img, resize=True)
+        quality_crop, quality_mask = models.mask_rcnn.get_square_crop(best_mask, img, resize=True)
 
         # Classify the quality
-        quality_score = quality_classifier.classify_quality(quality_crop, quality_mask)
+        quality_score = models.quality_classifier.classify_quality(quality_crop, quality_mask)
 
         # Save the results to the database
         export_path = os.path.join(export_directory, f"{os.path.splitext(raw_file)[0]}_export.jpg")
         crop_path = os.path.join(crop_directory, f"{os.path.splitext(raw_file)[0]}_crop.jpg")        # reduce jpeg quality to 85%
-        
+
         # resize export image to max dimension of 1200
         img = cv2.resize(img, (1200, int(1200 * img.shape[0] / img.shape[1])))  # Resize to max dimension of 1200
         cv2.imwrite(export_path, cv2.cvtColor(img,cv2.COLOR_RGB2BGR), [cv2.IMWRITE_JPEG_QUALITY, 70])  # Convert RGB to BGR for OpenCV
@@ -678,32 +683,180 @@ for raw_file in new_files:
             "color_similarity": similarity['color_similarity'],
             "color_confidence": similarity['color_confidence']
         }
-        # Append the new entry to the database
-        database = pd.concat([database, pd.DataFrame([new_entry])], ignore_index=True)
-        database.to_csv(database_path, index=False, float_format='%.16f')
         print(f"Processed {raw_file}: Species: {species_label}, Confidence: {species_confidence}, Quality: {quality_score}, Rating: {rating}, Similarity: {similarity['similar']}, Scene Count: {scene_count}")
         print(f"Similarity - Feature: {similarity['feature_similarity']}, Color: {similarity['color_similarity']}, Confidence: {similarity['confidence']}")
-        # Save the database
+        return new_entry, previous_image, scene_count
 
     except Exception as e:
         print(f"Error reading image {raw_file}: {e}. Skipping.")
-        # Save a default entry in the database for this file.
-        new_entry = {
-            "filename": raw_file,
-            "species": "No Bird",
-            "species_confidence": 0,
-            "quality": -1,
-            "export_path": "N/A",
-            "crop_path": "N/A",
-            "scene_count": scene_count,
-            "rating": 0 ,
-            "feature_similarity": -1,
-            "feature_confidence": -1,
-            "color_similarity": -1,
-            "color_confidence": -1
-        }
+        return _default_entry(raw_file, "No Bird", scene_count), previous_image, scene_count
+
+
+def open_folder_database(input_directory):
+    """Create the folder's .kestrel output directories and open its database."""
+    # Create .kestrel directory.
+    kestrel_directory = os.path.join(input_directory, ".kestrel")
+    # Create .kestrel/export, .kestrel/crop directories.
+    os.makedirs(os.path.join(kestrel_directory, "export"), exist_ok=True)
+    os.makedirs(os.path.join(kestrel_directory, "crop"), exist_ok=True)
+
+    # Results are appended to .kestrel/kestrel_database.csv one row at a time.
+    #     columns: filename, species, species_confidence,
+    #              quality, export_path, crop_path, rating
+    return KestrelDatabase(os.path.join(kestrel_directory, DATABASE_NAME))
+
+
+def process_folder(models, input_directory, database, new_files):
+    """Analyze ``new_files`` of one folder in order and append them to its database.
+
+    Files of a folder are processed sequentially because scene detection
+    compares every frame with the previous one.
+    """
+    kestrel_directory = os.path.join(input_directory, ".kestrel")
+    export_directory = os.path.join(kestrel_directory, "export")
+    crop_directory = os.path.join(kestrel_directory, "crop")
+
+    previous_image = None
+    # Get scene count from the database.
+    scene_count = database.max_scene_count
+
+    for raw_file in new_files:
+        entry, previous_image, scene_count = analyze_file(
+            models, input_directory, raw_file, previous_image, scene_count, export_directory, crop_directory
+        )
         # Append the new entry to the database
-        database = pd.concat([database, pd.DataFrame([new_entry])], ignore_index=True)
-        # save as csv with very high precision
-        database.to_csv(database_path, index=False, float_format='%.16f')
-        continue
\ No newline at end of file
+        database.append(entry)
+    return len(new_files)
+
+
+def run_folder(models, input_directory):
+    """Batch-mode job: analyze every new file of one folder."""
+    raw_files = find_image_files(input_directory)
+    if not raw_files:
+        return 0
+    with open_folder_database(input_directory) as database:
+        new_files = database.new_files(raw_files)
+        print(f"{input_directory}: {len(raw_files)} files, {len(new_files)} new.")
+        if not new_files:
+            return 0
+        processed = process_folder(models, input_directory, database, new_files)
+    print(f"{input_directory}: finished {processed} files.")
+    return processed
+
+
+def run_batch(paths, recursive=False, use_gpu=False, workers=1, dry_run=False, runner=None):
+    """Analyze every folder matched by ``paths`` without prompting.
+
+    The models are those of an ``EnhancedModelRunner`` (``runner``, or one
+    started for ``workers`` workers), so they are loaded once with the
+    runner's GPU providers and per-worker thread budget. A pool of the
+    runner's ``max_workers`` threads works through different folders, each
+    writing that folder's own database.
+    """
+    folders = iter_image_folders(paths, recursive)
+    if dry_run:
+        for folder in folders:
+            raw_files = find_image_files(folder)
+            if raw_files:
+                print(f"{folder}: {len(raw_files)} files")
+        return 0
+
+    if runner is None:
+        from wildlifeai_runner import EnhancedModelRunner
+        runner = EnhancedModelRunner(use_gpu=use_gpu, max_workers=max(1, workers))
+    models = KestrelModels.from_runner(runner)
+    if models.missing():
+        print(f"Models not available: {', '.join(models.missing())}.")
+        return 1
+    workers = max(1, runner.max_workers)
+    failures = 0
+    total = 0
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        # Submit folders as they are discovered, keeping at most two per worker queued
+        for folder in folders:
+            pending.add(executor.submit(run_folder, models, folder))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    total, failures = _collect(future, total, failures)
+        for future in as_completed(pending):
+            total, failures = _collect(future, total, failures)
+
+    print(f"Processed {total} new files.")
+    return 1 if failures else 0
+
+
+def _collect(future, total, failures):
+    try:
+        return total + future.result(), failures
+    except Exception as e:
+        print(f"Folder failed: {e}")
+        return total, failures + 1
+
+
+def run_interactive():
+    """Original prompt-driven mode for a single folder."""
+    onnx_providers = prompt_onnx_providers()
+
+    # Prompt user for input directory.
+    input_directory = input("Enter the path to the directory containing images: ")
+    if not os.path.isdir(input_directory):
+        print("Invalid directory path. Please try again.")
+        return 1
+
+    # Find all images in the input directory that are RAW files,
+    # or JPEG files if there are none.
+    raw_files = find_image_files(input_directory)
+
+    print(f"Found {len(raw_files)} files in the directory.")
+
+    # Prompt user for continue? Y/N
+    continue_prompt = input("Do you want to continue processing these files? (Y/N): ").strip().lower()
+    if continue_prompt != 'y':
+        print("Exiting without processing files.")
+        return 0
+
+    database = open_folder_database(input_directory)
+
+    # Find files that are not in the database.
+    new_files = database.new_files(raw_files)
+    if not new_files:
+        print("No new files to process.")
+    else:
+        print(f"Processing {len(new_files)} new files.")
+
+    # Prompt user for continue? Y/N
+    continue_prompt = input("Do you want to continue processing these files? (Y/N): ").strip().lower()
+    if continue_prompt != 'y':
+        print("Exiting without processing files.")
+        database.close()
+        return 0
+
+    # Initialize the 3 models.
+    models = KestrelModels(onnx_providers)
+    with database:
+        process_folder(models, input_directory, database, new_files)
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Project Kestrel analyzer. Run without arguments for the interactive prompts."
+    )
+    parser.add_argument("paths", nargs="*",
+                        help="Folders or glob patterns (e.g. '/nas/2024/**') to analyze without prompting")
+    parser.add_argument("--recursive", "-r", action="store_true", help="Also analyze every sub-folder")
+    parser.add_argument("--gpu", action="store_true", help="Use the GPU for ONNX inference")
+    parser.add_argument("--workers", type=int, default=1, help="Number of folders analyzed concurrently")
+    parser.add_argument("--dry-run", action="store_true", help="List the folders that would be analyzed and exit")
+    args = parser.parse_args(argv)
+
+    if not args.paths:
+        return run_interactive()
+    return run_batch(args.paths, recursive=args.recursive, use_gpu=args.gpu,
+                     workers=args.workers, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
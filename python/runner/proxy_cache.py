@@ -0,0 +1,143 @@
+"""Downscaled 8-bit proxies of decoded photos, memory-mapped from disk.
+
+Decoding a RAW file takes far longer than reading back the pixels it
+produced, and every run used to decode each photo again. The proxy cache
+keeps one upright 8-bit copy of each decoded photo, its longest side
+limited to ``edge`` pixels, as a ``.npy`` file named after the photo's path,
+size and modification time. Later runs open it with
+``np.load(mmap_mode="r")``: the pages the stages touch are read straight
+from the file (or the OS page cache) without a copy.
+
+The cache directory is kept below ``max_bytes`` by deleting the least
+recently used proxies; reading a proxy marks it as used.
+"""
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+# Longest side (pixels) of a proxy; 0 keeps the decoded size
+DEFAULT_PROXY_EDGE = 4096
+DEFAULT_MAX_BYTES = 20 * 1024 ** 3
+
+
+def default_proxy_cache_dir() -> Path:
+    return Path(tempfile.gettempdir()) / "wildlifeai_proxies"
+
+
+def make_proxy(img: np.ndarray, edge: int = DEFAULT_PROXY_EDGE) -> np.ndarray:
+    """8-bit copy of a decoded frame, at most ``edge`` pixels on its longest side."""
+    if img.dtype != np.uint8:
+        scale = 255.0 / np.iinfo(img.dtype).max if np.issubdtype(img.dtype, np.integer) else 255.0
+        img = np.clip(img.astype(np.float32) * scale + 0.5, 0, 255).astype(np.uint8)
+    height, width = img.shape[:2]
+    if edge and max(height, width) > edge:
+        factor = edge / max(height, width)
+        size = (max(1, round(width * factor)), max(1, round(height * factor)))
+        img = cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+    return np.ascontiguousarray(img)
+
+
+class ProxyCache:
+    """Directory of memory-mappable photo proxies with least-recently-used eviction."""
+
+    def __init__(self, path, edge: int = DEFAULT_PROXY_EDGE, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = Path(path)
+        self.edge = int(edge)
+        self.max_bytes = int(max_bytes)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._used = sum(f.stat().st_size for f in self._files())
+        self.stats = {"hits": 0, "decoded": 0, "evicted": 0}
+
+    def _files(self):
+        return [f for f in self.path.glob("*.npy") if f.is_file()]
+
+    def _file(self, photo_path) -> Optional[Path]:
+        try:
+            st = os.stat(photo_path)
+        except OSError:
+            return None
+        key = f"{os.path.normcase(os.path.abspath(str(photo_path)))}|{st.st_size}|{st.st_mtime_ns}|{self.edge}"
+        return self.path / f"{hashlib.sha1(key.encode()).hexdigest()}.npy"
+
+    def get(self, photo_path) -> Optional[np.ndarray]:
+        """Read-only memory map of the photo's proxy, or None when it has none."""
+        proxy_file = self._file(photo_path)
+        if proxy_file is None or not proxy_file.exists():
+            return None
+        try:
+            proxy = np.load(proxy_file, mmap_mode="r")
+            os.utime(proxy_file)
+        except (OSError, ValueError) as e:
+            logging.debug(f"Discarding unreadable proxy of {photo_path}: {e}")
+            return None
+        with self._lock:
+            self.stats["hits"] += 1
+        return proxy
+
+    def put(self, photo_path, img: np.ndarray) -> np.ndarray:
+        """Store the proxy of a decoded photo and return it."""
+        proxy = make_proxy(img, self.edge)
+        proxy_file = self._file(photo_path)
+        if proxy_file is None:
+            return proxy
+        partial = proxy_file.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            with open(partial, "wb") as f:
+                np.save(f, proxy)
+            os.replace(partial, proxy_file)
+        except OSError as e:
+            logging.warning(f"Failed to store proxy of {photo_path}: {e}")
+            partial.unlink(missing_ok=True)
+            return proxy
+        with self._lock:
+            self.stats["decoded"] += 1
+            self._used += proxy_file.stat().st_size
+            over = self._used > self.max_bytes
+        if over:
+            self.evict()
+        return proxy
+
+    def load(self, photo_path, decode: Callable[[str], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        """The photo's proxy, decoding it with ``decode`` and storing it on a miss."""
+        proxy = self.get(photo_path)
+        if proxy is not None:
+            return proxy
+        img = decode(photo_path)
+        return self.put(photo_path, img) if img is not None else None
+
+    def evict(self) -> int:
+        """Delete least recently used proxies until the cache fits in ``max_bytes``."""
+        with self._lock:
+            files = []
+            for f in self._files():
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime_ns, st.st_size, f))
+            used = sum(size for _, size, _ in files)
+            removed = 0
+            for _, size, f in sorted(files, key=lambda entry: entry[0]):
+                if used <= self.max_bytes:
+                    break
+                try:
+                    f.unlink()
+                except OSError:
+                    # Still mapped by another process on Windows
+                    continue
+                used -= size
+                removed += 1
+            self._used = used
+            self.stats["evicted"] += removed
+        return removed
+
+    def __len__(self):
+        return len(self._files())
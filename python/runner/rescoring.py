@@ -0,0 +1,112 @@
+"""Star ratings and detection cut-offs derived from stored raw model outputs.
+
+Every result keeps the models' full-precision outputs under ``raw``: the
+best bird's detection score, the quality score and the species model's top
+guesses. The fields the plug-in reads (species, species confidence, quality
+and rating) are derived from them by ``derive``, which the runner uses for
+fresh results too. Changing the rating thresholds or the detection cut-off
+therefore only needs the stored results: ``rescore`` derives the fields of
+thousands of records again in one vectorised pass, without decoding a photo
+or running a model, and returns just the records that changed.
+"""
+import json
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from scene_ranking import rank_scenes
+
+# Quality scores at which the rating rises to 2, 3, 4 and 5 stars
+RATING_THRESHOLDS = (0.15, 0.3, 0.6, 0.9)
+# Mask R-CNN's own score threshold; a lower cut-off cannot bring back birds it discarded
+DETECTION_THRESHOLD = 0.2
+# Result fields derived from ``raw`` (scene ranks follow from the quality)
+DERIVED_FIELDS = ("species", "species_confidence", "quality", "rating")
+# Photos that could not be decoded never reached the detector; they keep this label
+FAILED_TO_READ = "Failed to Read"
+
+
+def check_thresholds(thresholds: Sequence[float]) -> Tuple[float, ...]:
+    """Validate rating thresholds: four ascending quality scores."""
+    thresholds = tuple(float(t) for t in thresholds)
+    if len(thresholds) != len(RATING_THRESHOLDS) or list(thresholds) != sorted(thresholds):
+        raise ValueError(f"Rating thresholds must be {len(RATING_THRESHOLDS)} ascending quality scores, "
+                         f"got {thresholds}")
+    return thresholds
+
+
+def rate_quality(quality, thresholds: Sequence[float] = RATING_THRESHOLDS) -> np.ndarray:
+    """Star ratings of quality scores in 0..1: 1 to 5, or 0 where there is no score (-1)."""
+    quality = np.asarray(quality, dtype=np.float64)
+    stars = 1 + np.searchsorted(np.asarray(thresholds, dtype=np.float64), quality, side="right")
+    return np.where(quality == -1, 0, stars)
+
+
+def raw_scores(species: str, species_confidence: float, quality_score: float, detection: Dict) -> Dict:
+    """The full-precision model outputs of one photo, as stored in its result."""
+    return {
+        "species": species,
+        "species_confidence": float(species_confidence),
+        "quality": float(quality_score),
+        "detection_score": float(detection.get("detection_score", 0)),
+        "species_top_k": detection.get("species_top_k", []),
+    }
+
+
+def derive(raws: List[Dict], thresholds: Sequence[float] = RATING_THRESHOLDS,
+           min_detection: float = DETECTION_THRESHOLD) -> List[Dict]:
+    """The result fields in ``DERIVED_FIELDS`` for each raw record.
+
+    Photos whose best bird scored below ``min_detection`` are reported as
+    "No Bird" without a quality score or rating; photos that failed to read
+    keep ``FAILED_TO_READ``, so they are retried rather than cached. Percentages are truncated
+    as the runner always has: confidences in float64, quality scores in
+    float32 like the quality model's output.
+    """
+    if not raws:
+        return []
+    detection = np.array([r["detection_score"] for r in raws], dtype=np.float64)
+    quality = np.array([r["quality"] for r in raws], dtype=np.float32)
+    confidence = np.array([r["species_confidence"] for r in raws], dtype=np.float64)
+    rejected = (detection < min_detection) & np.array([r["species"] != FAILED_TO_READ for r in raws])
+
+    quality = np.where(rejected, np.float32(-1), quality)
+    quality_percent = np.where(quality == -1, -1, np.trunc(quality * np.float32(100))).astype(int)
+    confidence_percent = np.where(rejected, 0, np.trunc(confidence * 100)).astype(int)
+    ratings = rate_quality(quality, thresholds)
+    return [
+        {"species": "No Bird" if reject else raw["species"], "species_confidence": c, "quality": q, "rating": s}
+        for raw, reject, c, q, s in zip(raws, rejected.tolist(), confidence_percent.tolist(),
+                                        quality_percent.tolist(), ratings.tolist())
+    ]
+
+
+def rescore(results: List[Dict], thresholds: Sequence[float] = RATING_THRESHOLDS,
+            min_detection: float = DETECTION_THRESHOLD, rank: bool = True) -> List[Dict]:
+    """Apply new thresholds to stored results in place and return the records that changed.
+
+    Results without ``raw`` outputs (failed photos, results from older
+    runners or imported from Project Kestrel) are left as they are. With
+    ``rank``, the scenes are ranked again and records whose ``scene_rank``
+    or ``rank_margin`` moved count as changed too.
+    """
+    thresholds = check_thresholds(thresholds)
+    results = [r for r in results if r]
+    watched = DERIVED_FIELDS + ("scene_rank", "rank_margin")
+    before = [tuple(r.get(k) for k in watched) for r in results]
+    scored = [r for r in results if isinstance(r.get("raw"), dict)]
+    for result, fields in zip(scored, derive([r["raw"] for r in scored], thresholds, min_detection)):
+        result.update(fields)
+    if rank:
+        rank_scenes(results)
+    return [r for r, old in zip(results, before) if tuple(r.get(k) for k in watched) != old]
+
+
+def rescore_file(results_path, thresholds: Sequence[float] = RATING_THRESHOLDS,
+                 min_detection: float = DETECTION_THRESHOLD) -> Tuple[List[Dict], List[Dict]]:
+    """Rescore a ``results.json`` file; returns ``(all results, changed results)``."""
+    with open(results_path, "r", encoding="utf-8") as f:
+        results = json.load(f)
+    if not isinstance(results, list):
+        raise ValueError(f"{results_path} does not hold a list of results")
+    return results, rescore(results, thresholds, min_detection)
@@ -0,0 +1,186 @@
+"""Persistent cache of per-photo runner results.
+
+Results are stored in a small SQLite database keyed on the photo path and
+validated against the file's size and modification time and a fingerprint of
+the models and settings that produced them, so an edited photo or a model
+update is re-analysed while unchanged photos are never run through inference
+twice.
+"""
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+# Bump when the layout of cached result records changes
+RESULT_CACHE_VERSION = 1
+
+MODEL_FILES = ("model.onnx", "quality.keras", "labels.txt")
+
+_digest_lock = threading.Lock()
+_digests: Dict[str, str] = {}
+
+
+def default_cache_path() -> Path:
+    """Default location of the cache, next to the persisted scene counter."""
+    return Path(tempfile.gettempdir()) / "wildlifeai_result_cache.sqlite"
+
+
+def default_digest_path() -> Path:
+    """Default location of the memoised model digests, next to the cache."""
+    return Path(tempfile.gettempdir()) / "wildlifeai_model_digests.json"
+
+
+def file_digest(path, memo_path=None) -> Optional[str]:
+    """SHA-1 of a file's contents, or None when it does not exist.
+
+    Digests are memoised in a small JSON file keyed on the path, size and
+    modification time, so each model is read once per install rather than
+    on every start-up.
+    """
+    path = Path(path)
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    key = f"{os.path.normcase(os.path.abspath(str(path)))}:{st.st_size}:{st.st_mtime_ns}"
+    memo_path = Path(memo_path) if memo_path else default_digest_path()
+    with _digest_lock:
+        if key in _digests:
+            return _digests[key]
+        try:
+            _digests.update(json.loads(memo_path.read_text()))
+        except (OSError, ValueError):
+            pass
+        if key in _digests:
+            return _digests[key]
+        h = hashlib.sha1()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        _digests[key] = h.hexdigest()
+        try:
+            tmp = memo_path.with_suffix(f".{os.getpid()}.tmp")
+            tmp.write_text(json.dumps(_digests))
+            os.replace(tmp, memo_path)
+        except OSError as e:
+            logging.debug(f"Failed to save model digests to {memo_path}: {e}")
+        return _digests[key]
+
+
+def model_fingerprint(model_dir, settings: Optional[Dict] = None) -> str:
+    """Fingerprint the model files by content, and the analysis settings results depend on.
+
+    ``settings`` holds the options that change what a fresh analysis
+    returns (the proxy edge, burst ROI detection...). A reinstalled
+    identical model keeps its cached results; a retrained one, even of the
+    same size, does not. Without ``settings`` it is the fingerprint of
+    imported results, which no runner option produced.
+    """
+    h = hashlib.sha1(f"v{RESULT_CACHE_VERSION}".encode())
+    for name in MODEL_FILES:
+        h.update(f"{name}:{file_digest(Path(model_dir) / name)};".encode())
+    for name, value in sorted((settings or {}).items()):
+        h.update(f"{name}={value};".encode())
+    return h.hexdigest()
+
+
+def _cache_key(photo_path) -> str:
+    return os.path.normcase(os.path.abspath(str(photo_path)))
+
+
+class ResultCache:
+    """SQLite store of runner result records.
+
+    The connection is shared between threads and guarded by a lock; writes
+    from :meth:`put_many` go through a single transaction so bulk imports
+    stay fast.
+    """
+
+    def __init__(self, path, fingerprint: str, imported_fingerprint: Optional[str] = None):
+        self.path = str(path)
+        self.fingerprint = fingerprint
+        # Imported results are valid under any analysis settings
+        self.accepted = {fingerprint, imported_fingerprint or fingerprint}
+        self._lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " path TEXT PRIMARY KEY,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " result TEXT NOT NULL)"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _stat(photo_path) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(photo_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, photo_path) -> Optional[Dict]:
+        """Return the cached result for ``photo_path`` if the file and models are unchanged."""
+        stat = self._stat(photo_path)
+        if stat is None:
+            return None
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, fingerprint, result FROM results WHERE path = ?",
+                (_cache_key(photo_path),),
+            ).fetchone()
+        if row is None or (row[0], row[1]) != stat or row[2] not in self.accepted:
+            return None
+        try:
+            return json.loads(row[3])
+        except ValueError:
+            return None
+
+    def put(self, photo_path, result: Dict) -> bool:
+        return self.put_many([(photo_path, result)]) == 1
+
+    def put_many(self, items: Iterable[Tuple[str, Dict]],
+                 stats: Optional[Dict[str, Tuple[int, int]]] = None) -> int:
+        """Store ``(photo_path, result)`` pairs; photos that no longer exist are skipped.
+
+        ``stats`` may map photo paths to ``(size, mtime_ns)`` already read
+        by the caller, saving a stat call per photo.
+        """
+        rows = []
+        for photo_path, result in items:
+            stat = stats.get(photo_path) if stats else None
+            if stat is None:
+                stat = self._stat(photo_path)
+            if stat is None:
+                continue
+            rows.append((_cache_key(photo_path), stat[0], stat[1], self.fingerprint,
+                         json.dumps(result, default=str)))
+        if not rows:
+            return 0
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?)", rows)
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to update result cache {self.path}: {e}")
+                return 0
+        return len(rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM results").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,182 @@
+"""Persistent index of analysed frames and their scene ids.
+
+Every analysed frame is stored with its folder, capture time and a compact
+image signature in a local SQLite database. New batches are stitched onto
+existing scenes by looking up only the frame that precedes them in the same
+folder, and scene ids are allocated inside a write transaction so concurrent
+runner processes never hand out the same id twice.
+"""
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+LEGACY_SCENE_COUNT_FILE = "wildlifeai_scene_count.txt"
+
+
+def default_index_path() -> Path:
+    return Path(tempfile.gettempdir()) / "wildlifeai_scene_index.sqlite"
+
+
+def legacy_scene_count() -> int:
+    """Scene counter left by runners that predate the index, or 0."""
+    try:
+        with open(Path(tempfile.gettempdir()) / LEGACY_SCENE_COUNT_FILE) as f:
+            return int(f.read().strip())
+    except (OSError, ValueError):
+        return 0
+
+
+def folder_key(photo_path) -> str:
+    return os.path.normcase(os.path.dirname(os.path.abspath(str(photo_path))))
+
+
+def path_key(photo_path) -> str:
+    return os.path.normcase(os.path.abspath(str(photo_path)))
+
+
+class IndexedFrame(NamedTuple):
+    path: str
+    capture_time: float
+    scene_id: int
+    dhash: Optional[bytes]
+    histogram: Optional[bytes]
+
+
+class SceneIndex:
+    """SQLite store of ``(folder, capture_time, path) -> scene_id``.
+
+    Frames are clustered on ``(folder, capture_time)`` so neighbour lookups
+    are a single B-tree seek. The connection is shared between threads and
+    guarded by a lock.
+    """
+
+    def __init__(self, path, seed: int = 0):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; write transactions are opened explicitly
+        self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS frames ("
+                    " folder TEXT NOT NULL,"
+                    " capture_time REAL NOT NULL,"
+                    " path TEXT NOT NULL,"
+                    " scene_id INTEGER NOT NULL,"
+                    " dhash BLOB,"
+                    " histogram BLOB,"
+                    " PRIMARY KEY (folder, capture_time, path)) WITHOUT ROWID"
+                )
+                self._conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS frames_path ON frames (path)")
+                self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+                # A new index continues numbering from the old temp-file counter
+                self._conn.execute("INSERT OR IGNORE INTO meta VALUES ('last_scene_id', ?)", (int(seed),))
+                self._conn.execute("COMMIT")
+            except Exception:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+
+    def last_scene_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'last_scene_id'").fetchone()[0]
+
+    def allocate_scene(self) -> int:
+        """Reserve a new scene id, unique across every process using this index."""
+        return self.allocate_scenes(1)
+
+    def allocate_scenes(self, count: int) -> int:
+        """Reserve ``count`` consecutive scene ids in one transaction; returns the first."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute("UPDATE meta SET value = value + ? WHERE key = 'last_scene_id'", (int(count),))
+                last = self._conn.execute("SELECT value FROM meta WHERE key = 'last_scene_id'").fetchone()[0]
+                self._conn.execute("COMMIT")
+            except Exception:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                raise
+        return last - int(count) + 1
+
+    def predecessor(self, photo_path, capture_time: float) -> Optional[IndexedFrame]:
+        """The indexed frame of the same folder captured just before ``photo_path``."""
+        key = path_key(photo_path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, capture_time, scene_id, dhash, histogram FROM frames"
+                " WHERE folder = ? AND (capture_time < ? OR (capture_time = ? AND path < ?))"
+                " ORDER BY capture_time DESC, path DESC LIMIT 1",
+                (folder_key(photo_path), capture_time, capture_time, key),
+            ).fetchone()
+        return IndexedFrame(*row) if row else None
+
+    def lookup(self, photo_path) -> Optional[IndexedFrame]:
+        """The indexed entry of ``photo_path``, if an earlier run recorded it."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, capture_time, scene_id, dhash, histogram FROM frames WHERE path = ?",
+                (path_key(photo_path),),
+            ).fetchone()
+        return IndexedFrame(*row) if row else None
+
+    def scene_of(self, photo_path) -> Optional[int]:
+        """Scene id recorded for ``photo_path`` by an earlier run, if any."""
+        frame = self.lookup(photo_path)
+        return frame.scene_id if frame else None
+
+    def folder_scenes(self, folder) -> Dict[str, int]:
+        """Scene ids of the indexed frames in ``folder``, keyed on ``path_key``."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path, scene_id FROM frames WHERE folder = ?",
+                (os.path.normcase(os.path.abspath(str(folder))),),
+            ).fetchall()
+        return dict(rows)
+
+    def record_many(self, frames: Iterable[Tuple[str, float, int]]):
+        """Store ``(photo_path, capture_time, scene_id)`` frames without signatures in one transaction."""
+        rows = [(folder_key(path), float(capture_time), path_key(path), int(scene_id), None, None)
+                for path, capture_time, scene_id in frames]
+        if not rows:
+            return
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.executemany("DELETE FROM frames WHERE path = ?", [(row[2],) for row in rows])
+                self._conn.executemany("INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)", rows)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logging.warning(f"Failed to index {len(rows)} frames: {e}")
+
+    def record(self, photo_path, capture_time: float, scene_id: int,
+               dhash: Optional[bytes] = None, histogram: Optional[bytes] = None):
+        """Store (or move) a frame in the index."""
+        key = path_key(photo_path)
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute("DELETE FROM frames WHERE path = ?", (key,))
+                self._conn.execute(
+                    "INSERT INTO frames VALUES (?, ?, ?, ?, ?, ?)",
+                    (folder_key(photo_path), float(capture_time), key, int(scene_id), dhash, histogram),
+                )
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logging.warning(f"Failed to index scene of {photo_path}: {e}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,159 @@
+"""Persistent cache of the intermediate artifacts of each pipeline stage.
+
+The runner analyses a photo in stages: decode (kept as the compact scene
+features the scene detector needs), bird detection (best box, score and a
+run-length encoded mask), the square quality crop, the species top-k and the
+quality score. Each stage's artifacts are stored per photo under a
+fingerprint of that stage's model and parameters *and* of every stage it
+depends on, so updating one model only invalidates the stages downstream of
+it: a new ``quality.keras`` re-runs the quality model on the cached crops
+without decoding the photo or running Mask R-CNN and the species model.
+
+Artifacts are numpy arrays packed with ``np.savez_compressed`` into one
+SQLite row per photo and stage, validated against the file's size and
+modification time like the result cache.
+"""
+import hashlib
+import io
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Dict, Mapping, Optional, Tuple
+
+import numpy as np
+
+from mask_rle import Rle, decode, encode
+from result_cache import file_digest
+
+# Bump when the layout of any stage's artifacts changes
+STAGE_CACHE_VERSION = 2
+
+Artifacts = Dict[str, np.ndarray]
+
+
+def default_stage_cache_path() -> Path:
+    return Path(tempfile.gettempdir()) / "wildlifeai_stage_cache.sqlite"
+
+
+def stage_fingerprint(*parts) -> str:
+    """Fingerprint of a stage from its parameters and the fingerprints of the stages it reads."""
+    h = hashlib.sha1(f"v{STAGE_CACHE_VERSION}".encode())
+    for part in parts:
+        h.update(f"{part};".encode())
+    return h.hexdigest()
+
+
+def file_identity(path) -> str:
+    """Name and content digest of a model file, like ``result_cache.model_fingerprint``."""
+    path = Path(path)
+    return f"{path.name}:{file_digest(path)}"
+
+
+def pack(artifacts: Mapping[str, np.ndarray]) -> bytes:
+    buffer = io.BytesIO()
+    np.savez_compressed(buffer, **artifacts)
+    return buffer.getvalue()
+
+
+def unpack(data: bytes) -> Artifacts:
+    with np.load(io.BytesIO(data), allow_pickle=False) as archive:
+        return {name: archive[name] for name in archive.files}
+
+
+def pack_mask(mask: np.ndarray) -> Artifacts:
+    """A boolean mask as run lengths plus its shape (see ``mask_rle``)."""
+    rle = encode(mask)
+    return {"mask_counts": rle["counts"], "mask_shape": np.array(rle["size"])}
+
+
+def mask_rle(artifacts: Artifacts) -> Rle:
+    """The run-length encoded mask packed into ``artifacts`` by ``pack_mask``."""
+    return {"size": [int(n) for n in artifacts["mask_shape"]], "counts": artifacts["mask_counts"]}
+
+
+def unpack_mask(artifacts: Artifacts) -> np.ndarray:
+    return decode(mask_rle(artifacts))
+
+
+def _cache_key(photo_path) -> str:
+    return os.path.normcase(os.path.abspath(str(photo_path)))
+
+
+class StageCache:
+    """SQLite store of per-photo stage artifacts, shared between threads under a lock."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._lock = threading.Lock()
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS stages ("
+                " path TEXT NOT NULL,"
+                " stage TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL,"
+                " fingerprint TEXT NOT NULL,"
+                " artifacts BLOB NOT NULL,"
+                " PRIMARY KEY (path, stage))"
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _stat(photo_path) -> Optional[Tuple[int, int]]:
+        try:
+            st = os.stat(photo_path)
+        except OSError:
+            return None
+        return st.st_size, st.st_mtime_ns
+
+    def get(self, photo_path, fingerprints: Mapping[str, str]) -> Dict[str, Artifacts]:
+        """Artifacts of the stages in ``fingerprints`` ({stage: fingerprint}) still valid for the photo."""
+        stat = self._stat(photo_path)
+        if stat is None or not fingerprints:
+            return {}
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT stage, size, mtime_ns, fingerprint, artifacts FROM stages WHERE path = ?",
+                (_cache_key(photo_path),),
+            ).fetchall()
+        found = {}
+        for stage, size, mtime_ns, fingerprint, data in rows:
+            if (size, mtime_ns) != stat or fingerprints.get(stage) != fingerprint:
+                continue
+            try:
+                found[stage] = unpack(data)
+            except (ValueError, OSError) as e:
+                logging.debug(f"Discarding unreadable {stage} artifacts of {photo_path}: {e}")
+        return found
+
+    def put(self, photo_path, stages: Mapping[str, Tuple[str, Mapping[str, np.ndarray]]]) -> int:
+        """Store ``{stage: (fingerprint, artifacts)}`` for a photo in one transaction."""
+        stat = self._stat(photo_path)
+        if stat is None or not stages:
+            return 0
+        key = _cache_key(photo_path)
+        rows = [(key, stage, stat[0], stat[1], fingerprint, pack(artifacts))
+                for stage, (fingerprint, artifacts) in stages.items()]
+        with self._lock:
+            try:
+                with self._conn:
+                    self._conn.executemany("INSERT OR REPLACE INTO stages VALUES (?, ?, ?, ?, ?, ?)", rows)
+            except sqlite3.Error as e:
+                logging.warning(f"Failed to update stage cache {self.path}: {e}")
+                return 0
+        return len(rows)
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(DISTINCT path) FROM stages").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
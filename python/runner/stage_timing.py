@@ -0,0 +1,151 @@
+"""Per-stage timings of each photo, with an optional Chrome trace of the run.
+
+``StageTimer.stage`` times one step of the analysis (decoding, scene
+detection, Mask R-CNN, the species and quality models, JPEG encoding...).
+Each worker thread collects the stages of the photo it is working on, so a
+result can report where its time went, and every duration is kept for the
+percentiles of the run summary. Timing costs two ``perf_counter`` calls
+per stage.
+
+With ``trace`` on, every stage is also kept as a Chrome trace event
+(``chrome://tracing`` or https://ui.perfetto.dev). Each worker thread, JPEG
+writer thread and worker process gets its own row on the timeline.
+
+With a ``memory`` sampler (``memory_budget.MemoryWatermarks``) the RSS is
+also sampled around every stage, for the memory watermarks of the run and an
+RSS counter on the trace.
+"""
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+PERCENTILES = (50, 90, 99)
+
+
+class StageTimer:
+    """Thread-safe collector of stage durations, per photo and for the whole run."""
+
+    def __init__(self, trace: bool = False, memory=None):
+        self.trace = trace
+        self.memory = memory if memory is not None and memory.available else None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._durations: Dict[str, List[float]] = defaultdict(list)
+        self._events: List[Dict] = []
+        self._threads: Dict[tuple, str] = {}
+        # The trace starts when the timer is created. perf_counter is the
+        # system-wide monotonic clock, so events of worker processes line up
+        self.origin = time.perf_counter()
+
+    def begin_photo(self, photo_path: str):
+        """Start collecting the stages this thread runs for ``photo_path``."""
+        self._local.photo = os.path.basename(photo_path)
+        self._local.times = {}
+
+    def end_photo(self) -> Dict[str, float]:
+        """Milliseconds spent in each stage since ``begin_photo``."""
+        times = getattr(self._local, "times", None) or {}
+        self._local.photo = self._local.times = None
+        return {stage: round(seconds * 1000, 1) for stage, seconds in times.items()}
+
+    @contextmanager
+    def stage(self, name: str):
+        before = self.memory.sample() if self.memory is not None else None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            self.add(name, start, end)
+            if self.memory is not None:
+                after = self.memory.sample()
+                self.memory.record(name, before, after)
+                if self.trace and after is not None:
+                    counter = {"name": "RSS", "ph": "C", "pid": os.getpid(), "ts": end * 1e6,
+                               "args": {"MB": round(after / 1024 ** 2, 1)}}
+                    with self._lock:
+                        self._events.append(counter)
+
+    def add(self, name: str, start: float, end: float):
+        """Record a stage this thread ran from ``start`` to ``end`` (``perf_counter`` seconds)."""
+        times = getattr(self._local, "times", None)
+        if times is not None:
+            times[name] = times.get(name, 0.0) + end - start
+        event = None
+        if self.trace:
+            thread = threading.current_thread()
+            event = {"name": name, "ph": "X", "pid": os.getpid(), "tid": thread.ident,
+                     "ts": start * 1e6, "dur": (end - start) * 1e6}
+            photo = getattr(self._local, "photo", None)
+            if photo:
+                event["args"] = {"photo": photo}
+        with self._lock:
+            self._durations[name].append(end - start)
+            if event is not None:
+                self._events.append(event)
+                self._threads.setdefault((event["pid"], event["tid"]), thread.name)
+
+    def merge(self, stage_times: Dict[str, float], events: Iterable[Dict] = (),
+              threads: Optional[Dict[tuple, str]] = None):
+        """Add a photo analysed by a worker process: its stage times (ms) and trace events."""
+        with self._lock:
+            for name, ms in stage_times.items():
+                self._durations[name].append(ms / 1000)
+            if self.trace:
+                self._events.extend(events)
+                self._threads.update(threads or {})
+
+    def take_events(self) -> tuple:
+        """Trace events and thread names collected so far, removed from the timer."""
+        with self._lock:
+            events, self._events = self._events, []
+            threads, self._threads = self._threads, {}
+        return events, threads
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Count, mean, percentiles and maximum of each stage, in milliseconds."""
+        with self._lock:
+            durations = {name: np.asarray(values) * 1000 for name, values in self._durations.items()}
+        summary = {}
+        for name, ms in sorted(durations.items()):
+            stats = {"count": int(len(ms)), "total": round(float(ms.sum()), 1), "mean": round(float(ms.mean()), 1)}
+            for p, value in zip(PERCENTILES, np.percentile(ms, PERCENTILES)):
+                stats[f"p{p}"] = round(float(value), 1)
+            stats["max"] = round(float(ms.max()), 1)
+            summary[name] = stats
+        return summary
+
+    def reset(self):
+        with self._lock:
+            self._durations.clear()
+            self._events.clear()
+            self._threads.clear()
+
+    def write_trace(self, path) -> int:
+        """Write the trace events in Chrome trace-event JSON; returns how many were written."""
+        with self._lock:
+            events = sorted(self._events, key=lambda e: e["ts"])
+            threads = dict(self._threads)
+        events = [dict(e, ts=e["ts"] - self.origin * 1e6) for e in events]
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+                    for (pid, tid), name in threads.items()]
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+        return len(events)
+
+
+def summary_lines(summary: Dict[str, Dict[str, float]]) -> List[str]:
+    """One line per stage, slowest total first, for the log and the regression report."""
+    lines = []
+    for name, stats in sorted(summary.items(), key=lambda item: -item[1]["total"]):
+        lines.append(f"{name}: {stats['count']} x {stats['mean']:.1f} ms mean, p50 {stats['p50']:.1f}, "
+                     f"p90 {stats['p90']:.1f}, p99 {stats['p99']:.1f}, max {stats['max']:.1f} ms")
+    return lines
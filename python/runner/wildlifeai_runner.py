@@ -7,13 +7,53 @@ import sys
 import os
 import time
 import threading
+import multiprocessing
+from multiprocessing import shared_memory
 from pathlib import Path
-from typing import List, Dict, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, NamedTuple, Tuple, Optional
+from collections import deque
+from itertools import islice
+from concurrent.futures import (
+    ThreadPoolExecutor,
+    ProcessPoolExecutor,
+    as_completed,
+    wait,
+    FIRST_COMPLETED,
+)
 
 import numpy as np
 from PIL import Image
 import cv2
+
+# Sibling modules must be importable however the runner is loaded
+_RUNNER_DIR = str(Path(__file__).resolve().parent)
+if _RUNNER_DIR not in sys.path:
+    sys.path.insert(0, _RUNNER_DIR)
+
+from result_cache import ResultCache, default_cache_path, model_fingerprint
+from kestrel_parser import SIDECAR_DIR, import_kestrel_databases
+from bracket_engine import write_stack_plan
+from scene_index import SceneIndex, default_index_path, folder_key, legacy_scene_count
+from exif_reader import default_cache as exif_cache, exif_timestamp, read_exif_batch
+from scene_ranking import rank_scenes
+from rescoring import (
+    DETECTION_THRESHOLD, FAILED_TO_READ, RATING_THRESHOLDS, check_thresholds, derive, raw_scores, rescore, rescore_file,
+)
+from bird_prefilter import (
+    CONTRAST_RAMP, DEFAULT_RECALL, DEFAULT_THRESHOLD, DETAIL_RAMP, PROXY_SIZE, TILE_SIZE,
+    prefilter_report, prefilter_score,
+)
+from stage_cache import (
+    Artifacts, StageCache, default_stage_cache_path, file_identity, mask_rle, pack_mask, stage_fingerprint,
+    unpack_mask,
+)
+from mask_rle import MaskStore, mask_container_path
+from proxy_cache import DEFAULT_MAX_BYTES, DEFAULT_PROXY_EDGE, ProxyCache, default_proxy_cache_dir, make_proxy
+from jpeg_outputs import JpegWriter, crop_image, export_image
+from focus_gate import DEFAULT_GATE, focus_gate_report, focus_score, is_unambiguous
+from profiles import DEFAULT_PROFILE, PROFILES, read_preview, satisfies
+from stage_timing import StageTimer, summary_lines
+from memory_budget import GB, MemoryGovernor, MemoryWatermarks, memory_lines, process_rss
 try:
     import torchvision
     import torch
@@ -74,6 +114,20 @@ except ImportError:
 ROOT = Path(getattr(sys, "_MEIPASS", Path(__file__).resolve().parents[2]))
 MODEL_DIR = ROOT / "models"
 
+# Long edge used for scene similarity; frames are reduced to this size before AKAZE
+SIMILARITY_MAX_DIM = 1600
+# Keypoints compared per frame by the AKAZE scene similarity
+AKAZE_MAX_KEYPOINTS = 300
+EXECUTION_MODES = ("thread", "process")
+# Burst mode: the previous frame's bird box, scaled by this factor, is searched first
+BURST_ROI_SCALE = 2.5
+# Smallest side (pixels) of a burst search region
+BURST_ROI_MIN_SIZE = 640
+# Side (pixels) of the square crop the quality model scores
+QUALITY_CROP_SIZE = 1024
+# Pixels around the subject mask kept in cached crops; covers the 5x5 Sobel of the quality model
+CROP_MASK_MARGIN = 2
+
 
 def find_model_directory():
     """Find the models directory in various possible locations derived from ROOT."""
@@ -90,6 +144,14 @@ def find_model_directory():
     # Return the default and let the calling code handle missing files
     return MODEL_DIR
 
+def apply_orientation(img, orientation: Optional[int]):
+    """Rotate a decoded frame upright for an EXIF orientation tag, like the Wand path does."""
+    turns = {3: 2, 6: -1, 8: 1}.get(orientation)
+    if turns is None:
+        return img
+    # OpenCV needs contiguous frames
+    return np.ascontiguousarray(np.rot90(img, turns))
+
 def read_image(path):
     """Uses ImageMagick to read any input image and returns nparray of image contents in height x width x RGB"""
     if WandImage:
@@ -143,110 +205,536 @@ def read_image(path):
         try:
             img_pil = Image.open(path)
             img = np.array(img_pil.convert('RGB'))
-            return img
+            return apply_orientation(img, exif_cache.read(path).orientation)
         except Exception as exc:
             logging.error(f"Failed to load image {path}: {exc}")
             return None
 
-def compute_image_similarity_akaze(img1, img2, max_dim=1600):
-    """Compute image similarity using AKAZE features (exact original implementation)."""
-    if img1 is None or img2 is None:
-        return {
-            'feature_similarity': -1,
-            'feature_confidence': -1,
-            'color_similarity': -1,
-            'color_confidence': -1,
-            'similar': False,
-            'confidence': 0
-        }
-    if img1.shape != img2.shape:
+def burst_roi(box, image_shape, scale: float = BURST_ROI_SCALE,
+              min_size: int = BURST_ROI_MIN_SIZE) -> Optional[Tuple[int, int, int, int]]:
+    """Search region ``(x0, y0, x1, y1)`` around a bird box from the previous frame.
+
+    Returns None when the region would cover most of the image anyway.
+    """
+    height, width = image_shape[:2]
+    (bx0, by0), (bx1, by1) = box
+    cx, cy = (float(bx0) + float(bx1)) / 2, (float(by0) + float(by1)) / 2
+    half_w = max(float(bx1) - float(bx0), 1.0) * scale / 2
+    half_h = max(float(by1) - float(by0), 1.0) * scale / 2
+    half_w, half_h = max(half_w, min_size / 2), max(half_h, min_size / 2)
+    x0, x1 = max(int(cx - half_w), 0), min(int(np.ceil(cx + half_w)), width)
+    y0, y1 = max(int(cy - half_h), 0), min(int(np.ceil(cy + half_h)), height)
+    if (x1 - x0) * (y1 - y0) > 0.6 * width * height:
+        return None
+    return x0, y0, x1, y1
+
+def no_detection() -> Dict:
+    """Detection record of a photo without a usable bird detection."""
+    return {"detection_score": 0, "subject_sharpness": -1}
+
+def mask_sharpness(crop, mask) -> float:
+    """Variance of the Laplacian over the subject mask of a crop; higher is sharper."""
+    gray = cv2.cvtColor(crop, cv2.COLOR_RGB2GRAY) if crop.ndim == 3 else crop
+    laplacian = cv2.Laplacian(gray, cv2.CV_32F)
+    inside = np.asarray(mask).astype(bool)
+    return float(laplacian[inside].var()) if inside.any() else -1
+
+def crop_artifacts(crop, mask) -> Artifacts:
+    """Stage cache artifacts of a quality crop.
+
+    Pixels further than ``CROP_MASK_MARGIN`` from the subject never reach
+    the quality model or the sharpness measure, so they are zeroed to make
+    the crop compress well.
+    """
+    margin = 2 * CROP_MASK_MARGIN + 1
+    keep = cv2.dilate(np.asarray(mask, dtype=np.uint8), np.ones((margin, margin), np.uint8)) > 0
+    return {"crop": np.where(keep[..., None] if crop.ndim == 3 else keep, crop, 0).astype(crop.dtype),
+            "mask": np.asarray(mask)}
+
+def no_similarity() -> Dict:
+    """Similarity record used when no comparison could be made."""
+    return {
+        'feature_similarity': -1,
+        'feature_confidence': -1,
+        'color_similarity': -1,
+        'color_confidence': -1,
+        'similar': False,
+        'confidence': 0
+    }
+
+def resize_for_similarity(img, max_dim=SIMILARITY_MAX_DIM):
+    """Downscale an image to the resolution used by the AKAZE scene comparison.
+
+    Frames that already fit within ``max_dim`` are returned unchanged, so
+    pre-reducing a frame gives the same similarity values as passing the
+    full-resolution image to ``compute_image_similarity_akaze``.
+    """
+    h, w = img.shape[:2]
+    scale = max_dim / max(h, w)
+    if scale < 1.0:
+        img = cv2.resize(img, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_AREA)
+    return img
+
+def select_top_keypoints(keypoints, descriptors, k):
+    """Keep the descriptors of the ``k`` strongest keypoints.
+
+    Selects the same keypoints as a stable sort by descending response: ties
+    at the cut-off go to the keypoints detected first. Returns the number of
+    keypoints kept and their descriptors as one contiguous uint8 block (in
+    detection order, which does not affect matching).
+    """
+    if descriptors is None:
+        return len(keypoints), None
+    if len(keypoints) <= k:
+        return len(keypoints), descriptors
+    responses = np.fromiter((kp.response for kp in keypoints), dtype=np.float32, count=len(keypoints))
+    # Value of the k-th strongest response
+    threshold = np.partition(responses, len(responses) - k)[len(responses) - k]
+    above = np.flatnonzero(responses > threshold)
+    ties = np.flatnonzero(responses == threshold)[:k - len(above)]
+    keep = np.sort(np.concatenate([above, ties]))
+    return k, np.ascontiguousarray(descriptors[keep])
+
+# Number of set bits in every byte value
+_POPCOUNT_TABLE = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+def hamming_knn2(des1, des2):
+    """Distances from each row of ``des1`` to its two nearest rows of ``des2``.
+
+    Uses OpenCV's batched distance kernel, falling back to a packed popcount
+    over the full distance matrix. Equivalent to the first two distances of
+    ``BFMatcher(NORM_HAMMING).knnMatch(des1, des2, k=2)``.
+    """
+    try:
+        dist, _ = cv2.batchDistance(des1, des2, cv2.CV_32S, normType=cv2.NORM_HAMMING, K=2)
+        return dist[:, 0], dist[:, 1]
+    except (cv2.error, AttributeError):
+        pass
+    xor = np.bitwise_xor(des1[:, None, :], des2[None, :, :])
+    dist = _POPCOUNT_TABLE[xor].sum(axis=2, dtype=np.int32)
+    nearest = np.partition(dist, 1, axis=1)
+    return nearest[:, 0], nearest[:, 1]
+
+class AkazeFeatures(NamedTuple):
+    """What the AKAZE comparison needs of one frame."""
+    count: int
+    descriptors: Optional[np.ndarray]
+    mean_color: np.ndarray
+
+def akaze_features(img, max_dim=SIMILARITY_MAX_DIM) -> AkazeFeatures:
+    """Strongest AKAZE descriptors and mean colour of a frame, as compared by ``akaze_similarity``."""
+    # Resize for speed
+    img = resize_for_similarity(img, max_dim)
+
+    # Convert to grayscale for AKAZE
+    gray = cv2.cvtColor(img, cv2.COLOR_RGB2GRAY) if img.ndim == 3 else img
+    keypoints, descriptors = cv2.AKAZE_create().detectAndCompute(gray, None)
+
+    # Keep best 300 keypoints
+    count, descriptors = select_top_keypoints(keypoints, descriptors, AKAZE_MAX_KEYPOINTS)
+    return AkazeFeatures(count, descriptors, np.mean(img.reshape(-1, img.shape[-1]), axis=0))
+
+def akaze_similarity(features1: AkazeFeatures, features2: AkazeFeatures) -> Dict:
+    """Similarity record of two frames from their ``akaze_features``."""
+    n1, des1 = features1.count, features1.descriptors
+    n2, des2 = features2.count, features2.descriptors
+
+    # Compute feature confidence as minimum of keypoints detected
+    feature_confidence = min(n1, n2) / 300
+
+    # if feature confidence is low, fall back to color similarity
+    if feature_confidence < 0.25 or des1 is None or des2 is None or n1 == 0 or n2 == 0:
+        color_diff = np.sum(np.abs(features1.mean_color - features2.mean_color))
         return {
-            'feature_similarity': -1,
-            'feature_confidence': -1,
-            'color_similarity': -1,
-            'color_confidence': -1,
-            'similar': False,
-            'confidence': 0
+            'feature_similarity': 0,
+            'feature_confidence': 0,
+            'color_similarity': color_diff,
+            'color_confidence': abs((768 - color_diff) / 768) if color_diff <= 150 else abs(color_diff / 768),
+            'similar': color_diff <= 150,
+            'confidence': abs((768 - color_diff) / 768) if color_diff <= 150 else abs(color_diff / 768)
         }
-    try:
-        # Resize for speed
-        def resize(img):
-            h, w = img.shape[:2]
-            scale = max_dim / max(h, w)
-            if scale < 1.0:
-                img = cv2.resize(img, (int(w*scale), int(h*scale)), interpolation=cv2.INTER_AREA)
-            return img
-        img1 = resize(img1)
-        img2 = resize(img2)
-
-        # Convert to grayscale for AKAZE
-        gray1 = cv2.cvtColor(img1, cv2.COLOR_RGB2GRAY) if img1.ndim == 3 else img1
-        gray2 = cv2.cvtColor(img2, cv2.COLOR_RGB2GRAY) if img2.ndim == 3 else img2
-
-        akaze = cv2.AKAZE_create()
-        kp1, des1 = akaze.detectAndCompute(gray1, None)
-        kp2, des2 = akaze.detectAndCompute(gray2, None)
-
-        # Keep best 300 keypoints
-        if des1 is not None and len(kp1) > 300:
-            kp1, des1 = zip(*sorted(zip(kp1, des1), key=lambda x: x[0].response, reverse=True)[:300])
-            kp1 = list(kp1)
-            des1 = np.array(des1)
-
-        if des2 is not None and len(kp2) > 300:
-            kp2, des2 = zip(*sorted(zip(kp2, des2), key=lambda x: x[0].response, reverse=True)[:300])
-            kp2 = list(kp2)
-            des2 = np.array(des2)
-
-        # Compute feature confidence as minimum of keypoints detected
-        feature_confidence = min(len(kp1), len(kp2)) / 300
-
-        # if feature confidence is low, fall back to color similarity
-        if feature_confidence < 0.25 or des1 is None or des2 is None or len(kp1) == 0 or len(kp2) == 0:
-            mean1 = np.mean(img1.reshape(-1, img1.shape[-1]), axis=0)
-            mean2 = np.mean(img2.reshape(-1, img2.shape[-1]), axis=0)
-            color_diff = np.sum(np.abs(mean1 - mean2))
-            return {
-                'feature_similarity': 0,
-                'feature_confidence': 0,
-                'color_similarity': color_diff,
-                'color_confidence': abs((768 - color_diff) / 768) if color_diff <= 150 else abs(color_diff / 768),
-                'similar': color_diff <= 150,
-                'confidence': abs((768 - color_diff) / 768) if color_diff <= 150 else abs(color_diff / 768)
-            }
-        
-        # Match features using BFMatcher
-        bf = cv2.BFMatcher(cv2.NORM_HAMMING)
-        matches = bf.knnMatch(des1, des2, k=2)
-        m_arr = np.array([m.distance for m, n in matches])
-        n_arr = np.array([n.distance for m, n in matches])
 
-        # Vectorized Lowe's ratio test
-        good_mask = m_arr < 0.7 * n_arr
+    # Two nearest Hamming neighbours of every descriptor
+    m_arr, n_arr = hamming_knn2(des1, des2)
 
-        # Compute feature similarity
-        feature_similarity = np.sum(good_mask) / ((len(kp1) + len(kp2)) / 2) if (len(kp1) + len(kp2)) > 0 else 0
-        
-        similar = feature_similarity >= 0.05
-        return {
-            'feature_similarity': feature_similarity,
-            'feature_confidence': feature_confidence,
-            'color_similarity': 0,
-            'color_confidence': 0,
-            'similar': similar,
-            'confidence': feature_confidence
-        }
+    # Vectorized Lowe's ratio test
+    good_mask = m_arr < 0.7 * n_arr
+
+    # Compute feature similarity
+    feature_similarity = np.sum(good_mask) / ((n1 + n2) / 2) if (n1 + n2) > 0 else 0
+
+    similar = feature_similarity >= 0.05
+    return {
+        'feature_similarity': feature_similarity,
+        'feature_confidence': feature_confidence,
+        'color_similarity': 0,
+        'color_confidence': 0,
+        'similar': similar,
+        'confidence': feature_confidence
+    }
+
+def compute_image_similarity_akaze(img1, img2, max_dim=SIMILARITY_MAX_DIM):
+    """Compute image similarity using AKAZE features (exact original implementation)."""
+    if img1 is None or img2 is None:
+        return no_similarity()
+    if img1.shape != img2.shape:
+        return no_similarity()
+    try:
+        return akaze_similarity(akaze_features(img1, max_dim), akaze_features(img2, max_dim))
     except Exception as e:
         logging.error(f"Error in compute_image_similarity_akaze: {e}")
-        return {
+        return no_similarity()
+
+def read_capture_time(photo_path) -> Optional[float]:
+    """Capture time of a photo in seconds, from its EXIF header.
+
+    Only the header is parsed. Returns None for files without a readable
+    DateTimeOriginal (or DateTime) tag.
+    """
+    capture_time = exif_cache.read(photo_path).capture_time
+    if capture_time is not None:
+        return capture_time
+    # Formats without a TIFF/EXIF header (PNG, WebP, ...) may still carry EXIF
+    try:
+        with Image.open(photo_path) as img:
+            exif = img.getexif()
+            exif_ifd = exif.get_ifd(0x8769)
+            return exif_timestamp(exif_ifd.get(36867) or exif.get(306), exif_ifd.get(37521))
+    except Exception:
+        return None
+
+# Frames captured further apart than this (seconds) never share a scene
+SCENE_TIME_GAP = 10.0
+SIGNATURE_THUMB_SIZE = 64
+SIGNATURE_HIST_BINS = 16
+# Signature distances below which two frames are certainly the same scene
+SAME_SCENE_HASH_DISTANCE = 8
+SAME_SCENE_HIST_DISTANCE = 0.15
+
+def frame_signature(frame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Compact signature of a frame: 64-bit difference hash, colour histogram, mean colour."""
+    thumb = cv2.resize(frame, (SIGNATURE_THUMB_SIZE, SIGNATURE_THUMB_SIZE), interpolation=cv2.INTER_AREA)
+    if thumb.ndim == 2:
+        thumb = thumb[:, :, None]
+    gray = thumb.mean(axis=2).astype(np.float32)
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    dhash = np.packbits(small[:, 1:] > small[:, :-1])
+    histogram = np.concatenate([
+        np.bincount(thumb[:, :, c].ravel() >> 4, minlength=SIGNATURE_HIST_BINS)
+        for c in range(thumb.shape[2])
+    ]).astype(np.float32)
+    histogram /= thumb.shape[0] * thumb.shape[1]
+    mean_color = thumb.reshape(-1, thumb.shape[2]).mean(axis=0)
+    return dhash, histogram, mean_color
+
+def signature_distance(dhash1, histogram1, dhash2, histogram2) -> Tuple[int, float]:
+    """Hamming distance of the hashes and total variation distance (0..1) of the histograms."""
+    hash_distance = int(np.unpackbits(np.bitwise_xor(dhash1, dhash2)).sum())
+    channels = histogram1.size // SIGNATURE_HIST_BINS
+    hist_distance = float(np.abs(histogram1 - histogram2).sum()) / (2 * channels)
+    return hash_distance, hist_distance
+
+class SceneSignature:
+    """What a scene detector keeps of a frame to compare it with the next one."""
+
+    __slots__ = ("frame", "image_shape", "capture_time", "dhash", "histogram", "mean_color", "features")
+
+    def __init__(self, frame, image_shape, capture_time=None, dhash=None, histogram=None, mean_color=None,
+                 features: Optional[AkazeFeatures] = None):
+        self.frame = frame
+        self.image_shape = tuple(image_shape)
+        self.capture_time = capture_time
+        self.dhash = dhash
+        self.histogram = histogram
+        self.mean_color = mean_color
+        # AKAZE features, computed from ``frame`` on first use
+        self.features = features
+
+    def akaze_features(self) -> AkazeFeatures:
+        if self.features is None:
+            self.features = akaze_features(self.frame)
+        return self.features
+
+def scene_artifacts(signature: SceneSignature) -> Artifacts:
+    """Stage cache artifacts of a frame: everything scene detection needs of it, without the pixels."""
+    if signature.dhash is not None:
+        dhash, histogram, mean_color = signature.dhash, signature.histogram, signature.mean_color
+    else:
+        dhash, histogram, mean_color = frame_signature(signature.frame)
+    features = signature.akaze_features()
+    artifacts = {
+        "image_shape": np.array(signature.image_shape),
+        "dhash": dhash,
+        "histogram": histogram,
+        "mean_color": mean_color,
+        "akaze_count": np.int64(features.count),
+        "akaze_mean_color": features.mean_color,
+    }
+    if features.descriptors is not None:
+        artifacts["akaze_descriptors"] = features.descriptors
+    return artifacts
+
+def scene_signature(artifacts: Artifacts, capture_time=None) -> SceneSignature:
+    """Scene signature rebuilt from ``scene_artifacts``, for a frame that was not decoded."""
+    features = AkazeFeatures(int(artifacts["akaze_count"]), artifacts.get("akaze_descriptors"),
+                             artifacts["akaze_mean_color"])
+    return SceneSignature(None, tuple(int(n) for n in artifacts["image_shape"]), capture_time,
+                          artifacts["dhash"], artifacts["histogram"], artifacts["mean_color"], features)
+
+class SceneDetector:
+    """Scene-change detection with AKAZE on every pair of frames (original behaviour)."""
+
+    name = "akaze"
+
+    def __init__(self):
+        self.tier_counts: Dict[str, int] = {}
+
+    def signature(self, frame, image_shape, capture_time=None) -> SceneSignature:
+        """``frame`` is the image reduced by ``resize_for_similarity``."""
+        return SceneSignature(frame, image_shape, capture_time)
+
+    def compare(self, previous: Optional[SceneSignature], current: SceneSignature) -> Dict:
+        """Similarity record for two consecutive frames; ``similar`` is False on a scene change."""
+        if previous is None or previous.image_shape != current.image_shape:
+            return self._count("first" if previous is None else "shape", no_similarity())
+        try:
+            # Each frame's features are computed once, as the current and then the previous frame
+            similarity = akaze_similarity(previous.akaze_features(), current.akaze_features())
+        except Exception as e:
+            logging.error(f"Error in compute_image_similarity_akaze: {e}")
+            similarity = no_similarity()
+        return self._count("akaze", similarity)
+
+    def _count(self, tier: str, similarity: Dict) -> Dict:
+        self.tier_counts[tier] = self.tier_counts.get(tier, 0) + 1
+        similarity['tier'] = tier
+        return similarity
+
+    def tier_fractions(self) -> Dict[str, float]:
+        """Fraction of compared frame pairs resolved by each tier."""
+        total = sum(self.tier_counts.values())
+        return {tier: count / total for tier, count in self.tier_counts.items()} if total else {}
+
+class TieredSceneDetector(SceneDetector):
+    """Scene-change detection that only runs AKAZE on ambiguous pairs.
+
+    Tiers, cheapest first:
+
+    1. capture time: frames shot more than ``time_gap`` seconds apart start a new scene;
+    2. signature: a 64-bit difference hash and a colour histogram of a tiny
+       thumbnail decide pairs that are clearly the same or clearly different;
+    3. AKAZE feature matching for everything in between.
+    """
+
+    name = "tiered"
+
+    def __init__(self, time_gap: float = SCENE_TIME_GAP, same_hash: int = SAME_SCENE_HASH_DISTANCE,
+                 same_hist: float = SAME_SCENE_HIST_DISTANCE, different_hash: int = 22,
+                 different_hist: float = 0.35):
+        super().__init__()
+        self.time_gap = time_gap
+        self.same_hash = same_hash
+        self.same_hist = same_hist
+        self.different_hash = different_hash
+        self.different_hist = different_hist
+
+    def signature(self, frame, image_shape, capture_time=None) -> SceneSignature:
+        dhash, histogram, mean_color = frame_signature(frame)
+        return SceneSignature(frame, image_shape, capture_time, dhash, histogram, mean_color)
+
+    def compare(self, previous: Optional[SceneSignature], current: SceneSignature) -> Dict:
+        if previous is None or previous.image_shape != current.image_shape:
+            return super().compare(previous, current)
+
+        if (previous.capture_time is not None and current.capture_time is not None
+                and abs(current.capture_time - previous.capture_time) > self.time_gap):
+            similarity = no_similarity()
+            similarity['confidence'] = 1.0
+            return self._count("time", similarity)
+
+        hash_distance, hist_distance = signature_distance(
+            previous.dhash, previous.histogram, current.dhash, current.histogram
+        )
+        if hash_distance <= self.same_hash and hist_distance <= self.same_hist:
+            similar, confidence = True, 1.0 - hash_distance / 64
+        elif hash_distance >= self.different_hash and hist_distance >= self.different_hist:
+            similar, confidence = False, hash_distance / 64
+        else:
+            return super().compare(previous, current)
+
+        color_diff = float(np.sum(np.abs(previous.mean_color - current.mean_color)))
+        return self._count("signature", {
             'feature_similarity': -1,
             'feature_confidence': -1,
-            'color_similarity': -1,
-            'color_confidence': -1,
-            'similar': False,
-            'confidence': 0
+            'color_similarity': color_diff,
+            'color_confidence': confidence,
+            'similar': similar,
+            'confidence': confidence
+        })
+
+SCENE_DETECTORS = {
+    SceneDetector.name: SceneDetector,
+    TieredSceneDetector.name: TieredSceneDetector,
+}
+
+# Frames further apart than this (seconds) are never put in the same cluster
+CLUSTER_TIME_WINDOW = 600.0
+# With the 64-bit hash split into 8 one-byte bands, two hashes at most 7 bits
+# apart always share a band, so no matching pair is missed by the buckets
+CLUSTER_HASH_DISTANCE = 7
+CLUSTER_HIST_DISTANCE = SAME_SCENE_HIST_DISTANCE
+# Most recent bucket members compared per band; bounds the cost of flat frames
+CLUSTER_MAX_CANDIDATES = 32
+
+class ClusterFrame(NamedTuple):
+    capture_time: float
+    scene_id: int
+    dhash: Optional[np.ndarray] = None
+    histogram: Optional[np.ndarray] = None
+
+def cluster_frames(frames: List[ClusterFrame], time_window: float = CLUSTER_TIME_WINDOW,
+                   hash_distance: int = CLUSTER_HASH_DISTANCE,
+                   hist_distance: float = CLUSTER_HIST_DISTANCE) -> List[int]:
+    """Group near-duplicate frames of a shoot, including non-adjacent ones.
+
+    Frames are visited in capture order and bucketed on each byte of their
+    difference hash (locality-sensitive hashing); only bucket members captured
+    within ``time_window`` seconds are compared, so the cost grows linearly
+    with the shoot. Matching frames and frames of the same scene are merged
+    with union-find. Returns, for each frame, the lowest scene id in its
+    cluster.
+    """
+    parent = list(range(len(frames)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        i, j = find(i), find(j)
+        if i != j:
+            parent[max(i, j)] = min(i, j)
+
+    hashes = np.zeros((len(frames), 8), dtype=np.uint8)
+    for i, frame in enumerate(frames):
+        if frame.dhash is not None:
+            hashes[i] = frame.dhash
+
+    order = sorted(range(len(frames)), key=lambda i: (frames[i].capture_time, i))
+    first_of_scene = {}
+    buckets = {}
+    for i in order:
+        frame = frames[i]
+        union(i, first_of_scene.setdefault(frame.scene_id, i))
+        if frame.dhash is None or time_window <= 0:
+            continue
+        candidates = set()
+        for band, value in enumerate(hashes[i].tolist()):
+            bucket = buckets.setdefault((band, value), deque())
+            while bucket and frame.capture_time - frames[bucket[0]].capture_time > time_window:
+                bucket.popleft()
+            candidates.update(islice(reversed(bucket), CLUSTER_MAX_CANDIDATES))
+            bucket.append(i)
+        if not candidates:
+            continue
+        # Hamming distances to all candidates at once; histograms only for the few close hashes
+        candidates = np.fromiter(candidates, dtype=np.intp, count=len(candidates))
+        distances = _POPCOUNT_TABLE[hashes[candidates] ^ hashes[i]].sum(axis=1)
+        for j in candidates[distances <= hash_distance].tolist():
+            other = frames[j]
+            if find(i) != find(j) and other.histogram.shape == frame.histogram.shape and \
+                    signature_distance(other.dhash, other.histogram, frame.dhash, frame.histogram)[1] <= hist_distance:
+                union(i, j)
+
+    lowest = {}
+    for i, frame in enumerate(frames):
+        root = find(i)
+        lowest[root] = min(lowest.get(root, frame.scene_id), frame.scene_id)
+    return [lowest[find(i)] for i in range(len(frames))]
+
+class ThreadBudget:
+    """Split the machine's CPU threads between workers and ML frameworks.
+
+    Every concurrently processed photo gets an equal share of the cores. Thread
+    pools that are created per calling thread (torch intra-op, OpenCV) are sized
+    to that share; pools shared by all workers of a process (TensorFlow, ONNX
+    Runtime sessions) are sized for the workers sharing them. Inter-op pools get
+    a single thread because each photo runs its models one after another.
+    """
+
+    ENV_VARS = ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS")
+
+    def __init__(self, max_workers: int, workers_per_process: Optional[int] = None,
+                 cpu_threads: Optional[int] = None, intra_op_threads: Optional[int] = None):
+        self.cpu_threads = cpu_threads or os.cpu_count() or 1
+        self.max_workers = max(1, max_workers)
+        self.workers_per_process = max(1, workers_per_process or self.max_workers)
+        self.per_worker = intra_op_threads or max(1, self.cpu_threads // self.max_workers)
+        self.per_process = min(self.cpu_threads, self.per_worker * self.workers_per_process)
+
+    def layout(self) -> Dict[str, int]:
+        """Thread counts assigned to each framework."""
+        return {
+            "cpu_threads": self.cpu_threads,
+            "workers": self.max_workers,
+            "workers_per_process": self.workers_per_process,
+            "torch_intra_op": self.per_worker,
+            "torch_inter_op": 1,
+            "tensorflow_intra_op": self.per_process,
+            "tensorflow_inter_op": 1,
+            "onnxruntime_intra_op": self.per_process,
+            "onnxruntime_inter_op": 1,
+            "opencv": self.per_worker,
         }
 
+    def child_environment(self) -> Dict[str, str]:
+        """Environment for worker processes so OpenMP/BLAS pools start at the right size."""
+        env = {name: str(self.per_worker) for name in self.ENV_VARS}
+        env["TF_NUM_INTRAOP_THREADS"] = str(self.per_process)
+        env["TF_NUM_INTEROP_THREADS"] = "1"
+        return env
+
+    def apply(self):
+        """Apply the layout to every loaded framework; call before any model loads."""
+        if torch is not None:
+            torch.set_num_threads(self.per_worker)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError as exc:
+                # Only allowed once, before any inter-op work has started
+                logging.debug(f"torch inter-op threads already fixed: {exc}")
+        if tf is not None:
+            try:
+                tf.config.threading.set_intra_op_parallelism_threads(self.per_process)
+                tf.config.threading.set_inter_op_parallelism_threads(1)
+            except RuntimeError as exc:
+                logging.debug(f"TensorFlow threading already initialized: {exc}")
+        if hasattr(cv2, "setNumThreads"):
+            cv2.setNumThreads(self.per_worker)
+        self.log_layout()
+
+    def log_layout(self):
+        layout = self.layout()
+        logging.info(
+            f"Thread budget: {layout['cpu_threads']} CPU threads, {layout['workers']} worker(s) "
+            f"({layout['workers_per_process']} per process) -> "
+            f"torch {layout['torch_intra_op']}/{layout['torch_inter_op']}, "
+            f"TensorFlow {layout['tensorflow_intra_op']}/{layout['tensorflow_inter_op']}, "
+            f"ONNX Runtime {layout['onnxruntime_intra_op']}/{layout['onnxruntime_inter_op']}, "
+            f"OpenCV {layout['opencv']} (intra-op/inter-op)"
+        )
+
+    def onnx_session_options(self):
+        """ONNX Runtime session options sized to this budget."""
+        if not ort:
+            return None
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = self.per_process
+        options.inter_op_num_threads = 1
+        return options
+
 class MaskRCNN:
     """Mask R-CNN for bird detection (exact original implementation)."""
     
@@ -323,6 +811,12 @@ class MaskRCNN:
             logging.error(f"Mask R-CNN prediction failed: {exc}")
             return None, None, None, None
     
+    def set_input_size(self, min_size: int, max_size: int):
+        """Resize frames so their shorter side is ``min_size`` (longer side at most ``max_size``) for detection."""
+        if self.model is not None:
+            self.model.transform.min_size = (min_size,)
+            self.model.transform.max_size = max_size
+
     def _get_center_of_mass(self, mask):
         """Get center of mass of mask (exact original implementation)."""
         y, x = np.where(mask > 0)
@@ -409,11 +903,37 @@ class MaskRCNN:
         mask_crop = mask[y_min:y_max, x_min:x_max]
 
         if resize:
-            crop = cv2.resize(crop,(1024,1024))
-            mask_crop = cv2.resize(mask_crop.astype(np.uint8),(1024,1024))
+            crop = cv2.resize(crop,(QUALITY_CROP_SIZE,QUALITY_CROP_SIZE))
+            mask_crop = cv2.resize(mask_crop.astype(np.uint8),(QUALITY_CROP_SIZE,QUALITY_CROP_SIZE))
 
         return crop, mask_crop
 
+    def get_prediction_in_roi(self, image_data, roi, threshold=0.2):
+        """Run ``get_prediction`` on the ``(x0, y0, x1, y1)`` region of an image.
+
+        Masks and boxes are mapped back to full-image coordinates. Returns
+        all None when the region holds no bird, or when the best bird touches
+        an edge of the region inside the image and may be cut off.
+        """
+        x0, y0, x1, y1 = roi
+        masks, pred_boxes, pred_class, pred_score = self.get_prediction(image_data[y0:y1, x0:x1], threshold)
+        if masks is None or pred_boxes is None or pred_class is None or pred_score is None:
+            return None, None, None, None
+        birds = [i for i, c in enumerate(pred_class) if c == 'bird']
+        if not birds:
+            return None, None, None, None
+        (bx0, by0), (bx1, by1) = pred_boxes[birds[int(np.argmax([pred_score[i] for i in birds]))]]
+        height, width = image_data.shape[:2]
+        if (bx0 <= 1 and x0 > 0) or (by0 <= 1 and y0 > 0) or \
+                (bx1 >= x1 - x0 - 1 and x1 < width) or (by1 >= y1 - y0 - 1 and y1 < height):
+            return None, None, None, None
+
+        full_masks = np.zeros((len(masks), height, width), dtype=masks.dtype)
+        full_masks[:, y0:y1, x0:x1] = masks
+        dx, dy = np.float32(x0), np.float32(y0)
+        pred_boxes = [[(a + dx, b + dy), (c + dx, d + dy)] for (a, b), (c, d) in pred_boxes]
+        return full_masks, pred_boxes, pred_class, pred_score
+
     def get_species_crop(self, box, img):
         """Get the crop for the bird species classifier (exact original implementation)."""
         xmin, xmax, ymin, ymax = box[0][0].astype(int), box[1][0].astype(int), box[0][1].astype(int), box[1][1].astype(int)
@@ -423,14 +943,14 @@ class MaskRCNN:
 class BirdSpeciesClassifier:
     """Bird species classifier (exact original implementation)."""
     
-    def __init__(self, model_path, labels_path, onnx_providers):
+    def __init__(self, model_path, labels_path, onnx_providers, session_options=None):
         self.model_path = model_path
         self.labels_path = labels_path
         with open(labels_path, "r") as f:
             self.labels = [line.strip() for line in f.readlines()]
             self.labels = np.array(self.labels)
 
-        self.session = ort.InferenceSession(self.model_path, providers=onnx_providers)
+        self.session = ort.InferenceSession(self.model_path, sess_options=session_options, providers=onnx_providers)
     
     def _preprocess_image(self, image):
         """Preprocess the image data to the model input tensor dimensions (exact original implementation)."""
@@ -484,14 +1004,79 @@ class QualityClassifier:
         return -1
 
 class EnhancedModelRunner:
-    def __init__(self, use_gpu: bool = False, max_workers: int = 4):
+    def __init__(self, use_gpu: bool = False, max_workers: int = 4, execution_mode: str = "thread",
+                 thread_budget: Optional[ThreadBudget] = None, intra_op_threads: Optional[int] = None,
+                 result_cache: Optional[ResultCache] = None, scene_detector: str = "akaze",
+                 scene_index: Optional[SceneIndex] = None, cluster_window: float = CLUSTER_TIME_WINDOW,
+                 burst_roi: bool = False, prefilter_threshold: Optional[float] = None,
+                 prefilter_recall: float = DEFAULT_RECALL, stage_cache: Optional[StageCache] = None,
+                 rating_thresholds=RATING_THRESHOLDS, min_detection: float = DETECTION_THRESHOLD,
+                 save_masks: bool = False, proxy_cache: Optional[ProxyCache] = None,
+                 focus_gate: Optional[Tuple[float, float]] = None, profile: str = DEFAULT_PROFILE,
+                 trace: bool = False, memory_budget: Optional[int] = None):
+        if execution_mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {execution_mode}")
+        if profile not in PROFILES:
+            raise ValueError(f"Unknown profile: {profile}")
+        # Triage trades precision for speed; results are tagged with the profile
+        self.profile = PROFILES[profile]
+        scene_detector = self.profile.scene_detector or scene_detector
+        if scene_detector not in SCENE_DETECTORS:
+            raise ValueError(f"Unknown scene detector: {scene_detector}")
         self.use_gpu = use_gpu
         self.max_workers = max_workers
+        self.execution_mode = execution_mode
+        if thread_budget is None:
+            thread_budget = ThreadBudget(
+                max_workers,
+                workers_per_process=1 if execution_mode == "process" else max_workers,
+                intra_op_threads=intra_op_threads,
+            )
+        self.thread_budget = thread_budget
+        self.result_cache = result_cache
+        self.stage_cache = stage_cache
+        self.proxy_cache = proxy_cache
+        self._process_pool = None
+        # RSS watermarks of the run (worker processes included), sampled around each stage
+        self.memory = MemoryWatermarks(self._process_tree_rss)
+        self.memory_summary: Dict = {}
+        # Photos in flight are throttled to fit in ``memory_budget`` bytes (None = off)
+        self.governor = MemoryGovernor(memory_budget, self._process_tree_rss) if memory_budget else None
+        # Time spent in each stage, per photo and for the run (and a Chrome trace with ``trace``)
+        self.timer = StageTimer(trace, self.memory)
+        self.stage_summary: Dict[str, Dict[str, float]] = {}
+        # Export and crop JPEGs are encoded in the background
+        self.jpeg_writer = JpegWriter(timer=self.timer)
         self.mask_rcnn = None
         self.species_classifier = None
         self.quality_classifier = None
-        self.previous_image = None
-        self.scene_count = self._load_global_scene_count()
+        self.scene_detector = SCENE_DETECTORS[scene_detector]()
+        self.previous_signature: Optional[SceneSignature] = None
+        self._previous_folder: Optional[str] = None
+        # Persistent scene ids; the default index is opened by the first batch
+        self.scene_index = scene_index
+        self._scene_index_unavailable = False
+        self._assigned_scenes = set()
+        self.scene_count = scene_index.last_scene_id() if scene_index is not None else 0
+        # Signatures of this batch's frames for shoot-wide clustering
+        self.cluster_window = cluster_window
+        self._batch_frames: Dict[str, ClusterFrame] = {}
+        # Burst mode: bird boxes of recent frames, searched first in the next similar frame
+        self.burst_roi = burst_roi
+        self._previous_photo: Optional[str] = None
+        self._bird_boxes: Dict[str, list] = {}
+        self.burst_stats = {"roi": 0, "full_frame": 0}
+        # Frames scoring below this on the empty-frame prefilter skip the models (None = off)
+        self.prefilter_threshold = prefilter_threshold
+        self.prefilter_recall = prefilter_recall
+        # Focus scores outside this (low, high) range stand in for the quality model (None = off)
+        self.focus_gate = focus_gate
+        # Applied to the raw model outputs when results are built or read from the cache
+        self.rating_thresholds = check_thresholds(rating_thresholds)
+        self.min_detection = min_detection
+        # Bird masks kept in one run-length encoded container per photo folder
+        self.save_masks = save_masks
+        self._mask_stores: Dict[str, Optional[MaskStore]] = {}
         # Shared lock to protect writes to shared resources
         self._write_lock = threading.Lock()
         # Lock to protect scene counting and previous image access
@@ -500,6 +1085,7 @@ class EnhancedModelRunner:
         # Find the actual model directory
         self.model_dir = find_model_directory()
         logging.info(f"Using model directory: {self.model_dir}")
+        self.stage_fingerprints = self._stage_fingerprints()
         
         # Check model files exist
         onnx_path = self.model_dir / "model.onnx"
@@ -510,6 +1096,20 @@ class EnhancedModelRunner:
         logging.info(f"Keras model exists: {keras_path.exists()} at {keras_path}")
         logging.info(f"Labels file exists: {labels_path.exists()} at {labels_path}")
         
+        # In process mode every worker process loads its own model replicas
+        if self.execution_mode == "process":
+            logging.info(f"Process execution mode: models load in {self.max_workers} worker process(es)")
+            if self.burst_roi:
+                # Workers detect before the scene of a frame is known
+                logging.warning("Burst ROI detection only applies in thread mode; detecting on full frames")
+                self.burst_roi = False
+            self.thread_budget.log_layout()
+            self.onnx_providers = []
+            return
+
+        # Size framework thread pools before any model creates them
+        self.thread_budget.apply()
+
         # Configure providers and load models
         self.onnx_providers = self._get_onnx_providers()
         self._load_models()
@@ -538,36 +1138,92 @@ class EnhancedModelRunner:
         logging.info(f"Using ONNX providers: {providers}")
         return providers
 
-    def _load_global_scene_count(self) -> int:
-        """Load the global scene counter from persistent storage."""
-        try:
-            # Store scene count in user's temp directory
-            import tempfile
-            scene_file = Path(tempfile.gettempdir()) / "wildlifeai_scene_count.txt"
-            
-            if scene_file.exists():
-                with open(scene_file, 'r') as f:
-                    count = int(f.read().strip())
-                    logging.info(f"Loaded global scene count: {count}")
-                    return count
+    def _get_scene_index(self) -> Optional[SceneIndex]:
+        """Open the default scene index on first use; None if it cannot be opened."""
+        if self.scene_index is None and not self._scene_index_unavailable:
+            try:
+                self.scene_index = SceneIndex(default_index_path(), seed=legacy_scene_count())
+                if self.previous_signature is None:
+                    self.scene_count = self.scene_index.last_scene_id()
+                logging.info(f"Scene index: {self.scene_index.path} (last scene {self.scene_index.last_scene_id()})")
+            except Exception as e:
+                logging.warning(f"Scene index unavailable, scene numbers will not persist: {e}")
+                self._scene_index_unavailable = True
+        return self.scene_index
+
+    def _assign_scene(self, photo_path: str, signature: SceneSignature, similar: bool):
+        """Set ``self.scene_count`` to the scene of this frame and index it.
+
+        A frame similar to the previous one continues its scene. Otherwise the
+        first frame of a run (or of a new folder) is stitched onto the indexed
+        frame captured just before it; other frames reuse the scene they had in
+        an earlier run, or get a newly allocated id.
+        """
+        capture_time = signature.capture_time
+        if capture_time is None:
+            try:
+                capture_time = os.path.getmtime(photo_path)
+            except OSError:
+                capture_time = time.time()
+        if signature.dhash is not None:
+            dhash, histogram = signature.dhash, signature.histogram
+        else:
+            dhash, histogram, _ = frame_signature(signature.frame)
+
+        index = self.scene_index
+        if index is None:
+            if not similar:
+                self.scene_count += 1
+            self._batch_frames[photo_path] = ClusterFrame(capture_time, self.scene_count, dhash, histogram)
+            return
+
+        folder = folder_key(photo_path)
+        scene_id = self.scene_count if similar and self.previous_signature is not None else None
+        if scene_id is None and (self.previous_signature is None or folder != self._previous_folder):
+            neighbour = index.predecessor(photo_path, capture_time)
+            if (neighbour is not None and neighbour.dhash is not None
+                    and capture_time - neighbour.capture_time <= SCENE_TIME_GAP):
+                hash_distance, hist_distance = signature_distance(
+                    np.frombuffer(neighbour.dhash, dtype=np.uint8), np.frombuffer(neighbour.histogram, dtype=np.float32),
+                    dhash, histogram
+                )
+                if hash_distance <= SAME_SCENE_HASH_DISTANCE and hist_distance <= SAME_SCENE_HIST_DISTANCE:
+                    scene_id = neighbour.scene_id
+        if scene_id is None:
+            earlier = index.scene_of(photo_path)
+            if earlier is not None and earlier not in self._assigned_scenes:
+                scene_id = earlier
             else:
-                logging.info("No existing scene count found, starting from 0")
-                return 0
-        except Exception as e:
-            logging.warning(f"Failed to load scene count: {e}, starting from 0")
-            return 0
-    
-    def _save_global_scene_count(self):
-        """Save the current scene count to persistent storage."""
-        try:
-            import tempfile
-            scene_file = Path(tempfile.gettempdir()) / "wildlifeai_scene_count.txt"
-            with self._write_lock:
-                with open(scene_file, 'w') as f:
-                    f.write(str(self.scene_count))
-            logging.debug(f"Saved global scene count: {self.scene_count}")
-        except Exception as e:
-            logging.warning(f"Failed to save scene count: {e}")
+                scene_id = index.allocate_scene()
+
+        index.record(photo_path, capture_time, scene_id, dhash.tobytes(), histogram.astype(np.float32).tobytes())
+        self._assigned_scenes.add(scene_id)
+        self.scene_count = scene_id
+        self._previous_folder = folder
+        self._batch_frames[photo_path] = ClusterFrame(capture_time, scene_id, dhash, histogram)
+
+    def _assign_clusters(self, photo_paths: List[str], results: List[Optional[Dict]]):
+        """Add a shoot-wide ``cluster_id`` to every result of the batch."""
+        frames = []
+        clustered = []
+        for path, result in zip(photo_paths, results):
+            if not result or "scene_count" not in result:
+                continue
+            frame = self._batch_frames.get(path)
+            if frame is None:
+                # Cached result: reuse the signature indexed when it was analysed
+                indexed = self.scene_index.lookup(path) if self.scene_index is not None else None
+                if indexed is not None and indexed.dhash is not None:
+                    frame = ClusterFrame(indexed.capture_time, result["scene_count"],
+                                         np.frombuffer(indexed.dhash, dtype=np.uint8),
+                                         np.frombuffer(indexed.histogram, dtype=np.float32))
+                else:
+                    frame = ClusterFrame(float("inf"), result["scene_count"])
+            frames.append(frame._replace(scene_id=result["scene_count"]))
+            clustered.append(result)
+        for result, cluster_id in zip(clustered, cluster_frames(frames, self.cluster_window)):
+            result["cluster_id"] = cluster_id
+        self._batch_frames.clear()
 
     def _safe_write_json(self, path: Path, data: Dict, retries: int = 3) -> bool:
         """Safely write JSON data to disk with locking and retries."""
@@ -606,6 +1262,8 @@ class EnhancedModelRunner:
         """Load all models (exact original implementation)."""
         # Load Mask R-CNN for bird detection
         self.mask_rcnn = MaskRCNN()
+        if self.profile.detection_size:
+            self.mask_rcnn.set_input_size(*self.profile.detection_size)
         
         # Load ONNX model for species detection
         onnx_path = self.model_dir / "model.onnx"
@@ -615,7 +1273,8 @@ class EnhancedModelRunner:
                 self.species_classifier = BirdSpeciesClassifier(
                     str(onnx_path), 
                     str(labels_path), 
-                    self.onnx_providers
+                    self.onnx_providers,
+                    self.thread_budget.onnx_session_options()
                 )
                 logging.info(f"ONNX species classifier loaded")
             except Exception as exc:
@@ -636,175 +1295,365 @@ class EnhancedModelRunner:
 
     def predict_single(self, photo_path: str) -> Tuple[str, float, float, Dict]:
         """Run inference on a single image (exact original implementation logic)."""
+        return self._predict(photo_path)[:4]
+
+    def _predict(self, photo_path: str) -> Tuple[str, float, float, Dict, Dict, Optional[np.ndarray]]:
+        """``predict_single`` plus the detection details and the decoded frame (None when it was not decoded)."""
+        img = None
         try:
-            # Read the image using ImageMagick (original approach)
-            img = read_image(photo_path)
-            
-            if img is None:
-                logging.warning(f"Failed to read image: {photo_path}")
-                return "Failed to Read", 0, -1, {
-                    'feature_similarity': -1,
-                    'feature_confidence': -1,
-                    'color_similarity': -1,
-                    'color_confidence': -1,
-                    'similar': False,
-                    'confidence': 0
-                }
+            # Photos whose every stage is cached are not decoded at all
+            cached = self._cached_stages(photo_path)
+            if not self._stages_cover(cached):
+                # Read the image using ImageMagick (original approach)
+                with self.timer.stage("decode"):
+                    img = self._read_image(photo_path)
+
+                if img is None:
+                    logging.warning(f"Failed to read image: {photo_path}")
+                    return "Failed to Read", 0, -1, no_similarity(), no_detection(), None
+                if self.governor is not None:
+                    self.governor.allocated(img.shape)
             
             # Compute similarity with previous image for scene detection
-            with self._state_lock:
-                similarity = compute_image_similarity_akaze(self.previous_image, img)
-                if not similarity['similar']:
-                    self.scene_count += 1
-
-                # Update previous_image for next iteration
-                self.previous_image = img.copy()
+            with self.timer.stage("scene"):
+                similarity, previous_photo = self._update_scene(img, photo_path, cached.get("scene"))
             
-            # Get predictions from Mask-RCNN
-            if not self.mask_rcnn or self.mask_rcnn.model is None:
-                return "No Bird", 0, -1, similarity
-                
-            masks, pred_boxes, pred_class, pred_score = self.mask_rcnn.get_prediction(img)
+            roi = None
+            if self.burst_roi and similarity['similar'] and img is not None:
+                with self._state_lock:
+                    previous_box = self._bird_boxes.get(previous_photo)
+                roi = burst_roi(previous_box, img.shape) if previous_box is not None else None
+            species, species_confidence, quality_score, detection = self._run_models(img, photo_path, roi, cached)
+            return species, species_confidence, quality_score, similarity, detection, img
+            
+        except Exception as e:
+            logging.error(f"Error processing {photo_path}: {e}")
+            return "No Bird", 0, -1, no_similarity(), no_detection(), img
+
+    def _read_image(self, photo_path: str):
+        """Decode a photo, or map its proxy when the proxy cache is on.
+
+        The triage profile reads the embedded preview when there is one, and
+        shrinks the frame to the profile's ``frame_edge``.
+        """
+        img = None
+        if self.profile.preview:
+            img = read_preview(photo_path, self.profile.frame_edge)
+            if img is not None:
+                img = apply_orientation(img, exif_cache.read(photo_path).orientation)
+        if img is None:
+            img = read_image(photo_path) if self.proxy_cache is None else self.proxy_cache.load(photo_path, read_image)
+        if img is not None and self.profile.frame_edge:
+            img = make_proxy(img, self.profile.frame_edge)
+        return img
+
+    def _update_scene(self, img, photo_path: str, scene: Optional[Artifacts] = None) -> Tuple[Dict, Optional[str]]:
+        """Compare ``img`` with the previous frame and advance the scene counter.
+
+        ``img`` may be None when ``scene`` holds the frame's cached scene
+        artifacts. Returns the similarity record and the path of the frame
+        compared with.
+        """
+        capture_time = read_capture_time(photo_path)
+        if scene is not None:
+            signature = scene_signature(scene, capture_time)
+        else:
+            frame = resize_for_similarity(img)
+            if frame is img:
+                frame = img.copy()
+            signature = self.scene_detector.signature(frame, img.shape, capture_time)
+        with self._state_lock:
+            similarity = self.scene_detector.compare(self.previous_signature, signature)
+            self._assign_scene(photo_path, signature, similarity['similar'])
+
+            # Keep this frame for the next comparison
+            self.previous_signature = signature
+            previous_photo, self._previous_photo = self._previous_photo, photo_path
+        if scene is None and self.stage_cache is not None:
+            self._store_stages(photo_path, {"scene": scene_artifacts(signature)})
+        return similarity, previous_photo
+
+    def _stage_fingerprints(self) -> Dict[str, str]:
+        """Fingerprint of every cached stage, chained through the stages it depends on."""
+        # Stages reading a proxy or a triage preview see a smaller frame than those reading the decoded photo
+        proxy_edge = self.proxy_cache.edge if self.proxy_cache is not None else None
+        frame = (proxy_edge, *self.profile.fingerprint)
+        detection = stage_fingerprint(
+            "detection", getattr(torchvision, "__version__", None), "maskrcnn_resnet50_fpn_v2", "DEFAULT", 0.2,
+            *frame
+        )
+        crop = stage_fingerprint("crop", detection, QUALITY_CROP_SIZE, CROP_MASK_MARGIN)
+        return {
+            "scene": stage_fingerprint("scene", SIMILARITY_MAX_DIM, AKAZE_MAX_KEYPOINTS, SIGNATURE_THUMB_SIZE,
+                                       *frame),
+            "prefilter": stage_fingerprint("prefilter", PROXY_SIZE, TILE_SIZE, CONTRAST_RAMP, DETAIL_RAMP,
+                                           *frame),
+            "detection": detection,
+            "species": stage_fingerprint("species", detection, file_identity(self.model_dir / "model.onnx"),
+                                         file_identity(self.model_dir / "labels.txt")),
+            "crop": crop,
+            "quality": stage_fingerprint("quality", crop, file_identity(self.model_dir / "quality.keras")),
+        }
+
+    def _cached_stages(self, photo_path: str) -> Dict[str, Artifacts]:
+        if self.stage_cache is None:
+            return {}
+        return self.stage_cache.get(photo_path, self.stage_fingerprints)
+
+    def _stages_cover(self, cached: Dict[str, Artifacts]) -> bool:
+        """True when ``cached`` holds every stage that would otherwise need the decoded image."""
+        if "scene" not in cached:
+            return False
+        if self.prefilter_threshold is not None:
+            if "prefilter" not in cached:
+                return False
+            if float(cached["prefilter"]["score"]) < self.prefilter_threshold:
+                return True
+        if "detection" not in cached:
+            return False
+        if not cached["detection"]["found"]:
+            return True
+        return "crop" in cached and ("species" in cached or not self.species_classifier)
+
+    def _save_mask(self, photo_path: str, rle):
+        """Keep a photo's bird mask in its folder's mask container."""
+        folder = os.path.dirname(os.path.abspath(photo_path))
+        with self._state_lock:
+            if folder not in self._mask_stores:
+                try:
+                    self._mask_stores[folder] = MaskStore(mask_container_path(folder, SIDECAR_DIR))
+                except Exception as e:
+                    logging.warning(f"Masks of {folder} will not be saved: {e}")
+                    self._mask_stores[folder] = None
+            store = self._mask_stores[folder]
+        if store is not None:
+            store.put(photo_path, rle)
+
+    def _store_stages(self, photo_path: str, artifacts: Dict[str, Artifacts]):
+        if self.stage_cache is not None and artifacts:
+            self.stage_cache.put(photo_path, {
+                stage: (self.stage_fingerprints[stage], values) for stage, values in artifacts.items()
+            })
+
+    def _run_models(self, img, photo_path: str, roi: Optional[Tuple[int, int, int, int]] = None,
+                    cached: Optional[Dict[str, Artifacts]] = None) -> Tuple[str, float, float, Dict]:
+        """Run detection, species and quality models on a decoded image.
+
+        With ``roi``, detection runs on that region first and on the full
+        frame only if the region holds no (whole) bird. With the prefilter
+        on, frames it scores as empty skip all models. Stages found in
+        ``cached`` are not run again (``img`` may then be None, see
+        ``_stages_cover``); the stages that did run are added to the stage
+        cache.
+        """
+        # Get predictions from Mask-RCNN
+        if not self.mask_rcnn or self.mask_rcnn.model is None:
+            return "No Bird", 0, -1, no_detection()
+
+        computed: Dict[str, Artifacts] = {}
+        try:
+            return self._run_stages(img, photo_path, roi, cached or {}, computed)
+        finally:
+            self._store_stages(photo_path, computed)
+
+    def _run_stages(self, img, photo_path: str, roi, cached: Dict[str, Artifacts],
+                    computed: Dict[str, Artifacts]) -> Tuple[str, float, float, Dict]:
+        detection = no_detection()
+        if self.prefilter_threshold is not None:
+            if "prefilter" in cached:
+                detection["prefilter_score"] = float(cached["prefilter"]["score"])
+            else:
+                with self.timer.stage("prefilter"):
+                    detection["prefilter_score"] = prefilter_score(img)
+                computed["prefilter"] = {"score": np.float64(detection["prefilter_score"])}
+            if detection["prefilter_score"] < self.prefilter_threshold:
+                logging.debug(f"Prefilter skipped {photo_path} (score {detection['prefilter_score']:.2f})")
+                return "No Bird", 0, -1, dict(detection, prefiltered=True)
+
+        best_mask = None
+        if "detection" in cached:
+            found = cached["detection"]
+            if not found["found"]:
+                return "No Bird", 0, -1, detection
+            best_box, best_score = found["box"], found["score"][()]
+        else:
+            masks = None
+            with self.timer.stage("detection"):
+                if roi is not None:
+                    masks, pred_boxes, pred_class, pred_score = self.mask_rcnn.get_prediction_in_roi(img, roi)
+                    with self._state_lock:
+                        self.burst_stats["roi" if masks is not None else "full_frame"] += 1
+                if masks is None:
+                    masks, pred_boxes, pred_class, pred_score = self.mask_rcnn.get_prediction(img)
             
             if masks is None or pred_boxes is None or pred_class is None or pred_score is None:
                 logging.debug(f"No valid predictions found in {photo_path}")
-                return "No Bird", 0, -1, similarity
+                computed["detection"] = {"found": np.bool_(False)}
+                return "No Bird", 0, -1, detection
             
             # Find bird predictions
             bird_indices = [i for i, c in enumerate(pred_class) if c == 'bird']
             
             if not bird_indices:
                 logging.debug(f"No bird predictions found in {photo_path}")
-                return "No Bird", 0, -1, similarity
+                computed["detection"] = {"found": np.bool_(False)}
+                return "No Bird", 0, -1, detection
             
             # Get highest confidence bird
             highest_confidence_index = bird_indices[np.argmax([pred_score[i] for i in bird_indices])]
             best_mask = masks[highest_confidence_index]
             best_box = pred_boxes[highest_confidence_index]
-            
-            species = "Unknown"
-            species_confidence = 0
-            quality_score = -1
-            
-            # Species classification on bird crop
-            if self.species_classifier:
+            best_score = pred_score[highest_confidence_index]
+            computed["detection"] = {"found": np.bool_(True), "box": np.asarray(best_box, dtype=np.float32),
+                                     "score": np.float32(best_score), **pack_mask(best_mask)}
+        if self.save_masks:
+            self._save_mask(photo_path, mask_rle(computed.get("detection") or cached["detection"]))
+        if self.burst_roi:
+            with self._state_lock:
+                self._bird_boxes[photo_path] = best_box
+                # Only the frames still being processed can be a "previous frame"
+                while len(self._bird_boxes) > 4 * self.max_workers:
+                    del self._bird_boxes[next(iter(self._bird_boxes))]
+        
+        species = "Unknown"
+        species_confidence = 0
+        quality_score = -1
+        detection["detection_score"] = float(best_score)
+        detection["box"] = [(float(x), float(y)) for x, y in np.asarray(best_box, dtype=np.float64).reshape(2, 2)]
+        
+        # Species classification on bird crop
+        if self.species_classifier:
+            if "species" in cached:
+                species, species_confidence = str(cached["species"]["label"]), cached["species"]["confidence"][()]
+                top_labels, top_scores = cached["species"]["top_labels"], cached["species"]["top_scores"]
+                detection["species_top_k"] = [[str(l), float(p)] for l, p in zip(top_labels, top_scores)]
+            else:
                 try:
                     species_crop = self.mask_rcnn.get_species_crop(best_box, img)
                     if species_crop.size > 0:
-                        species, species_confidence, _, _ = self.species_classifier.classify_bird(species_crop)
+                        with self.timer.stage("species"):
+                            species, species_confidence, top_labels, top_scores = \
+                                self.species_classifier.classify_bird(species_crop)
                         logging.debug(f"Species prediction: {species} ({int(species_confidence * 100)}%)")
+                        computed["species"] = {"label": np.str_(species), "confidence": np.float32(species_confidence),
+                                               "top_labels": np.asarray(top_labels, dtype=str),
+                                               "top_scores": np.asarray(top_scores, dtype=np.float32)}
+                        detection["species_top_k"] = [[str(l), float(p)] for l, p in zip(top_labels, top_scores)]
                 except Exception as exc:
                     logging.error(f"Species prediction failed: {exc}")
-            
-            # Quality classification on square crop
-            if self.quality_classifier:
-                try:
+        
+        # Quality classification and subject sharpness on square crop
+        try:
+            if "crop" in cached:
+                quality_crop, quality_mask = cached["crop"]["crop"], cached["crop"]["mask"]
+            else:
+                if best_mask is None:
+                    best_mask = unpack_mask(cached["detection"])
+                with self.timer.stage("crop"):
                     quality_crop, quality_mask = self.mask_rcnn.get_square_crop(best_mask, img, resize=True)
-                    
-                    if quality_crop is not None and quality_mask is not None:
-                        quality_score = self.quality_classifier.classify_quality(quality_crop, quality_mask)
-                        logging.debug(f"Quality prediction: {int(quality_score * 100) if quality_score != -1 else quality_score}")
-                except Exception as exc:
-                    logging.error(f"Quality prediction failed: {exc}")
-            
-            return species, species_confidence, quality_score, similarity
+                if quality_crop is not None and quality_mask is not None:
+                    computed["crop"] = crop_artifacts(quality_crop, quality_mask)
             
-        except Exception as e:
-            logging.error(f"Error processing {photo_path}: {e}")
-            return "No Bird", 0, -1, {
-                'feature_similarity': -1,
-                'feature_confidence': -1,
-                'color_similarity': -1,
-                'color_confidence': -1,
-                'similar': False,
-                'confidence': 0
-            }
+            if quality_crop is not None and quality_mask is not None:
+                with self.timer.stage("focus"):
+                    detection["subject_sharpness"] = mask_sharpness(quality_crop, quality_mask)
+                    detection["focus_score"] = focus_score(quality_crop, quality_mask)
+                if "quality" in cached:
+                    quality_score = cached["quality"]["score"][()]
+                elif self.focus_gate is not None and is_unambiguous(detection["focus_score"], self.focus_gate):
+                    # Clearly blurred or clearly sharp: the focus score is the quality score
+                    quality_score = detection["focus_score"]
+                    detection["quality_gated"] = True
+                    logging.debug(f"Focus gate scored {photo_path} without the quality model ({quality_score:.2f})")
+                elif self.quality_classifier:
+                    with self.timer.stage("quality"):
+                        quality_score = self.quality_classifier.classify_quality(quality_crop, quality_mask)
+                    logging.debug(f"Quality prediction: {int(quality_score * 100) if quality_score != -1 else quality_score}")
+                    if quality_score != -1:
+                        computed["quality"] = {"score": np.float32(quality_score)}
+        except Exception as exc:
+            logging.error(f"Quality prediction failed: {exc}")
+        
+        return species, species_confidence, quality_score, detection
 
     def process_photo(self, photo_path: str, output_dir: Path, generate_crops: bool = True) -> Dict:
         """Process a single photo and return results (enhanced with full similarity data)."""
         start_time = time.time()
+        self.timer.begin_photo(photo_path)
+        try:
+            # Run inference
+            species, species_confidence, quality_score, similarity, detection, img = self._predict(photo_path)
+
+            # Generate outputs if requested
+            export_path = ""
+            crop_path = ""
+
+            if generate_crops and output_dir:
+                export_path, crop_path = self._generate_outputs(photo_path, output_dir, img, detection.get("box"))
+        finally:
+            stage_times = self.timer.end_photo()
         
-        # Run inference
-        species, species_confidence, quality_score, similarity = self.predict_single(photo_path)
-        
-        # Generate outputs if requested
+        processing_time = time.time() - start_time
+        result = self._build_result(
+            photo_path, species, species_confidence, quality_score, similarity,
+            self.scene_count, export_path, crop_path, processing_time, detection
+        )
+        result["stage_times"] = stage_times
+        return result
+
+    def _generate_outputs(self, photo_path: str, output_dir: Path, frame=None,
+                          box=None) -> Tuple[str, str]:
+        """Queue the export and crop JPEGs for a photo and return their paths.
+
+        Both are cut from ``frame``, the image the models analysed (the photo
+        is only read again when no frame is given), the crop around the
+        bird's ``box``. The files are written by ``self.jpeg_writer`` in the
+        background; ``process_batch`` waits for them before it returns.
+        """
         export_path = ""
         crop_path = ""
-        
-        if generate_crops and output_dir:
+        try:
+            # Create output directories
+            export_dir = output_dir / "export"
+            crop_dir = output_dir / "crop"
+            export_dir.mkdir(parents=True, exist_ok=True)
+            crop_dir.mkdir(parents=True, exist_ok=True)
+            
             try:
-                # Create output directories
-                export_dir = output_dir / "export"
-                crop_dir = output_dir / "crop"
-                export_dir.mkdir(parents=True, exist_ok=True)
-                crop_dir.mkdir(parents=True, exist_ok=True)
+                if frame is None:
+                    with self.timer.stage("decode"):
+                        frame = self._read_image(photo_path)
                 
-                # Load original image for export/crop using our RAW-capable read_image function
-                try:
-                    # Use the same read_image function that handles RAW files properly
-                    img_array = read_image(photo_path)
-                    
-                    if img_array is not None:
-                        # Convert numpy array to PIL Image
-                        original_img = Image.fromarray(img_array.astype('uint8'))
-                        if original_img.mode != 'RGB':
-                            original_img = original_img.convert('RGB')
-                        
-                        # Create export (resized version)
-                        filename_stem = Path(photo_path).stem
-                        export_filename = f"{filename_stem}_export.jpg"
-                        export_path = export_dir / export_filename
-                        
-                        # Resize maintaining aspect ratio
-                        original_img.thumbnail((1920, 1920), Image.Resampling.LANCZOS)
-                        original_img.save(export_path, "JPEG", quality=85)
-                        logging.debug(f"Created export: {export_path}")
-                        
-                        # Create crop (center crop for now - could be enhanced with detection)
-                        crop_filename = f"{filename_stem}_crop.jpg"
-                        crop_path = crop_dir / crop_filename
-                        
-                        # Simple center crop 
-                        width, height = original_img.size
-                        crop_size = min(width, height)
-                        left = (width - crop_size) // 2
-                        top = (height - crop_size) // 2
-                        right = left + crop_size
-                        bottom = top + crop_size
-                        
-                        cropped = original_img.crop((left, top, right, bottom))
-                        cropped = cropped.resize((300, 300), Image.Resampling.LANCZOS)
-                        cropped.save(crop_path, "JPEG", quality=85)
-                        logging.debug(f"Created crop: {crop_path}")
-                    else:
-                        logging.warning(f"Could not read image for crop generation: {photo_path}")
-                        
-                except Exception as exc:
-                    logging.warning(f"Failed to generate crop for {photo_path}: {exc}")
+                if frame is not None:
+                    filename_stem = Path(photo_path).stem
+                    with self.timer.stage("outputs"):
+                        export, crop = export_image(frame), crop_image(frame, box)
+                    export_path = export_dir / f"{filename_stem}_export.jpg"
+                    self.jpeg_writer.submit(export_path, export)
+                    crop_path = crop_dir / f"{filename_stem}_crop.jpg"
+                    self.jpeg_writer.submit(crop_path, crop)
+                else:
+                    logging.warning(f"Could not read image for crop generation: {photo_path}")
                     
             except Exception as exc:
-                logging.warning(f"Failed to create output directories: {exc}")
-        
-        # Calculate rating based on quality score (exact original logic)
-        rating = 0
-        if quality_score == -1:
-            rating = 0
-        elif quality_score < 0.15:
-            rating = 1
-        elif quality_score < 0.3:
-            rating = 2
-        elif quality_score < 0.6:
-            rating = 3
-        elif quality_score < 0.9:
-            rating = 4
-        else:
-            rating = 5
-            
-        processing_time = time.time() - start_time
+                logging.warning(f"Failed to generate crop for {photo_path}: {exc}")
+                
+        except Exception as exc:
+            logging.warning(f"Failed to create output directories: {exc}")
+        return str(export_path) if export_path else "", str(crop_path) if crop_path else ""
+
+    def _build_result(self, photo_path: str, species: str, species_confidence: float,
+                      quality_score: float, similarity: Dict, scene_count: int,
+                      export_path: str, crop_path: str, processing_time: float,
+                      detection: Optional[Dict] = None) -> Dict:
+        """Convert raw model outputs into the result record written for the plugin."""
+        detection = detection or no_detection()
+        # Species, percentages and rating come from the raw outputs, so --rescore can derive them again
+        raw = raw_scores(species, species_confidence, quality_score, detection)
+        derived = derive([raw], self.rating_thresholds, self.min_detection)[0]
+        rating = derived["rating"]
         
         # Convert values to match original format with proper percentage conversion
-        converted_species_confidence = int(float(species_confidence) * 100) if species_confidence != 0 else 0
-        converted_quality = int(quality_score * 100) if quality_score != -1 else -1
         converted_feature_similarity = int(similarity.get('feature_similarity', 0) * 100) if similarity.get('feature_similarity', 0) > 0 else int(similarity.get('feature_similarity', 0))
         converted_feature_confidence = int(similarity.get('feature_confidence', 0) * 100) if similarity.get('feature_confidence', 0) > 0 else int(similarity.get('feature_confidence', 0))
         converted_color_similarity = int(similarity.get('color_similarity', 0))
@@ -813,22 +1662,35 @@ class EnhancedModelRunner:
         
         result = {
             "filename": Path(photo_path).name,
-            "species": species,
-            "species_confidence": converted_species_confidence,
-            "quality": converted_quality,
-            "export_path": str(export_path) if export_path else "",
-            "crop_path": str(crop_path) if crop_path else "",
+            "species": derived["species"],
+            "species_confidence": derived["species_confidence"],
+            "quality": derived["quality"],
+            "export_path": export_path,
+            "crop_path": crop_path,
             "rating": rating,
-            "scene_count": self.scene_count,
+            "scene_count": scene_count,
+            "cluster_id": scene_count,
             "feature_similarity": converted_feature_similarity,
             "feature_confidence": converted_feature_confidence,
             "color_similarity": converted_color_similarity,
             "color_confidence": converted_color_confidence,
-            "processing_time": processing_time
+            "detection_score": int(detection["detection_score"] * 100),
+            "subject_sharpness": round(detection["subject_sharpness"], 1),
+            "processing_time": processing_time,
+            "profile": self.profile.name,
+            "raw": raw,
         }
+        if "prefilter_score" in detection:
+            result["prefilter_score"] = round(detection["prefilter_score"], 3)
+            if detection.get("prefiltered"):
+                result["prefiltered"] = True
+        if "focus_score" in detection:
+            result["focus_score"] = round(detection["focus_score"], 3)
+            if detection.get("quality_gated"):
+                result["quality_gated"] = True
         
         # Enhanced logging to show both raw and converted values for debugging
-        logging.info(f"Processed {Path(photo_path).name}: Species: {species}, Confidence: {result['species_confidence']}, Quality: {result['quality']}, Rating: {rating}, Similarity: {similarity.get('similar', False)}, Scene Count: {self.scene_count}")
+        logging.info(f"Processed {Path(photo_path).name}: Species: {result['species']}, Confidence: {result['species_confidence']}, Quality: {result['quality']}, Rating: {rating}, Similarity: {similarity.get('similar', False)}, Scene Count: {scene_count}")
         
         # Always show detailed results for debugging/regression testing
         logging.info(f"Raw Values - Species Conf: {species_confidence:.6f}, Quality: {quality_score:.6f}")
@@ -840,15 +1702,24 @@ class EnhancedModelRunner:
 
     def process_batch(self, photo_paths: List[str], output_dir: Path,
                      generate_crops: bool = True, progress_callback: Optional[callable] = None) -> List[Dict]:
-        """Process multiple photos using a thread pool.
+        """Process multiple photos using a thread or process pool.
 
-        Scene counting and previous-image comparisons are protected by a lock to
-        keep state consistent. For deterministic scene counting, run with
-        ``max_workers=1``.
+        In thread mode scene counting and previous-image comparisons are
+        protected by a lock to keep state consistent; for deterministic scene
+        counting, run with ``max_workers=1``. In process mode scene detection
+        runs in this process in photo order, so scene counts are deterministic
+        for any worker count.
         """
         results: List[Optional[Dict]] = [None] * len(photo_paths)
         results_file = output_dir / "results.json"
+        generate_crops = generate_crops and self.profile.generate_crops
         status_file = output_dir / "status.json"
+        self._get_scene_index()
+        self._batch_frames.clear()
+        self.timer.reset()
+        self.memory.reset()
+        if self.governor is not None:
+            self.governor.start()
 
         status = {
             "status": "processing",
@@ -856,47 +1727,111 @@ class EnhancedModelRunner:
             "total_photos": len(photo_paths),
             "processed": 0,
             "current_photo": "",
-            "progress_percent": 0
+            "progress_percent": 0,
+            "execution_mode": self.execution_mode
         }
         self._safe_write_json(status_file, status)
 
         processed = 0
 
-        def worker(idx: int, path: str):
-            try:
-                return idx, self.process_photo(path, output_dir, generate_crops)
-            except Exception as exc:
-                logging.error(f"Failed to process {path}: {exc}")
-                return idx, {
-                    "filename": Path(path).name,
-                    "species": "Unknown",
-                    "species_confidence": 0,
-                    "quality": 0,
-                    "error": str(exc)
+        def report(photo_path: str):
+            # Write incremental results and status
+            self._safe_write_json(results_file, [r for r in results if r])
+            status.update({
+                "processed": processed,
+                "current_photo": Path(photo_path).name,
+                "progress_percent": (processed / len(photo_paths)) * 100
+            })
+            self._safe_write_json(status_file, status)
+
+            if progress_callback:
+                progress_callback(processed, len(photo_paths), Path(photo_path).name)
+
+        def record(idx: int, result: Dict):
+            nonlocal processed
+            results[idx] = result
+            processed += 1
+            if self.result_cache is not None and _is_cacheable(result):
+                # Timings describe this run only
+                self.result_cache.put(photo_paths[idx], {k: v for k, v in result.items() if k != "stage_times"})
+            report(photo_paths[idx])
+
+        # Photos analysed before (or imported from Project Kestrel) skip inference.
+        # Hits are reported together so a fully cached batch writes its results once.
+        pending = list(range(len(photo_paths)))
+        if self.result_cache is not None:
+            pending = []
+            last_hit = None
+            for idx, path in enumerate(photo_paths):
+                cached = self.result_cache.get(path)
+                # Triage results are analysed again by a full run, and focus-gated ones without the gate
+                if cached is not None and satisfies(cached, self.profile) and _gate_allows(cached, self.focus_gate):
+                    results[idx] = cached
+                    last_hit = path
+                else:
+                    pending.append(idx)
+            if last_hit is not None:
+                hits = [results[i] for i in range(len(photo_paths)) if results[i]]
+                rescore(hits, self.rating_thresholds, self.min_detection, rank=False)
+                processed = len(hits)
+                report(last_hit)
+            logging.info(f"Result cache: {len(photo_paths) - len(pending)} hits, {len(pending)} to analyse")
+
+        if self.execution_mode == "process" and pending:
+            self._process_batch_in_processes(
+                [photo_paths[i] for i in pending], output_dir, generate_crops,
+                lambda j, result: record(pending[j], result),
+            )
+        elif pending:
+            # Warm the EXIF cache with parallel header reads before the frames are decoded
+            read_exif_batch([photo_paths[i] for i in pending], max_workers=max(self.max_workers, 4))
+
+            def worker(idx: int, path: str):
+                # Waits here while the photos in flight fill the memory budget
+                if self.governor is not None:
+                    self.governor.admit()
+                try:
+                    return idx, self.process_photo(path, output_dir, generate_crops)
+                except Exception as exc:
+                    logging.error(f"Failed to process {path}: {exc}")
+                    return idx, _error_result(path, exc)
+                finally:
+                    if self.governor is not None:
+                        self.governor.release()
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                future_to_index = {
+                    executor.submit(worker, idx, photo_paths[idx]): idx
+                    for idx in pending
                 }
-
-        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
-            future_to_index = {
-                executor.submit(worker, idx, path): idx
-                for idx, path in enumerate(photo_paths)
-            }
-            for future in as_completed(future_to_index):
-                idx, result = future.result()
-                results[idx] = result
-                processed += 1
-
-                # Write incremental results and status
-                self._safe_write_json(results_file, [r for r in results if r])
-                photo_path = photo_paths[idx]
-                status.update({
-                    "processed": processed,
-                    "current_photo": Path(photo_path).name,
-                    "progress_percent": (processed / len(photo_paths)) * 100
-                })
-                self._safe_write_json(status_file, status)
-
-                if progress_callback:
-                    progress_callback(processed, len(photo_paths), Path(photo_path).name)
+                for future in as_completed(future_to_index):
+                    idx, result = future.result()
+                    record(idx, result)
+
+        if self.burst_roi:
+            logging.info(f"Burst ROI: {self.burst_stats['roi']} detections in the previous bird's region, "
+                         f"{self.burst_stats['full_frame']} fell back to the full frame")
+        if self.prefilter_threshold is not None and pending:
+            skipped = sum(1 for i in pending if results[i] and results[i].get("prefiltered"))
+            logging.info(f"Prefilter: {skipped} of {len(pending)} analysed photos skipped as empty "
+                         f"({skipped / len(pending) * 100:.1f}%)")
+        if self.focus_gate is not None and pending:
+            gated = sum(1 for i in pending if results[i] and results[i].get("quality_gated"))
+            logging.info(f"Focus gate: {gated} of {len(pending)} analysed photos scored without the quality model "
+                         f"({gated / len(pending) * 100:.1f}%)")
+        self.jpeg_writer.wait()
+        self.stage_summary = self.timer.summary()
+        if self.stage_summary:
+            logging.info("Stage timings:\n  " + "\n  ".join(summary_lines(self.stage_summary)))
+        self.memory_summary = self.memory.summary()
+        if self.governor is not None:
+            self.memory_summary["governor"] = self.governor.summary()
+        if self.memory.available:
+            logging.info("Memory:\n  " + "\n  ".join(memory_lines(self.memory_summary)))
+        self._assign_clusters(photo_paths, results)
+        ranking = rank_scenes([r for r in results if r])
+        self._safe_write_json(output_dir / "scene_ranking.json", {"scenes": ranking})
+        self._safe_write_json(results_file, [r for r in results if r])
 
         # Final completion status
         status.update({
@@ -904,15 +1839,188 @@ class EnhancedModelRunner:
             "end_time": time.strftime("%Y-%m-%d %H:%M:%S"),
             "processed": len(photo_paths),
             "current_photo": "",
-            "progress_percent": 100
+            "progress_percent": 100,
+            "stage_times": self.stage_summary,
+            "memory": self.memory_summary,
         })
         self._safe_write_json(status_file, status)
 
-        # Save the final scene count for persistence across runs
-        self._save_global_scene_count()
 
         return [r for r in results if r]
 
+    def _get_process_pool(self) -> ProcessPoolExecutor:
+        """Start (once) the pool of worker processes used in process mode."""
+        if self._process_pool is None:
+            if self.use_gpu and self.max_workers > 1:
+                logging.warning(f"GPU enabled in process mode: {self.max_workers} model replicas will share the GPU")
+            logging.info(
+                f"Starting {self.max_workers} worker process(es) with "
+                f"{self.thread_budget.per_worker} intra-op thread(s) each"
+            )
+            # Spawned workers inherit the environment, so OpenMP/BLAS pools are
+            # sized correctly from the moment torch and TensorFlow are imported.
+            # Values set explicitly by the user are left alone.
+            for name, value in self.thread_budget.child_environment().items():
+                os.environ.setdefault(name, value)
+            self._process_pool = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_process_worker,
+                initargs=(self.use_gpu, self.thread_budget, logging.getLogger().level, self.prefilter_threshold,
+                          self.stage_cache.path if self.stage_cache is not None else None, self.save_masks,
+                          (str(self.proxy_cache.path), self.proxy_cache.edge, self.proxy_cache.max_bytes)
+                          if self.proxy_cache is not None else None, self.focus_gate, self.profile.name,
+                          self.timer.trace),
+            )
+        return self._process_pool
+
+    def _process_tree_rss(self) -> Optional[int]:
+        """Resident bytes of this process and its worker processes."""
+        pids = [os.getpid()]
+        if self._process_pool is not None:
+            pids.extend(getattr(self._process_pool, "_processes", None) or {})
+        return process_rss(pids)
+
+    def worker_model_status(self) -> Dict[str, bool]:
+        """Report which models loaded in the worker processes (process mode)."""
+        return self._get_process_pool().submit(_process_worker_status).result()
+
+    def close(self):
+        """Shut down worker processes started in process mode, close the mask containers and finish the JPEGs."""
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=True)
+            self._process_pool = None
+        for store in self._mask_stores.values():
+            if store is not None:
+                store.close()
+        self._mask_stores.clear()
+        self.jpeg_writer.wait()
+
+    def _process_batch_in_processes(self, photo_paths: List[str], output_dir: Path,
+                                    generate_crops: bool, record: callable):
+        """Run decode and inference in worker processes, scene detection here.
+
+        Workers write the similarity frame of each photo into a shared memory
+        slot owned by this process; only small result dicts are pickled. At
+        most ``2 * max_workers`` photos are in flight (fewer when they would
+        not fit in the memory budget), and results are recorded in photo order
+        so the scene counter advances exactly as in a single-threaded run.
+        """
+        executor = self._get_process_pool()
+        window = max(2, self.max_workers * 2)
+        slot_size = SIMILARITY_MAX_DIM * SIMILARITY_MAX_DIM * 3
+        # One extra slot keeps the previous frame alive for the next comparison
+        slots = [shared_memory.SharedMemory(create=True, size=slot_size) for _ in range(window + 1)]
+        free_slots = list(range(len(slots)))
+        pending = {}
+        ready = {}
+        next_submit = 0
+        next_record = 0
+        previous = None  # (signature, slot)
+
+        try:
+            while next_record < len(photo_paths):
+                while (next_submit < len(photo_paths) and free_slots
+                       and next_submit - next_record < window):
+                    token = None
+                    if self.governor is not None:
+                        token = self.governor.admit(block=False)
+                        if token is None:
+                            break
+                    slot = free_slots.pop()
+                    future = executor.submit(
+                        _process_worker_analyze, photo_paths[next_submit],
+                        slots[slot].name, slot_size, output_dir, generate_crops
+                    )
+                    pending[future] = (next_submit, slot, token)
+                    next_submit += 1
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    idx, slot, token = pending.pop(future)
+                    try:
+                        payload = future.result()
+                    except Exception as exc:
+                        logging.error(f"Worker failed on {photo_paths[idx]}: {exc}")
+                        payload = {"error": str(exc)}
+                    if self.governor is not None:
+                        if "image_shape" in payload:
+                            self.governor.allocated(payload["image_shape"], token)
+                        self.governor.release(token)
+                    self.memory.sample()
+                    self.memory.merge(payload.get("memory", {}))
+                    ready[idx] = (payload, slot)
+
+                while next_record in ready:
+                    payload, slot = ready.pop(next_record)
+                    path = photo_paths[next_record]
+                    start_time = time.time()
+
+                    if "error" in payload:
+                        result = _error_result(path, payload["error"])
+                        free_slots.append(slot)
+                    elif payload.get("read_failed"):
+                        result = self._build_result(
+                            path, "Failed to Read", 0, -1, no_similarity(), self.scene_count,
+                            "", "", payload["processing_time"]
+                        )
+                        free_slots.append(slot)
+                    else:
+                        self.timer.begin_photo(path)
+                        scene_start = time.perf_counter()
+                        if "scene" in payload:
+                            # Every stage was cached; the worker did not decode the photo
+                            signature = scene_signature(payload["scene"], payload.get("capture_time"))
+                        else:
+                            frame = payload.get("frame")
+                            if frame is None:
+                                frame = np.ndarray(payload["frame_shape"], dtype=payload["frame_dtype"],
+                                                   buffer=slots[slot].buf)
+                            signature = self.scene_detector.signature(
+                                frame, payload["image_shape"], payload.get("capture_time")
+                            )
+                        similarity = self.scene_detector.compare(
+                            previous[0] if previous is not None else None, signature
+                        )
+                        self._assign_scene(path, signature, similarity['similar'])
+                        self.previous_signature = signature
+                        if "scene" not in payload and self.stage_cache is not None:
+                            self._store_stages(path, {"scene": scene_artifacts(signature)})
+                        self.timer.add("scene", scene_start, time.perf_counter())
+                        stage_times = dict(payload.get("stage_times", {}), **self.timer.end_photo())
+                        self.timer.merge(payload.get("stage_times", {}), *payload.get("trace", ((), {})))
+                        if payload.get("model_failed"):
+                            similarity = no_similarity()
+
+                        if previous is not None:
+                            free_slots.append(previous[1])
+                        previous = (signature, slot)
+
+                        result = self._build_result(
+                            path, payload["species"], payload["species_confidence"],
+                            payload["quality_score"], similarity, self.scene_count,
+                            payload["export_path"], payload["crop_path"],
+                            payload["processing_time"] + (time.time() - start_time),
+                            payload.get("detection")
+                        )
+                        result["stage_times"] = stage_times
+                    record(next_record, result)
+                    next_record += 1
+        finally:
+            previous = signature = None
+            frame = None
+            # The last frame lives in a slot released below; the next batch or
+            # process_photo call still compares against it
+            last = self.previous_signature
+            if last is not None and last.frame is not None:
+                last.frame = last.frame.copy()
+            for shm in slots:
+                try:
+                    shm.close()
+                    shm.unlink()
+                except Exception as exc:
+                    logging.debug(f"Failed to release shared memory {shm.name}: {exc}")
+
     def load_expected_results_from_csv(self, csv_path: str) -> Dict[str, Dict]:
         """Load expected results from CSV for regression testing."""
         expected_results = {}
@@ -1019,9 +2127,16 @@ class EnhancedModelRunner:
         def progress_callback(current, total, filename):
             logging.info(f"Regression test progress: {current}/{total} - {filename}")
             
+        self.scene_detector.tier_counts.clear()
         start_time = time.time()
-        actual_results = self.process_batch(photo_paths, output_dir, generate_crops=False, progress_callback=progress_callback)
+        # The quality model scores every photo, so the report can show what the focus gate would skip
+        focus_gate, self.focus_gate = self.focus_gate, None
+        try:
+            actual_results = self.process_batch(photo_paths, output_dir, generate_crops=False, progress_callback=progress_callback)
+        finally:
+            self.focus_gate = focus_gate
         processing_time = time.time() - start_time
+        scene_matches, scene_pairs = scene_boundary_agreement(actual_results, expected_results)
         
         # Compare results
         comparisons = []
@@ -1076,11 +2191,30 @@ class EnhancedModelRunner:
             "avg_confidence_diff": avg_confidence_diff,
             "avg_quality_diff": avg_quality_diff,
             "processing_time": processing_time,
+            "scene_detector": self.scene_detector.name,
+            "scene_agreement": (scene_matches / scene_pairs * 100) if scene_pairs > 0 else 0,
+            "scene_pairs": scene_pairs,
+            "scene_tiers": self.scene_detector.tier_fractions(),
             "comparisons": comparisons,
             "actual_results": actual_results,
             "expected_results": expected_results
         }
         
+        if self.prefilter_threshold is not None:
+            # Photos the expected results list as empty are the ones the prefilter may skip
+            labelled = [(a["prefilter_score"], expected_results[a["filename"]].get("species") != "No Bird")
+                        for a in actual_results
+                        if a["filename"] in expected_results and "prefilter_score" in a]
+            report["prefilter"] = prefilter_report([score for score, _ in labelled], [bird for _, bird in labelled],
+                                                   self.prefilter_threshold, self.prefilter_recall)
+        if self.focus_gate is not None:
+            scored = [a for a in actual_results if "focus_score" in a and isinstance(a.get("raw"), dict)]
+            report["focus_gate"] = focus_gate_report([a["focus_score"] for a in scored],
+                                                     [a["raw"]["quality"] for a in scored],
+                                                     self.focus_gate, self.rating_thresholds)
+        report["stage_times"] = self.stage_summary
+        report["memory"] = self.memory_summary
+
         # Save detailed report
         report_path = output_dir / "regression_test_report.json"
         with open(report_path, 'w') as f:
@@ -1099,7 +2233,36 @@ class EnhancedModelRunner:
             f.write(f"Species Accuracy: {report['species_accuracy']:.1f}%\n")
             f.write(f"Avg Confidence Diff: {report['avg_confidence_diff']:.1f}%\n")
             f.write(f"Avg Quality Diff: {report['avg_quality_diff']:.1f}%\n")
+            f.write(f"Scene Detector: {report['scene_detector']}\n")
+            f.write(f"Scene Agreement: {report['scene_agreement']:.1f}% of {report['scene_pairs']} frame pairs\n")
+            for tier, fraction in sorted(report['scene_tiers'].items()):
+                f.write(f"  Resolved by {tier}: {fraction * 100:.1f}%\n")
+            if "prefilter" in report:
+                prefilter = report["prefilter"]
+                f.write(f"Prefilter Threshold: {prefilter['threshold']:.2f}\n")
+                f.write(f"  Skipped: {prefilter['skipped']} of {prefilter['photos']} "
+                        f"({prefilter['skip_rate'] * 100:.1f}%), "
+                        f"{prefilter['empty_skipped']} of {prefilter['empty_photos']} empty photos\n")
+                f.write(f"  False Rejects: {prefilter['false_rejects']} (recall {prefilter['recall'] * 100:.1f}%)\n")
+                if prefilter['calibrated_threshold'] is not None:
+                    f.write(f"  Threshold for {prefilter['recall_target'] * 100:.1f}% recall: "
+                            f"{prefilter['calibrated_threshold']:.2f}\n")
+            if "focus_gate" in report:
+                gate = report["focus_gate"]
+                f.write(f"Focus Gate: below {gate['gate'][0]:.2f} or from {gate['gate'][1]:.2f}\n")
+                f.write(f"  Would skip: {gate['skipped']} of {gate['photos']} ({gate['skip_rate'] * 100:.1f}%), "
+                        f"{gate['blurry']} blurry, {gate['sharp']} sharp\n")
+                f.write(f"  Rating agreement with the quality model: {gate['rating_agreement'] * 100:.1f}% "
+                        f"(mean quality difference {gate['mean_quality_difference'] * 100:.1f})\n")
             f.write(f"\nProcessing Time: {report['processing_time']:.1f}s\n")
+            if report["stage_times"]:
+                f.write("Stage Timings:\n")
+                for line in summary_lines(report["stage_times"]):
+                    f.write(f"  {line}\n")
+            if report["memory"].get("rss_peak_mb") is not None:
+                f.write("Memory:\n")
+                for line in memory_lines(report["memory"]):
+                    f.write(f"  {line}\n")
             
             # Add failed tests details
             failed_tests = [c for c in comparisons if not c['passed']]
@@ -1117,6 +2280,162 @@ class EnhancedModelRunner:
         
         return report
 
+def _error_result(photo_path: str, error) -> Dict:
+    """Result record for a photo whose processing raised."""
+    return {
+        "filename": Path(photo_path).name,
+        "species": "Unknown",
+        "species_confidence": 0,
+        "quality": 0,
+        "error": str(error)
+    }
+
+def scene_boundary_agreement(actual_results: List[Dict], expected_results: Dict[str, Dict]) -> Tuple[int, int]:
+    """Count consecutive photo pairs where actual and expected agree on a scene change.
+
+    Scene numbers themselves depend on the persisted global counter, so only
+    the boundaries between consecutive photos are compared. Returns
+    ``(matching_pairs, total_pairs)``.
+    """
+    matches = pairs = 0
+    previous = None
+    for actual in actual_results:
+        expected = expected_results.get(actual.get('filename'))
+        if expected is None:
+            previous = None
+            continue
+        if previous is not None:
+            expected_change = expected.get('scene_count') != previous[1].get('scene_count')
+            actual_change = actual.get('scene_count') != previous[0].get('scene_count')
+            pairs += 1
+            matches += expected_change == actual_change
+        previous = (actual, expected)
+    return matches, pairs
+
+def _is_cacheable(result: Dict) -> bool:
+    """Failed and prefiltered photos are retried on the next run rather than cached."""
+    return "error" not in result and result.get("species") != FAILED_TO_READ and not result.get("prefiltered")
+
+def _gate_allows(result: Dict, focus_gate: Optional[Tuple[float, float]]) -> bool:
+    """Whether a cached result may be reused: focus-gated quality only while the gate would still skip it."""
+    if not result.get("quality_gated"):
+        return True
+    return focus_gate is not None and is_unambiguous(result.get("focus_score", -1), focus_gate)
+
+# Runner owned by each worker process in process execution mode
+_WORKER_RUNNER: Optional[EnhancedModelRunner] = None
+
+def _init_process_worker(use_gpu: bool, thread_budget: ThreadBudget, log_level: int,
+                         prefilter_threshold: Optional[float] = None, stage_cache_path: Optional[str] = None,
+                         save_masks: bool = False, proxy_cache_settings: Optional[Tuple[str, int, int]] = None,
+                         focus_gate: Optional[Tuple[float, float]] = None, profile: str = DEFAULT_PROFILE,
+                         trace: bool = False):
+    """Initializer for worker processes: apply the thread budget, then load model replicas."""
+    global _WORKER_RUNNER
+    logging.basicConfig(level=log_level, format='%(asctime)s [%(levelname)s] [worker %(process)d] %(message)s')
+    stage_cache = None
+    if stage_cache_path:
+        try:
+            stage_cache = StageCache(stage_cache_path)
+        except Exception as e:
+            logging.warning(f"Stage cache unavailable in worker: {e}")
+    proxy_cache = None
+    if proxy_cache_settings:
+        try:
+            proxy_cache = ProxyCache(*proxy_cache_settings)
+        except Exception as e:
+            logging.warning(f"Proxy cache unavailable in worker: {e}")
+    _WORKER_RUNNER = EnhancedModelRunner(use_gpu=use_gpu, max_workers=1, thread_budget=thread_budget,
+                                         prefilter_threshold=prefilter_threshold, stage_cache=stage_cache,
+                                         save_masks=save_masks, proxy_cache=proxy_cache, focus_gate=focus_gate,
+                                         profile=profile, trace=trace)
+
+def _process_worker_status() -> Dict[str, bool]:
+    runner = _WORKER_RUNNER
+    return {
+        "mask_rcnn": bool(runner.mask_rcnn and runner.mask_rcnn.model is not None),
+        "species_classifier": runner.species_classifier is not None,
+        "quality_classifier": runner.quality_classifier is not None,
+    }
+
+def _share_frame(frame, slot_name: str, slot_size: int) -> Dict:
+    """Copy a similarity frame into shared memory slot ``slot_name``; frames too large travel inline."""
+    if frame.nbytes <= slot_size:
+        shm = shared_memory.SharedMemory(name=slot_name)
+        try:
+            view = np.ndarray(frame.shape, dtype=frame.dtype, buffer=shm.buf)
+            view[...] = frame
+            del view
+        finally:
+            shm.close()
+        return {"frame_shape": frame.shape, "frame_dtype": frame.dtype.str}
+    return {"frame": frame}
+
+def _process_worker_analyze(photo_path: str, slot_name: str, slot_size: int,
+                            output_dir: Path, generate_crops: bool) -> Dict:
+    """Decode and run the models on one photo inside a worker process.
+
+    The frame used for scene detection is copied into the shared memory slot
+    ``slot_name``; frames too large for the slot are returned inline instead.
+    Photos whose every stage is cached are not decoded, and their cached
+    scene artifacts are returned in place of the frame.
+    """
+    start_time = time.time()
+    runner = _WORKER_RUNNER
+    runner.timer.begin_photo(photo_path)
+    cached = runner._cached_stages(photo_path)
+    if runner._stages_cover(cached):
+        img = None
+        payload = {"scene": cached["scene"], "capture_time": read_capture_time(photo_path)}
+    else:
+        with runner.timer.stage("decode"):
+            img = runner._read_image(photo_path)
+        if img is None:
+            logging.warning(f"Failed to read image: {photo_path}")
+            runner.timer.end_photo()
+            return {"read_failed": True, "processing_time": time.time() - start_time}
+        payload = {"image_shape": img.shape, "capture_time": read_capture_time(photo_path)}
+        payload.update(_share_frame(resize_for_similarity(img), slot_name, slot_size))
+
+    try:
+        species, species_confidence, quality_score, detection = runner._run_models(img, photo_path, None, cached)
+    except Exception as exc:
+        logging.error(f"Error processing {photo_path}: {exc}")
+        species, species_confidence, quality_score, detection = "No Bird", 0, -1, no_detection()
+        payload["model_failed"] = True
+
+    export_path, crop_path = "", ""
+    if generate_crops and output_dir:
+        export_path, crop_path = runner._generate_outputs(photo_path, output_dir, img, detection.get("box"))
+        # Written before the result is handed back, as the parent cannot wait on this pool
+        runner.jpeg_writer.wait()
+
+    payload.update({
+        "species": species,
+        "species_confidence": species_confidence,
+        "quality_score": quality_score,
+        "detection": detection,
+        "export_path": export_path,
+        "crop_path": crop_path,
+        "processing_time": time.time() - start_time,
+        "stage_times": runner.timer.end_photo(),
+    })
+    if runner.timer.trace:
+        payload["trace"] = runner.timer.take_events()
+    if runner.memory.available:
+        payload["memory"] = runner.memory.summary()["stages"]
+    # Durations are summarised by the parent from each photo's stage times
+    runner.timer.reset()
+    return payload
+
+def write_trace(runner: EnhancedModelRunner, path: str):
+    """Write the runner's Chrome trace, logging rather than failing the run."""
+    try:
+        count = runner.timer.write_trace(path)
+        logging.info(f"Trace of {count} stage(s) written to {path} (open it in chrome://tracing or ui.perfetto.dev)")
+    except OSError as e:
+        logging.warning(f"Failed to write trace {path}: {e}")
+
 def capture_debug_environment():
     """Capture comprehensive environment and debugging information."""
     import tempfile
@@ -1186,12 +2505,145 @@ def main():
         default=os.cpu_count() or 1,
         help="Maximum worker threads (cannot exceed CPU threads)",
     )
+    parser.add_argument(
+        "--execution-mode",
+        choices=EXECUTION_MODES,
+        default="thread",
+        help="Run workers as threads sharing one set of models, or as processes with their own model replicas",
+    )
+    parser.add_argument(
+        "--intra-op-threads",
+        type=int,
+        default=None,
+        help="Framework threads per worker (default: CPU threads divided by --max-workers)",
+    )
+    parser.add_argument(
+        "--scene-detector",
+        choices=sorted(SCENE_DETECTORS),
+        default="akaze",
+        help="Scene-change detection: AKAZE on every frame pair, or cheap capture-time/signature checks first",
+    )
+    parser.add_argument(
+        "--cluster-window",
+        type=float,
+        default=CLUSTER_TIME_WINDOW,
+        help="Seconds within which near-duplicate frames share a cluster_id (0 disables clustering)",
+    )
+    parser.add_argument(
+        "--burst-roi",
+        action="store_true",
+        help="Within a scene, detect the bird near its position in the previous frame before trying the full frame",
+    )
+    parser.add_argument(
+        "--prefilter",
+        action="store_true",
+        help="Skip the models on frames a cheap contrast/detail check scores as empty",
+    )
+    parser.add_argument(
+        "--prefilter-threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="Prefilter score (0-1) below which a frame is treated as empty",
+    )
+    parser.add_argument(
+        "--prefilter-recall",
+        type=float,
+        default=DEFAULT_RECALL,
+        help="Share of bird photos the regression report's calibrated prefilter threshold must keep",
+    )
+    parser.add_argument(
+        "--focus-gate",
+        action="store_true",
+        help="Skip the quality model on photos whose subject is clearly blurred or clearly sharp",
+    )
+    parser.add_argument(
+        "--focus-gate-range",
+        type=float,
+        nargs=2,
+        default=list(DEFAULT_GATE),
+        metavar=("LOW", "HIGH"),
+        help="Focus scores (0-1) below LOW or from HIGH up skip the quality model",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=sorted(PROFILES),
+        default=DEFAULT_PROFILE,
+        help="triage: rough ratings from embedded previews at low resolution, no crops; full: complete analysis",
+    )
+    parser.add_argument(
+        "--trace",
+        metavar="TRACE_JSON",
+        help="Write a Chrome trace-event timeline of every worker's stages to this file",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=float,
+        metavar="GB",
+        help="Analyse only as many photos at once as fit in this much memory, models included",
+    )
+    parser.add_argument(
+        "--rating-thresholds",
+        type=float,
+        nargs=4,
+        default=list(RATING_THRESHOLDS),
+        metavar="QUALITY",
+        help="Quality scores (0-1) at which the rating rises to 2, 3, 4 and 5 stars",
+    )
+    parser.add_argument(
+        "--min-detection",
+        type=float,
+        default=DETECTION_THRESHOLD,
+        help="Detection score (0-1) below which a photo is reported as No Bird",
+    )
+    parser.add_argument(
+        "--rescore",
+        metavar="RESULTS_JSON",
+        help="Apply --rating-thresholds and --min-detection to a results.json without running the models, "
+             "write the changed results to rescored.json, then exit",
+    )
+    parser.add_argument(
+        "--save-masks",
+        action="store_true",
+        help="Keep each photo's bird mask, run-length encoded, in .wildlifeai/masks.sqlite next to the photos",
+    )
     parser.add_argument("--gpu", action="store_true", help="Enable GPU acceleration")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose logging")
     parser.add_argument("--generate-crops", action="store_true", help="Generate crop images")
     parser.add_argument("--regression-test", action="store_true", help="Run regression test mode")
     parser.add_argument("--async-mode", action="store_true", help="Run in asynchronous mode (for Lightroom plugin)")
     parser.add_argument("--debug-env", action="store_true", help="Debug environment and exit")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Analyse every photo even if a cached result exists for it")
+    parser.add_argument("--cache-path", help="Location of the result cache database")
+    parser.add_argument("--stage-cache", action="store_true",
+                        help="Keep each photo's detection, crop and species artifacts so a model update "
+                             "only re-runs the stages that depend on it")
+    parser.add_argument("--stage-cache-path", help="Location of the stage cache database")
+    parser.add_argument("--proxy-cache", action="store_true",
+                        help="Analyse memory-mapped 8-bit proxies of the photos, kept on disk so later runs "
+                             "do not decode them again")
+    parser.add_argument("--proxy-edge", type=int, default=DEFAULT_PROXY_EDGE,
+                        help="Longest side of the proxies in pixels (0 keeps the decoded size)")
+    parser.add_argument("--proxy-cache-size", type=float, default=DEFAULT_MAX_BYTES / 1024 ** 3,
+                        help="Gigabytes of proxies to keep before the least recently used are deleted")
+    parser.add_argument("--proxy-cache-path", help="Location of the proxy cache folder")
+    parser.add_argument(
+        "--import-kestrel",
+        nargs="+",
+        metavar="PATH",
+        help="Import kestrel_database.csv files (or folders containing them) as sidecars and cached results, then exit",
+    )
+    parser.add_argument(
+        "--plan-brackets",
+        metavar="METADATA",
+        help="Detect brackets and panoramas in an exported metadata table (JSON or CSV), write a stack plan, then exit",
+    )
+    parser.add_argument("--stack-plan", help="Where --plan-brackets writes the plan (default: <output-dir>/stack_plan.json)")
+    parser.add_argument(
+        "--confirm-brackets",
+        action="store_true",
+        help="With --plan-brackets, split or merge brackets by comparing the photos' embedded previews",
+    )
     
     # Capture debug info early, before argument parsing can fail
     debug_info = None
@@ -1217,6 +2669,9 @@ def main():
 
     cpu_threads = os.cpu_count() or 1
     args.max_workers = max(1, min(args.max_workers, cpu_threads))
+    prefilter_threshold = args.prefilter_threshold if args.prefilter else None
+    focus_gate = tuple(args.focus_gate_range) if args.focus_gate else None
+    memory_budget = int(args.memory_budget * GB) if args.memory_budget else None
     
     # Handle debug environment mode first
     if args.debug_env:
@@ -1309,9 +2764,101 @@ def main():
         logging.info("================================")
     
     logging.info("Enhanced WildlifeAI Runner starting")
+
+    if args.plan_brackets:
+        plan_path = Path(args.stack_plan) if args.stack_plan else Path(args.output_dir or ".") / "stack_plan.json"
+        try:
+            write_stack_plan(args.plan_brackets, plan_path, confirm=args.confirm_brackets)
+        except (OSError, ValueError) as e:
+            logging.error(f"Bracket planning failed: {e}")
+            return 1
+        logging.info(f"Stack plan written to {plan_path}")
+        return 0
+
+    try:
+        check_thresholds(args.rating_thresholds)
+    except ValueError as e:
+        logging.error(str(e))
+        return 1
+
+    if args.rescore:
+        start_time = time.time()
+        try:
+            results, changed = rescore_file(args.rescore, args.rating_thresholds, args.min_detection)
+        except (OSError, ValueError) as e:
+            logging.error(f"Rescoring failed: {e}")
+            return 1
+        rescored_path = Path(args.output_dir or Path(args.rescore).parent) / "rescored.json"
+        rescored_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(rescored_path, 'w') as f:
+            json.dump(changed, f, indent=2, default=str)
+        with open(args.rescore, 'w') as f:
+            json.dump(results, f, indent=2, default=str)
+        without_raw = sum(1 for r in results if r and "raw" not in r)
+        logging.info(
+            f"Rescored {len(results)} results in {(time.time() - start_time) * 1000:.0f} ms: "
+            f"{len(changed)} changed, written to {rescored_path}"
+            + (f" ({without_raw} without raw scores left as they were)" if without_raw else "")
+        )
+        return 0
+
+    stage_cache = None
+    if args.stage_cache and not args.no_cache:
+        stage_cache_path = Path(args.stage_cache_path) if args.stage_cache_path else default_stage_cache_path()
+        try:
+            stage_cache = StageCache(stage_cache_path)
+            logging.info(f"Stage cache: {stage_cache_path}")
+        except Exception as e:
+            logging.warning(f"Stage cache unavailable, every stage will run: {e}")
+
+    proxy_cache = None
+    if args.proxy_cache and not args.no_cache:
+        proxy_cache_path = Path(args.proxy_cache_path) if args.proxy_cache_path else default_proxy_cache_dir()
+        try:
+            proxy_cache = ProxyCache(proxy_cache_path, args.proxy_edge, int(args.proxy_cache_size * 1024 ** 3))
+            logging.info(f"Proxy cache: {proxy_cache_path} ({len(proxy_cache)} proxies)")
+        except Exception as e:
+            logging.warning(f"Proxy cache unavailable, photos will be decoded: {e}")
+
+    result_cache = None
+    if not args.no_cache:
+        cache_path = Path(args.cache_path) if args.cache_path else default_cache_path()
+        # Settings that change what a fresh analysis returns; process workers detect on full frames
+        settings = {
+            "proxy_edge": proxy_cache.edge if proxy_cache is not None else None,
+            "burst_roi": args.burst_roi and args.execution_mode != "process",
+        }
+        try:
+            model_dir = find_model_directory()
+            # Imported results are stored without settings, so any later run accepts them
+            imported = model_fingerprint(model_dir)
+            fingerprint = imported if args.import_kestrel else model_fingerprint(model_dir, settings)
+            result_cache = ResultCache(cache_path, fingerprint, imported_fingerprint=imported)
+            logging.info(f"Result cache: {cache_path}")
+        except Exception as e:
+            logging.warning(f"Result cache unavailable, all photos will be analysed: {e}")
+
+    if args.import_kestrel:
+        start_time = time.time()
+        try:
+            scene_index = SceneIndex(default_index_path(), seed=legacy_scene_count())
+        except Exception as e:
+            logging.warning(f"Scene index unavailable, imported scene numbers are kept per database: {e}")
+            scene_index = None
+        try:
+            summary = import_kestrel_databases(args.import_kestrel, result_cache, scene_index=scene_index)
+        finally:
+            if scene_index is not None:
+                scene_index.close()
+        logging.info(
+            f"Imported {summary['imported']} results from {summary['databases']} Kestrel database(s) "
+            f"in {time.time() - start_time:.1f}s ({summary['skipped']} rows without a photo skipped)"
+        )
+        return 0 if summary["databases"] else 1
+
     logging.info(f"GPU enabled: {args.gpu}")
     logging.info(
-        f"Worker threads: {args.max_workers} (CPU threads available: {cpu_threads})"
+        f"Worker {args.execution_mode}s: {args.max_workers} (CPU threads available: {cpu_threads})"
     )
     
     # Process photo paths first (needed for both sync and async modes)
@@ -1396,7 +2943,24 @@ def main():
                 logging.info("Background processing started - loading models")
                 
                 # Initialize runner in background
-                runner = EnhancedModelRunner(use_gpu=args.gpu, max_workers=args.max_workers)
+                runner = EnhancedModelRunner(use_gpu=args.gpu, max_workers=args.max_workers,
+                                             execution_mode=args.execution_mode,
+                                             intra_op_threads=args.intra_op_threads,
+                                             result_cache=result_cache,
+                                             scene_detector=args.scene_detector,
+                                             cluster_window=args.cluster_window,
+                                             burst_roi=args.burst_roi,
+                                             prefilter_threshold=prefilter_threshold,
+                                             prefilter_recall=args.prefilter_recall,
+                                             stage_cache=stage_cache,
+                                             rating_thresholds=args.rating_thresholds,
+                                             min_detection=args.min_detection,
+                                             save_masks=args.save_masks,
+                                             proxy_cache=proxy_cache,
+                                             focus_gate=focus_gate,
+                                             profile=args.profile,
+                                             trace=bool(args.trace),
+                                             memory_budget=memory_budget)
                 
                 # Update status to processing
                 status["status"] = "processing"
@@ -1415,6 +2979,9 @@ def main():
                 start_time = time.time()
                 results = runner.process_batch(photo_paths, output_dir, args.generate_crops, progress_callback)
                 processing_time = time.time() - start_time
+                runner.close()
+                if args.trace:
+                    write_trace(runner, args.trace)
                 
                 # Update final status
                 status["status"] = "completed"
@@ -1454,18 +3021,45 @@ def main():
         return 0
     
     # Initialize runner for synchronous mode
-    runner = EnhancedModelRunner(use_gpu=args.gpu, max_workers=args.max_workers)
+    runner = EnhancedModelRunner(use_gpu=args.gpu, max_workers=args.max_workers,
+                                 execution_mode=args.execution_mode,
+                                 intra_op_threads=args.intra_op_threads,
+                                 result_cache=result_cache,
+                                 scene_detector=args.scene_detector,
+                                 cluster_window=args.cluster_window,
+                                 burst_roi=args.burst_roi,
+                                 prefilter_threshold=prefilter_threshold,
+                                 prefilter_recall=args.prefilter_recall,
+                                 stage_cache=stage_cache,
+                                 rating_thresholds=args.rating_thresholds,
+                                 min_detection=args.min_detection,
+                                 save_masks=args.save_masks,
+                                 proxy_cache=proxy_cache,
+                                 focus_gate=focus_gate,
+                                 profile=args.profile,
+                                 trace=bool(args.trace),
+                                 memory_budget=memory_budget)
+    
+    if args.execution_mode == "process":
+        model_status = runner.worker_model_status()
+    else:
+        model_status = {
+            "mask_rcnn": bool(runner.mask_rcnn and runner.mask_rcnn.model is not None),
+            "species_classifier": runner.species_classifier is not None,
+            "quality_classifier": runner.quality_classifier is not None,
+        }
     
     # Check if we have working models
-    if not runner.species_classifier and not runner.quality_classifier:
+    if not model_status["species_classifier"] and not model_status["quality_classifier"]:
         logging.error("No models loaded successfully. Check model files and dependencies.")
+        runner.close()
         return 1
     
     # Check for critical missing components
     critical_missing = []
-    if not runner.mask_rcnn or runner.mask_rcnn.model is None:
+    if not model_status["mask_rcnn"]:
         critical_missing.append("Mask R-CNN (PyTorch/torchvision)")
-    if not runner.quality_classifier:
+    if not model_status["quality_classifier"]:
         critical_missing.append("Quality Classifier (TensorFlow)")
     
     if critical_missing:
@@ -1481,7 +3075,14 @@ def main():
         output_dir = Path(args.output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
+        # Cached results would hide regressions in the models
+        runner.result_cache = None
+        runner.stage_cache = None
+        runner.proxy_cache = None
         report = runner.run_regression_test(args.photo_list, output_dir)
+        runner.close()
+        if args.trace:
+            write_trace(runner, args.trace)
         
         if "error" in report:
             logging.error(f"Regression test failed: {report['error']}")
@@ -1499,6 +3100,9 @@ def main():
     start_time = time.time()
     results = runner.process_batch(photo_paths, output_dir, args.generate_crops, progress_callback)
     processing_time = time.time() - start_time
+    runner.close()
+    if args.trace:
+        write_trace(runner, args.trace)
     
     logging.info(f"Processing complete: {len(results)} photos in {processing_time:.1f}s")
     
@@ -1512,4 +3116,6 @@ def main():
     return 0
 
 if __name__ == "__main__":
+    # Required for process execution mode in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     sys.exit(main())
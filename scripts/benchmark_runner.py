@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark for the enhanced WildlifeAI runner.
+
+Runs the same photos through ``EnhancedModelRunner.process_batch`` for every
+combination of execution mode, worker count, intra-op thread count and burst
+ROI setting and prints photos/sec, so thread layouts can be compared on the machine that will
+run them. Each combination runs in a fresh interpreter because framework
+thread pools can only be sized once per process.
+
+    python scripts/benchmark_runner.py tests/quick/original/*.ARW \\
+        --modes thread process --max-workers 1 4 8 --intra-op-threads auto 1 2
+
+``--burst-roi off on`` also reports how often burst ROI detection agrees with
+full-frame detection on species, and the mean quality score difference.
+"""
+import argparse
+import itertools
+import json
+import logging
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python" / "runner"))
+
+from wildlifeai_runner import EnhancedModelRunner, EXECUTION_MODES  # noqa: E402
+
+
+def run_layout(mode, photo_paths, max_workers, intra_op_threads, use_gpu, generate_crops, burst_roi=False):
+    """Benchmark one layout in this process and return its timings."""
+    start = time.perf_counter()
+    runner = EnhancedModelRunner(use_gpu=use_gpu, max_workers=max_workers, execution_mode=mode,
+                                 intra_op_threads=intra_op_threads, burst_roi=burst_roi)
+    if mode == "process":
+        # Force the worker processes to load their models before timing the batch
+        runner.worker_model_status()
+    startup_time = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        start = time.perf_counter()
+        results = runner.process_batch(photo_paths, Path(tmpdir), generate_crops=generate_crops)
+        batch_time = time.perf_counter() - start
+    runner.close()
+
+    return {
+        "mode": mode,
+        "max_workers": max_workers,
+        "burst_roi": runner.burst_roi,
+        "burst_stats": dict(runner.burst_stats),
+        "layout": runner.thread_budget.layout(),
+        "photos": len(results),
+        "startup_time": startup_time,
+        "batch_time": batch_time,
+        "photos_per_sec": len(results) / batch_time if batch_time > 0 else 0,
+        "scene_counts": [r.get("scene_count") for r in results],
+        "species": [r.get("species") for r in results],
+        "quality": [r.get("quality") for r in results],
+    }
+
+
+def parity(result, reference):
+    """Species agreement and mean absolute quality difference of ``result`` against ``reference``."""
+    pairs = list(zip(result["species"], reference["species"]))
+    agreement = sum(a == b for a, b in pairs) / len(pairs) if pairs else 1.0
+    diffs = [abs(a - b) for a, b in zip(result["quality"], reference["quality"])
+             if isinstance(a, (int, float)) and isinstance(b, (int, float))]
+    return agreement, sum(diffs) / len(diffs) if diffs else 0.0
+
+
+def run_layout_in_subprocess(mode, photo_paths, max_workers, intra_op_threads, use_gpu, generate_crops,
+                             burst_roi=False):
+    cmd = [sys.executable, __file__, *photo_paths, "--child", "--modes", mode, "--max-workers", str(max_workers),
+           "--intra-op-threads", str(intra_op_threads or "auto"), "--burst-roi", "on" if burst_roi else "off"]
+    if use_gpu:
+        cmd.append("--gpu")
+    if generate_crops:
+        cmd.append("--generate-crops")
+    proc = subprocess.run(cmd, capture_output=True, text=True)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark of {mode}/{max_workers}/{intra_op_threads} failed: {proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def parse_threads(value):
+    return None if value == "auto" else int(value)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark WildlifeAI runner execution modes and thread layouts")
+    parser.add_argument("photos", nargs="+", help="Photo paths to process")
+    parser.add_argument("--modes", nargs="+", choices=EXECUTION_MODES, default=list(EXECUTION_MODES))
+    parser.add_argument("--max-workers", nargs="+", type=int, default=[4])
+    parser.add_argument("--intra-op-threads", nargs="+", type=parse_threads, default=[None],
+                        help="Framework threads per worker, or 'auto' for the thread budget default")
+    parser.add_argument("--burst-roi", nargs="+", choices=["off", "on"], default=["off"],
+                        help="Benchmark with burst ROI detection off, on, or both")
+    parser.add_argument("--gpu", action="store_true")
+    parser.add_argument("--generate-crops", action="store_true")
+    parser.add_argument("--output", help="Write the benchmark results as JSON to this path")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.child:
+        result = run_layout(args.modes[0], args.photos, args.max_workers[0], args.intra_op_threads[0],
+                            args.gpu, args.generate_crops, args.burst_roi[0] == "on")
+        print(json.dumps(result))
+        return 0
+
+    report = []
+    full_frame = {}
+    for mode, workers, threads, burst in itertools.product(args.modes, args.max_workers, args.intra_op_threads,
+                                                          args.burst_roi):
+        result = run_layout_in_subprocess(mode, args.photos, workers, threads, args.gpu, args.generate_crops,
+                                          burst == "on")
+        report.append(result)
+        layout = result["layout"]
+        print(
+            f"{mode:>8} workers={workers:<3} torch={layout['torch_intra_op']:<3} "
+            f"tf={layout['tensorflow_intra_op']:<3} ort={layout['onnxruntime_intra_op']:<3} burst={burst:<3}: "
+            f"{result['photos']} photos in {result['batch_time']:.2f}s "
+            f"({result['photos_per_sec']:.2f} photos/sec, startup {result['startup_time']:.2f}s)"
+        )
+        if not result["burst_roi"]:
+            full_frame[(mode, workers, threads)] = result
+        elif (mode, workers, threads) in full_frame:
+            agreement, quality_diff = parity(result, full_frame[(mode, workers, threads)])
+            stats = result["burst_stats"]
+            print(f"{'':>8} burst ROI hits={stats['roi']} fallbacks={stats['full_frame']}: "
+                  f"species agree on {agreement:.1%} of photos, mean quality difference {quality_diff:.2f}")
+
+    if len(report) > 1:
+        best = max(report, key=lambda r: r["photos_per_sec"])
+        print(f"Fastest: {best['mode']} with {best['max_workers']} workers, "
+              f"{best['layout']['torch_intra_op']} intra-op thread(s) per worker")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
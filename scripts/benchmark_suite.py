@@ -0,0 +1,418 @@
+#!/usr/bin/env python3
+"""
+Offline performance benchmark of the WildlifeAI runner, with a regression check.
+
+``run`` writes synthetic shoots (JPEG and DNG files of several sizes, with
+a textured bird on a sky gradient) and times ``EnhancedModelRunner`` on
+them at several worker counts. Each combination runs in a fresh interpreter
+and reports photos/sec, startup time, peak RSS and the percentiles of every
+stage the runner times. The models are the real ones when PyTorch, ONNX
+Runtime, TensorFlow and the model files are available (``--backend auto``);
+otherwise fast deterministic stand-ins run, so decoding, scene detection,
+cropping and JPEG output can still be tracked on any machine.
+
+    python scripts/benchmark_suite.py run --output bench.json --max-workers 1 4
+    python scripts/benchmark_suite.py compare baseline.json bench.json
+
+``compare`` (or ``run --baseline``) flags every throughput, startup, memory
+and stage latency figure that got worse by more than ``--tolerance`` and
+exits with status 1 when any did. ``scripts/benchmark_runner.py`` compares
+execution modes and thread layouts on your own photos.
+"""
+import argparse
+import importlib.util
+import itertools
+import json
+import logging
+import os
+import platform
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "python" / "runner"))
+
+from scene_index import SceneIndex  # noqa: E402
+from wildlifeai_runner import EnhancedModelRunner, MaskRCNN, find_model_directory  # noqa: E402
+
+# Bump when the report layout changes
+REPORT_VERSION = 1
+FORMATS = ("jpeg", "dng")
+DEFAULT_MEGAPIXELS = (6, 24)
+DEFAULT_PHOTOS = 8
+DEFAULT_TOLERANCE = 0.10
+# Stage latencies closer than this (ms) are noise, not regressions
+MIN_STAGE_DELTA_MS = 1.0
+SHOOT_START = datetime(2024, 5, 1, 7, 30, 0)
+
+# TIFF field types
+BYTE, ASCII, SHORT, LONG, RATIONAL, SRATIONAL = 1, 2, 3, 4, 5, 10
+
+
+# --- Synthetic shoots ------------------------------------------------------
+
+def synthetic_frame(megapixels: float, index: int, seed: int = 0) -> np.ndarray:
+    """8-bit RGB frame of a 3:2 shoot: a sky gradient and a textured bird that drifts across bursts."""
+    height = int(round((megapixels * 1e6 / 1.5) ** 0.5))
+    width = int(round(height * 1.5))
+    rng = np.random.default_rng(seed * 1000 + index)
+    sky = np.linspace(0, 1, height, dtype=np.float32)[:, None, None]
+    frame = (np.array([150, 185, 235], np.float32) * (1 - 0.3 * sky)).repeat(width, axis=1)
+    # A new burst (and a new bird position) every four frames
+    burst = np.random.default_rng(seed * 1000 + index // 4)
+    cx = width * (0.3 + 0.4 * burst.random()) + index % 4 * width * 0.01
+    cy = height * (0.35 + 0.3 * burst.random())
+    ry, rx = height * 0.08, width * 0.07
+    y0, y1 = int(max(cy - ry, 0)), int(min(cy + ry, height))
+    x0, x1 = int(max(cx - rx, 0)), int(min(cx + rx, width))
+    yy, xx = np.mgrid[y0:y1, x0:x1]
+    inside = ((xx - cx) / rx) ** 2 + ((yy - cy) / ry) ** 2 < 1
+    feathers = rng.normal(0, 18, inside.shape).astype(np.float32)
+    patch = frame[y0:y1, x0:x1]
+    patch[inside] = np.stack([70 + feathers, 52 + feathers, 38 + feathers], axis=-1)[inside]
+    frame += rng.normal(0, 2, (1, width, 1)).astype(np.float32)
+    return np.clip(frame, 0, 255).astype(np.uint8)
+
+
+def capture_time(index: int) -> str:
+    return (SHOOT_START + timedelta(seconds=index // 4 * 30 + index % 4)).strftime("%Y:%m:%d %H:%M:%S")
+
+
+def write_jpeg(path: Path, frame: np.ndarray, index: int):
+    from PIL import Image
+    exif = Image.Exif()
+    exif[0x0132] = capture_time(index)
+    Image.fromarray(frame).save(path, quality=92, exif=exif)
+
+
+def _tiff_entries(entries, data_offset: int):
+    """Pack TIFF IFD entries (tag, type, values), placing values over 4 bytes from ``data_offset``."""
+    formats = {BYTE: "B", ASCII: "s", SHORT: "H", LONG: "I", RATIONAL: "II", SRATIONAL: "ii"}
+    table, extra = [], b""
+    for tag, kind, values in sorted(entries):
+        if kind == ASCII:
+            payload, count = values.encode() + b"\0", len(values) + 1
+        else:
+            flat = [v for value in values for v in (value if isinstance(value, tuple) else (value,))]
+            payload = struct.pack("<" + formats[kind][-1] * len(flat), *flat)
+            count = len(values)
+        if len(payload) <= 4:
+            table.append(struct.pack("<HHI", tag, kind, count) + payload.ljust(4, b"\0"))
+        else:
+            table.append(struct.pack("<HHII", tag, kind, count, data_offset + len(extra)))
+            extra += payload + b"\0" * (len(payload) % 2)
+    return struct.pack("<H", len(table)) + b"".join(table) + struct.pack("<I", 0), extra
+
+
+def write_dng(path: Path, frame: np.ndarray, index: int):
+    """Uncompressed 16-bit linear DNG, the layout of a demosaiced DNG from a raw converter."""
+    height, width = frame.shape[:2]
+    pixels = (frame.astype(np.uint16) * 257).astype("<u2").tobytes()
+    entries = [
+        (254, LONG, [0]), (256, LONG, [width]), (257, LONG, [height]), (258, SHORT, [16, 16, 16]),
+        (259, SHORT, [1]), (262, SHORT, [34892]), (271, ASCII, "WildlifeAI"), (272, ASCII, "Benchmark"),
+        (273, LONG, [0]), (274, SHORT, [1]), (277, SHORT, [3]), (278, LONG, [height]),
+        (279, LONG, [len(pixels)]), (284, SHORT, [1]), (306, ASCII, capture_time(index)),
+        (50706, BYTE, [1, 4, 0, 0]), (50708, ASCII, "WildlifeAI Benchmark"),
+        (50721, SRATIONAL, [(1 if i % 4 == 0 else 0, 1) for i in range(9)]),
+        (50728, RATIONAL, [(1, 1)] * 3), (50778, SHORT, [21]),
+    ]
+    ifd_size = 2 + 12 * len(entries) + 4
+    # Pack once to size the out-of-line values, then again with the strip offset after them
+    _, extra = _tiff_entries(entries, 8 + ifd_size)
+    strip_offset = 8 + ifd_size + len(extra)
+    entries[8] = (273, LONG, [strip_offset])
+    ifd, extra = _tiff_entries(entries, 8 + ifd_size)
+    with open(path, "wb") as f:
+        f.write(b"II*\0" + struct.pack("<I", 8) + ifd + extra + pixels)
+
+
+WRITERS = {"jpeg": (".jpg", write_jpeg), "dng": (".dng", write_dng)}
+
+
+def generate_shoot(folder: Path, fmt: str, megapixels: float, count: int, seed: int = 0):
+    """Paths of ``count`` synthetic photos, written unless they already exist."""
+    suffix, writer = WRITERS[fmt]
+    folder = Path(folder) / f"{fmt}_{megapixels:g}mp"
+    folder.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for index in range(count):
+        path = folder / f"bench_{index:04d}{suffix}"
+        if not path.exists():
+            writer(path, synthetic_frame(megapixels, index, seed), index)
+        paths.append(str(path))
+    return paths
+
+
+# --- Backends --------------------------------------------------------------
+
+class StubDetector(MaskRCNN):
+    """Stands in for Mask R-CNN: the dark pixels of a 1/8 scale copy are the bird, as a full-size mask."""
+
+    def __init__(self):
+        self.model = object()
+
+    def get_prediction(self, image_data, threshold=0.2):
+        small = image_data[::8, ::8, :3].mean(axis=2) < 100
+        if not small.any():
+            return None, None, None, None
+        mask = np.repeat(np.repeat(small, 8, axis=0), 8, axis=1)[:image_data.shape[0], :image_data.shape[1]]
+        ys, xs = np.nonzero(small)
+        box = [(np.float32(xs.min() * 8), np.float32(ys.min() * 8)),
+               (np.float32((xs.max() + 1) * 8), np.float32((ys.max() + 1) * 8))]
+        return mask[None], [box], ["bird"], [np.float32(0.9)]
+
+
+class StubSpecies:
+    LABELS = np.array(["Stub Kestrel", "Stub Heron", "Stub Wren"])
+
+    def classify_bird(self, image, top_k=5):
+        scores = np.array([0.8, 0.15, 0.05], dtype=np.float32)[:top_k]
+        return self.LABELS[0], scores[0], self.LABELS[:top_k], scores
+
+
+class StubQuality:
+    def classify_quality(self, cropped_image, cropped_mask):
+        gray = cropped_image[..., :3].mean(axis=2)
+        inside = cropped_mask.astype(bool)
+        return np.float32(min(1.0, gray[inside].std() / 40)) if inside.any() else np.float32(-1)
+
+
+class StubRunner(EnhancedModelRunner):
+    """The runner with the stand-in models instead of loading the real ones."""
+
+    def _load_models(self):
+        self.mask_rcnn = StubDetector()
+        self.species_classifier = StubSpecies()
+        self.quality_classifier = StubQuality()
+
+
+def real_backend_available() -> bool:
+    model_dir = find_model_directory()
+    frameworks = all(importlib.util.find_spec(name) for name in ("torchvision", "onnxruntime", "tensorflow"))
+    return frameworks and all((model_dir / name).exists() for name in ("model.onnx", "labels.txt", "quality.keras"))
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MiB, or None where it cannot be read."""
+    try:
+        import resource
+    except ImportError:
+        resource = None
+    if resource is not None:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Bytes on macOS, kilobytes elsewhere
+        return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+    try:
+        import psutil
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    except Exception:
+        return None
+
+
+# --- Benchmark -------------------------------------------------------------
+
+def run_case(photo_paths, backend: str, max_workers: int, generate_crops: bool = True) -> dict:
+    """Benchmark one case in this process and return its measurements."""
+    runner_class = StubRunner if backend == "stub" else EnhancedModelRunner
+    with tempfile.TemporaryDirectory() as tmpdir:
+        # A scene index of its own keeps the benchmark out of the user's scene numbering
+        scene_index = SceneIndex(Path(tmpdir) / "scenes.sqlite")
+        start = time.perf_counter()
+        runner = runner_class(max_workers=max_workers, scene_index=scene_index)
+        startup_time = time.perf_counter() - start
+        start = time.perf_counter()
+        results = runner.process_batch(photo_paths, Path(tmpdir), generate_crops=generate_crops)
+        batch_time = time.perf_counter() - start
+        runner.close()
+        scene_index.close()
+    return {
+        "max_workers": max_workers,
+        "photos": len(results),
+        "failed": sum(1 for r in results if r.get("species") == "Failed to Read" or "error" in r),
+        "startup_time": startup_time,
+        "batch_time": batch_time,
+        "photos_per_sec": len(results) / batch_time if batch_time > 0 else 0.0,
+        "peak_rss_mb": peak_rss_mb(),
+        "stage_times": runner.stage_summary,
+    }
+
+
+def run_case_in_subprocess(photo_paths, backend, max_workers, generate_crops) -> dict:
+    """Run one case in a fresh interpreter, so thread pools and peak RSS start from scratch."""
+    with tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False) as f:
+        f.write("\n".join(photo_paths))
+        photo_list = f.name
+    cmd = [sys.executable, __file__, "child", photo_list, "--backend", backend, "--max-workers", str(max_workers)]
+    if not generate_crops:
+        cmd.append("--no-crops")
+    try:
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+    finally:
+        os.unlink(photo_list)
+    if proc.returncode != 0:
+        raise RuntimeError(f"Benchmark with {max_workers} worker(s) failed: {proc.stderr}")
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def dng_supported() -> bool:
+    return importlib.util.find_spec("rawpy") is not None or importlib.util.find_spec("wand") is not None
+
+
+def run_suite(image_dir: Path, backend: str, formats, megapixels, max_workers, photos: int,
+              generate_crops: bool = True, runner=run_case_in_subprocess) -> dict:
+    """Generate the shoots and benchmark every (format, size, worker count) case."""
+    if backend == "auto":
+        backend = "real" if real_backend_available() else "stub"
+    report = {
+        "version": REPORT_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "backend": backend,
+        "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                    "processor": platform.processor(), "cpu_count": os.cpu_count()},
+        "photos_per_case": photos,
+        "generate_crops": generate_crops,
+        "runs": [],
+        "skipped": [],
+    }
+    for fmt, mp in itertools.product(formats, megapixels):
+        if fmt == "dng" and not dng_supported():
+            report["skipped"].append({"format": fmt, "megapixels": mp, "reason": "rawpy is not installed"})
+            continue
+        paths = generate_shoot(image_dir, fmt, mp, photos)
+        for workers in max_workers:
+            case = runner(paths, backend, workers, generate_crops)
+            case.update({"format": fmt, "megapixels": mp})
+            report["runs"].append(case)
+            print(f"{fmt:>4} {mp:>4g} MP workers={workers:<3}: {case['photos_per_sec']:.2f} photos/sec, "
+                  f"startup {case['startup_time']:.2f}s, peak RSS {_fmt(case['peak_rss_mb'], 'MiB')}")
+    return report
+
+
+def _fmt(value, unit):
+    return "n/a" if value is None else f"{value:.0f} {unit}"
+
+
+# --- Comparison ------------------------------------------------------------
+
+def _case_key(run: dict):
+    return run["format"], run["megapixels"], run["max_workers"]
+
+
+def compare_reports(baseline: dict, current: dict, tolerance: float = DEFAULT_TOLERANCE,
+                    min_stage_delta_ms: float = MIN_STAGE_DELTA_MS):
+    """Every figure of ``current`` that is worse than in ``baseline`` by more than ``tolerance``.
+
+    Returns ``(regressions, lines)``: the regressions as dicts and a
+    printable line per compared figure. Only cases present in both reports
+    are compared.
+    """
+    lines, regressions = [], []
+    if baseline.get("backend") != current.get("backend"):
+        lines.append(f"warning: comparing the {current.get('backend')} backend with a "
+                     f"{baseline.get('backend')} baseline")
+    previous = {_case_key(run): run for run in baseline.get("runs", [])}
+
+    def check(case, metric, old, new, higher_is_better, min_delta=0.0):
+        if old is None or new is None or old <= 0:
+            return
+        change = (new - old) / old
+        worse = -change if higher_is_better else change
+        flag = worse > tolerance and abs(new - old) > min_delta
+        lines.append(f"{'REGRESSION' if flag else 'ok':>10}  {case}  {metric}: {old:.2f} -> {new:.2f} "
+                     f"({change:+.1%})")
+        if flag:
+            regressions.append({"case": case, "metric": metric, "baseline": old, "current": new,
+                                "change": change})
+
+    for run in current.get("runs", []):
+        old = previous.get(_case_key(run))
+        if old is None:
+            continue
+        case = "{} {:g}MP x{}".format(*_case_key(run))
+        check(case, "photos_per_sec", old["photos_per_sec"], run["photos_per_sec"], True)
+        check(case, "startup_time", old["startup_time"], run["startup_time"], False)
+        check(case, "peak_rss_mb", old.get("peak_rss_mb"), run.get("peak_rss_mb"), False)
+        for stage, stats in sorted(run.get("stage_times", {}).items()):
+            old_stats = old.get("stage_times", {}).get(stage)
+            if old_stats:
+                check(case, f"{stage} p50 ms", old_stats["p50"], stats["p50"], False, min_stage_delta_ms)
+    return regressions, lines
+
+
+def print_comparison(baseline: dict, current: dict, tolerance: float) -> int:
+    regressions, lines = compare_reports(baseline, current, tolerance)
+    for line in lines:
+        print(line)
+    print(f"{len(regressions)} regression(s) beyond {tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline WildlifeAI runner benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Generate synthetic shoots and benchmark the runner")
+    run.add_argument("--backend", choices=["auto", "real", "stub"], default="auto",
+                     help="Real models, deterministic stand-ins, or real when available (default)")
+    run.add_argument("--formats", nargs="+", choices=FORMATS, default=list(FORMATS))
+    run.add_argument("--megapixels", nargs="+", type=float, default=list(DEFAULT_MEGAPIXELS))
+    run.add_argument("--photos", type=int, default=DEFAULT_PHOTOS, help="Photos per format and size")
+    run.add_argument("--max-workers", nargs="+", type=int, default=[1, 4])
+    run.add_argument("--no-crops", action="store_true", help="Do not write export and crop JPEGs")
+    run.add_argument("--image-dir", help="Where the synthetic photos are kept (default: a temp folder)")
+    run.add_argument("--output", help="Write the report as JSON to this path")
+    run.add_argument("--baseline", help="Compare the report with this earlier report")
+    run.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+
+    compare = commands.add_parser("compare", help="Flag regressions of a report against a baseline")
+    compare.add_argument("baseline")
+    compare.add_argument("current")
+    compare.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                         help="Relative change counted as a regression (default 0.10)")
+
+    child = commands.add_parser("child")
+    child.add_argument("photo_list")
+    child.add_argument("--backend", choices=["real", "stub"], required=True)
+    child.add_argument("--max-workers", type=int, required=True)
+    child.add_argument("--no-crops", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format="%(asctime)s [%(levelname)s] %(message)s")
+
+    if args.command == "child":
+        paths = Path(args.photo_list).read_text().splitlines()
+        print(json.dumps(run_case(paths, args.backend, args.max_workers, not args.no_crops)))
+        return 0
+
+    if args.command == "compare":
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        with open(args.current) as f:
+            current = json.load(f)
+        return print_comparison(baseline, current, args.tolerance)
+
+    image_dir = Path(args.image_dir) if args.image_dir else Path(tempfile.gettempdir()) / "wildlifeai_benchmark"
+    report = run_suite(image_dir, args.backend, args.formats, args.megapixels, args.max_workers,
+                       args.photos, not args.no_crops)
+    print(f"Backend: {report['backend']}")
+    for skipped in report["skipped"]:
+        print(f"Skipped {skipped['format']} {skipped['megapixels']:g} MP: {skipped['reason']}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            return print_comparison(json.load(f), report, args.tolerance)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
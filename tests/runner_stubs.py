@@ -0,0 +1,76 @@
+"""Stand-ins for the runner's models, shared by the tests that run whole batches.
+
+Import after ``pytest.importorskip("cv2")``: the runner needs OpenCV.
+"""
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from scene_index import SceneIndex  # noqa: E402
+from wildlifeai_runner import EnhancedModelRunner, MaskRCNN  # noqa: E402
+
+
+class WhiteBirdDetector(MaskRCNN):
+    """Stands in for Mask R-CNN: white pixels (every channel at least ``level``) are a bird.
+
+    Records the shape of every frame it is given.
+    """
+
+    def __init__(self, level=255, score=0.9):
+        self.model = object()
+        self.level = level
+        self.score = score
+        self.shapes = []
+
+    @property
+    def calls(self):
+        return len(self.shapes)
+
+    def get_prediction(self, image_data, threshold=0.2):
+        self.shapes.append(image_data.shape)
+        mask = (image_data >= self.level).all(axis=2)
+        if not mask.any():
+            return None, None, None, None
+        ys, xs = np.nonzero(mask)
+        box = [(np.float32(xs.min()), np.float32(ys.min())), (np.float32(xs.max() + 1), np.float32(ys.max() + 1))]
+        return mask[None], [box], ["bird"], [np.float32(self.score)]
+
+
+class StubSpecies:
+    """Always a Cliff Swallow, at ``confidence`` or else the crop's brightness."""
+
+    def __init__(self, confidence=None):
+        self.confidence = confidence
+        self.calls = 0
+
+    def classify_bird(self, image, top_k=5):
+        self.calls += 1
+        confidence = np.float32(image.mean() / 255 if self.confidence is None else self.confidence)
+        return "Cliff Swallow", confidence, np.array(["Cliff Swallow", "Barn Swallow"]), np.array([confidence, 0.2])
+
+
+class StubQuality:
+    """Quality is the brightness of the bird's pixels, times ``scale``."""
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.calls = 0
+
+    def classify_quality(self, crop, mask):
+        self.calls += 1
+        return np.float32(self.scale * crop[mask > 0].mean() / 255)
+
+
+def make_runner(tmp_path, name="scenes", detector=None, species=None, quality=None, **options):
+    """A single-worker runner with its own scene index in ``tmp_path``, using the given stand-ins."""
+    options.setdefault("max_workers", 1)
+    runner = EnhancedModelRunner(scene_index=SceneIndex(tmp_path / f"{name}.sqlite"), **options)
+    if detector is not None:
+        runner.mask_rcnn = detector
+    if species is not None:
+        runner.species_classifier = species
+    if quality is not None:
+        runner.quality_classifier = quality
+    return runner
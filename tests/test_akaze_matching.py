@@ -0,0 +1,83 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import wildlifeai_runner  # noqa: E402
+from wildlifeai_runner import compute_image_similarity_akaze, hamming_knn2, select_top_keypoints  # noqa: E402
+
+
+def _reference_feature_similarity(img1, img2):
+    """The tuple-sorting / DMatch implementation the vectorized path replaced."""
+    gray1 = cv2.cvtColor(img1, cv2.COLOR_RGB2GRAY)
+    gray2 = cv2.cvtColor(img2, cv2.COLOR_RGB2GRAY)
+    akaze = cv2.AKAZE_create()
+    kp1, des1 = akaze.detectAndCompute(gray1, None)
+    kp2, des2 = akaze.detectAndCompute(gray2, None)
+    if des1 is not None and len(kp1) > 300:
+        kp1, des1 = zip(*sorted(zip(kp1, des1), key=lambda x: x[0].response, reverse=True)[:300])
+        kp1 = list(kp1)
+        des1 = np.array(des1)
+    if des2 is not None and len(kp2) > 300:
+        kp2, des2 = zip(*sorted(zip(kp2, des2), key=lambda x: x[0].response, reverse=True)[:300])
+        kp2 = list(kp2)
+        des2 = np.array(des2)
+    feature_confidence = min(len(kp1), len(kp2)) / 300
+    matches = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(des1, des2, k=2)
+    m_arr = np.array([m.distance for m, n in matches])
+    n_arr = np.array([n.distance for m, n in matches])
+    good_mask = m_arr < 0.7 * n_arr
+    return np.sum(good_mask) / ((len(kp1) + len(kp2)) / 2), feature_confidence
+
+
+def _pair(seed, shift):
+    """Blocky texture with thousands of AKAZE keypoints, so the top-300 cut applies."""
+    rng = np.random.default_rng(seed)
+    blocks = rng.integers(0, 255, (60, 90, 3), dtype=np.uint8)
+    img1 = cv2.GaussianBlur(cv2.resize(blocks, (1350, 900), interpolation=cv2.INTER_NEAREST), (5, 5), 0)
+    img2 = np.roll(img1, shift, axis=1)
+    return img1, img2
+
+
+@pytest.mark.parametrize("seed,shift", [(1, 3), (2, 40), (3, 400)])
+def test_feature_similarity_is_bit_identical(seed, shift):
+    img1, img2 = _pair(seed, shift)
+    expected_similarity, expected_confidence = _reference_feature_similarity(img1, img2)
+    result = compute_image_similarity_akaze(img1, img2)
+    assert result["feature_similarity"] == expected_similarity
+    assert result["feature_confidence"] == expected_confidence
+
+
+def test_top_keypoints_break_ties_like_stable_sort():
+    responses = [0.5, 0.9, 0.5, 0.1, 0.5, 0.9]
+    keypoints = [cv2.KeyPoint(float(i), 0.0, 1.0, -1, r) for i, r in enumerate(responses)]
+    descriptors = np.arange(len(responses), dtype=np.uint8)[:, None]
+    count, kept = select_top_keypoints(keypoints, descriptors, 3)
+    ranked = sorted(zip(keypoints, descriptors[:, 0]), key=lambda x: x[0].response, reverse=True)[:3]
+    assert count == 3
+    assert sorted(kept[:, 0]) == sorted(d for _, d in ranked)
+
+
+def test_popcount_fallback_matches_bfmatcher(monkeypatch):
+    rng = np.random.default_rng(0)
+    des1 = rng.integers(0, 255, (120, 61), dtype=np.uint8)
+    des2 = rng.integers(0, 255, (90, 61), dtype=np.uint8)
+    matches = cv2.BFMatcher(cv2.NORM_HAMMING).knnMatch(des1, des2, k=2)
+
+    m_fast, n_fast = hamming_knn2(des1, des2)
+
+    def no_batch_distance(*args, **kwargs):
+        raise cv2.error("unavailable")
+    monkeypatch.setattr(wildlifeai_runner.cv2, "batchDistance", no_batch_distance)
+    m_slow, n_slow = hamming_knn2(des1, des2)
+
+    expected_m = [m.distance for m, n in matches]
+    expected_n = [n.distance for m, n in matches]
+    assert list(m_fast) == expected_m and list(n_fast) == expected_n
+    assert list(m_slow) == expected_m and list(n_slow) == expected_n
@@ -0,0 +1,59 @@
+import copy
+import sys
+from pathlib import Path
+
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+
+ROOT = Path(__file__).parent.parent
+sys.path.insert(0, str(ROOT / "python" / "runner"))
+sys.path.insert(0, str(ROOT / "scripts"))
+from benchmark_suite import (  # noqa: E402
+    StubDetector, compare_reports, generate_shoot, run_case, run_suite, synthetic_frame,
+)
+from exif_reader import read_exif  # noqa: E402
+
+
+def test_synthetic_shoots(tmp_path):
+    frame = synthetic_frame(0.5, 0)
+    assert frame.shape == (577, 866, 3)
+    masks, boxes, classes, scores = StubDetector().get_prediction(frame)
+    assert classes == ["bird"] and masks.shape == (1, 577, 866) and masks.any()
+
+    jpegs = generate_shoot(tmp_path, "jpeg", 0.5, 5)
+    dngs = generate_shoot(tmp_path, "dng", 0.5, 5)
+    assert len(jpegs) == len(dngs) == 5
+    # Frames of a burst are a second apart; a new burst starts 30 seconds later
+    times = [read_exif(p).capture_time for p in dngs]
+    assert times[1] - times[0] == 1 and times[4] - times[3] == 27
+    assert read_exif(jpegs[4]).capture_time == times[4]
+    # An uncompressed 16-bit RGB strip follows the DNG header
+    assert Path(dngs[0]).stat().st_size > 577 * 866 * 6
+
+
+def test_stub_suite_reports_throughput_and_stages(tmp_path):
+    report = run_suite(tmp_path, "stub", ["jpeg"], [0.5], [1, 2], photos=4,
+                       runner=lambda paths, backend, workers, crops: run_case(paths, backend, workers, crops))
+    assert report["backend"] == "stub" and len(report["runs"]) == 2
+    for run in report["runs"]:
+        assert run["photos"] == 4 and run["failed"] == 0 and run["photos_per_sec"] > 0
+        assert {"decode", "scene", "detection", "quality", "jpeg_encode"} <= set(run["stage_times"])
+        assert run["format"] == "jpeg" and run["megapixels"] == 0.5
+
+
+def test_compare_flags_regressions_beyond_tolerance():
+    baseline = {"backend": "stub", "runs": [{
+        "format": "jpeg", "megapixels": 6, "max_workers": 4, "photos_per_sec": 10.0, "startup_time": 2.0,
+        "peak_rss_mb": 500.0, "stage_times": {"decode": {"p50": 40.0}, "species": {"p50": 0.2}},
+    }]}
+    current = copy.deepcopy(baseline)
+    run = current["runs"][0]
+    run.update(photos_per_sec=8.0, startup_time=2.1, peak_rss_mb=520.0)
+    run["stage_times"] = {"decode": {"p50": 50.0}, "species": {"p50": 0.5}}
+
+    regressions, lines = compare_reports(baseline, current, tolerance=0.1)
+    # Throughput fell 20% and decoding slowed 25%; the rest is within tolerance or noise
+    assert sorted(r["metric"] for r in regressions) == ["decode p50 ms", "photos_per_sec"]
+    assert len(lines) == 5
+    assert compare_reports(baseline, baseline)[0] == []
@@ -0,0 +1,104 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from bird_prefilter import DEFAULT_THRESHOLD, calibrate_threshold, prefilter_report, prefilter_score  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from runner_stubs import make_runner  # noqa: E402
+from wildlifeai_runner import MaskRCNN  # noqa: E402
+
+
+def _sky(rng, shape=(1600, 2400)):
+    fade = 1 - 0.3 * np.linspace(0, 1, shape[0])[:, None, None]
+    img = np.array([120, 170, 230]) * fade * np.ones(shape + (3,))
+    return np.clip(img + rng.normal(0, 3, img.shape), 0, 255).astype(np.uint8)
+
+
+def _foliage(rng, shape=(1600, 2400)):
+    leaves = cv2.resize(rng.normal(0, 1, (shape[0] // 8, shape[1] // 8, 3)), shape[::-1])
+    img = np.array([60, 110, 40]) + cv2.GaussianBlur(leaves, (0, 0), 3) * 40 + rng.normal(0, 8, shape + (3,))
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def _bird(img, radius=80, centre=(1300, 700)):
+    img = img.copy()
+    cv2.ellipse(img, centre, (radius, int(radius * 0.6)), 20, 0, 360, (70, 50, 30), -1)
+    cv2.circle(img, (centre[0] + radius, centre[1] - 20), max(radius // 3, 2), (90, 60, 40), -1)
+    return img
+
+
+def test_empty_frames_score_low_and_birds_high():
+    rng = np.random.default_rng(0)
+    empty = {
+        "lens cap": np.clip(rng.normal(3, 1.5, (1600, 2400, 3)), 0, 255).astype(np.uint8),
+        "sky": _sky(rng),
+        "focus hunting": cv2.GaussianBlur(_bird(_sky(rng)), (0, 0), 25),
+    }
+    birds = {
+        "bird in sky": _bird(_sky(rng)),
+        "distant bird": _bird(_sky(rng), radius=12),
+        "soft bird": cv2.GaussianBlur(_bird(_sky(rng)), (0, 0), 6),
+        "bird in foliage": _bird(_foliage(rng)),
+        "16-bit bird": _bird(_sky(rng)).astype(np.uint16) * 257,
+    }
+    for name, img in empty.items():
+        assert prefilter_score(img) < DEFAULT_THRESHOLD, name
+    for name, img in birds.items():
+        assert prefilter_score(img) >= DEFAULT_THRESHOLD, name
+
+
+def test_threshold_calibration():
+    scores = [0.0, 0.1, 0.2, 0.3, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+    has_bird = [False, False, True, False, True, True, True, True, True, True]
+    assert calibrate_threshold(scores, has_bird, recall=1.0) == 0.2
+    assert calibrate_threshold(scores, has_bird, recall=0.85) == 0.5
+    assert calibrate_threshold(scores, [False] * 10) is None
+
+    report = prefilter_report(scores, has_bird, threshold=0.5, recall=1.0)
+    assert report["skipped"] == 4 and report["skip_rate"] == 0.4
+    assert report["empty_skipped"] == 3 and report["false_rejects"] == 1
+    assert report["recall"] == 6 / 7
+    assert report["calibrated_threshold"] == 0.2
+
+
+class CountingDetector(MaskRCNN):
+    """Stands in for Mask R-CNN: finds a bird in every frame and counts the calls."""
+
+    def __init__(self):
+        self.model = object()
+        self.calls = 0
+
+    def get_prediction(self, image_data, threshold=0.2):
+        self.calls += 1
+        mask = np.zeros(image_data.shape[:2], dtype=bool)
+        mask[10:20, 10:20] = True
+        box = [(np.float32(10), np.float32(10)), (np.float32(20), np.float32(20))]
+        return mask[None], [box], ["bird"], [0.8]
+
+
+def test_runner_skips_models_on_empty_frames(tmp_path):
+    rng = np.random.default_rng(1)
+    frames = {"cap.png": np.full((400, 600, 3), 2, dtype=np.uint8),
+              "bird.png": _bird(_sky(rng, (400, 600)), radius=20, centre=(300, 200))}
+    paths = []
+    for name, img in frames.items():
+        Image.fromarray(img).save(tmp_path / name)
+        paths.append(str(tmp_path / name))
+
+    cache = ResultCache(tmp_path / "cache.sqlite", fingerprint="test")
+    runner = make_runner(tmp_path, detector=CountingDetector(), result_cache=cache,
+                         prefilter_threshold=DEFAULT_THRESHOLD)
+    (tmp_path / "out").mkdir()
+    cap, bird = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+
+    assert runner.mask_rcnn.calls == 1
+    assert cap["species"] == "No Bird" and cap["prefiltered"] and cap["prefilter_score"] == 0
+    assert bird["detection_score"] == 80 and "prefiltered" not in bird
+    # A skipped frame is checked again next time rather than cached as empty
+    assert cache.get(paths[0]) is None and cache.get(paths[1]) is not None
@@ -0,0 +1,178 @@
+import json
+import math
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from bracket_engine import DEFAULT_PREFS, load_metadata_table, parse_exposure_value, plan_brackets  # noqa: E402
+
+
+def _reference_plan(photos, prefs):
+    """Loop-by-loop mirror of detectBracketPatterns / classifyBracketSequences /
+    handleIncompleteBrackets in BracketStacking.lua."""
+    data = sorted(photos, key=lambda p: p["timestamp"])
+    target = prefs["defaultBracketSize"]
+    brackets = []
+    i = 0
+    while i < len(data):
+        group = [data[i]]
+        j = i + 1
+        while j < len(data) and data[j]["timestamp"] - data[j - 1]["timestamp"] <= prefs["withinBracketInterval"]:
+            group.append(data[j])
+            j += 1
+        if prefs["minBracketSize"] <= len(group) <= prefs["maxBracketSize"]:
+            exposures = sorted(p["ev"] for p in group if p["ev"] is not None)
+            valid = False
+            if len(exposures) >= 2:
+                steps = [b - a for a, b in zip(exposures, exposures[1:])]
+                ok = sum(prefs["minExposureStep"] <= s <= prefs["maxExposureStep"] for s in steps)
+                valid = ok / len(steps) >= 0.6
+            vertical = sum(p["orientation"] == "AB" for p in group)
+            consistency = max(vertical, len(group) - vertical) / len(group)
+            confidence = 50 + 30 * valid + 10 * (len(group) == target) + 10 * (consistency >= 0.8)
+            brackets.append({
+                "uuids": [p["uuid"] for p in group],
+                "start": group[0]["timestamp"],
+                "end": group[-1]["timestamp"],
+                "size": len(group),
+                "confidence": min(confidence, 100),
+                "orientation": "vertical" if vertical * 2 > len(group) else "horizontal",
+            })
+        i = j
+
+    if len(brackets) <= 1:
+        sequences = [{"type": "individual", "brackets": brackets}]
+    else:
+        sequences = []
+        for k, bracket in enumerate(brackets):
+            join = k > 0 and bracket["start"] - brackets[k - 1]["end"] <= prefs["panoramaBracketGap"] \
+                and bracket["orientation"] == prefs["panoramaOrientation"]
+            if not join:
+                sequences.append({"type": "individual", "brackets": []})
+            sequences[-1]["brackets"].append(bracket)
+        for sequence in sequences:
+            if prefs["minPanoramaPositions"] <= len(sequence["brackets"]) <= prefs["maxPanoramaPositions"]:
+                sequence["type"] = "panorama"
+
+    for sequence in sequences:
+        group = sequence["brackets"]
+        k = 0
+        while k < len(group) - 1:
+            cur, nxt = group[k], group[k + 1]
+            if cur["size"] < target <= nxt["size"] and \
+                    nxt["start"] - cur["end"] <= prefs["individualBracketGap"] * 0.5:
+                nxt["uuids"] = cur["uuids"] + nxt["uuids"]
+                nxt["size"] = len(nxt["uuids"])
+                nxt["confidence"] = max(cur["confidence"], nxt["confidence"])
+                del group[k]
+            else:
+                k += 1
+    return [(s["type"], [(b["uuids"], b["confidence"]) for b in s["brackets"]]) for s in sequences]
+
+
+def _random_catalog(seed, shots=400):
+    rng = np.random.default_rng(seed)
+    photos = []
+    t = 0.0
+    for shot in range(shots):
+        t += rng.choice([1.0, 4.0, 9.0, 20.0, 120.0])
+        size = int(rng.choice([1, 2, 3, 3, 5, 7, 12]))
+        orientation = "AB" if rng.random() < 0.5 else "BC"
+        step = float(rng.choice([0.3, 1.0, 2.0]))
+        for k in range(size):
+            denominator = 250 / 2 ** ((k - size // 2) * step) if rng.random() > 0.1 else None
+            photos.append({
+                "uuid": f"p{len(photos)}",
+                "timestamp": t,
+                "shutter": f"1/{denominator}" if denominator else "",
+                "aperture": "f/8",
+                "iso": 100,
+                "orientation": orientation,
+                "ev": math.log2(64 / (1 / denominator)) if denominator else None,
+            })
+            t += float(rng.choice([0.2, 0.5, 1.0]))
+    return photos
+
+
+def _summarize(plan):
+    return [
+        (s["type"], [([p["uuid"] for p in b["photos"]], b["confidence"]) for b in s["brackets"]])
+        for s in plan["sequences"]
+    ]
+
+
+def test_plan_matches_plugin_rules():
+    for seed in range(5):
+        photos = _random_catalog(seed)
+        table = [{k: v for k, v in p.items() if k != "ev"} for p in photos]
+        plan = plan_brackets(table)
+        assert _summarize(plan) == _reference_plan(photos, DEFAULT_PREFS)
+        assert plan["stats"]["processedPhotos"] + plan["stats"]["unmatchedPhotos"] == len(photos)
+
+
+def test_standard_bracket_plan():
+    table = {
+        "uuid": ["a", "b", "c"],
+        "timestamp": [100.0, 100.5, 101.0],
+        "shutter": ["1/500", "1/250", "1/125"],
+        "aperture": [8, 8, 8],
+        "iso": [100, 100, 100],
+    }
+    plan = plan_brackets(table)
+    bracket = plan["sequences"][0]["brackets"][0]
+    assert [p["uuid"] for p in bracket["photos"]] == ["a", "b", "c"]
+    assert bracket["exposureAnalysis"]["valid"] is True
+    assert bracket["exposureAnalysis"]["exposureRange"] == 2.0
+    assert bracket["confidence"] == 100
+    assert plan["stats"]["totalStacks"] == 1
+
+
+def test_missing_exposure_data():
+    plan = plan_brackets({"uuid": list("abc"), "timestamp": [1.0, 2.0, 3.0]})
+    bracket = plan["sequences"][0]["brackets"][0]
+    assert bracket["exposureAnalysis"] == {"valid": False, "reason": "Insufficient exposure data"}
+    assert all("exposureValue" not in p for p in bracket["photos"])
+
+
+def test_parse_exposure_value():
+    assert parse_exposure_value("1/250") == 1 / 250
+    assert parse_exposure_value("f/2.8") == 2.8
+    assert parse_exposure_value(" 400 ") == 400
+    assert math.isnan(parse_exposure_value("n/a"))
+
+
+def test_load_metadata_table(tmp_path):
+    path = tmp_path / "metadata.json"
+    path.write_text(json.dumps({"prefs": {"minBracketSize": 2}, "photos": [{"uuid": "a", "timestamp": 1}]}))
+    table = load_metadata_table(path)
+    assert table["prefs"] == {"minBracketSize": 2}
+    assert table["photos"] == {"uuid": ["a"], "timestamp": [1]}
+
+
+def test_large_catalog_is_planned_quickly():
+    n = 100_000
+    rng = np.random.default_rng(0)
+    shot_starts = np.cumsum(rng.uniform(10, 40, n // 3))
+    timestamps = (shot_starts[:, None] + np.array([0.0, 0.5, 1.0])).ravel()
+    table = {
+        "uuid": [f"u{i}" for i in range(len(timestamps))],
+        "timestamp": timestamps.tolist(),
+        "shutter": ["1/500", "1/250", "1/125"] * (n // 3),
+        "aperture": ["f/8"] * len(timestamps),
+        "iso": [100] * len(timestamps),
+        "orientation": ["AB"] * len(timestamps),
+    }
+    start = time.perf_counter()
+    plan = plan_brackets(table)
+    elapsed = time.perf_counter() - start
+    assert plan["stats"]["totalStacks"] == n // 3
+    assert elapsed < 1.0
+
+
+def test_precomputed_exposure_values():
+    plan = plan_brackets({"uuid": list("abc"), "timestamp": [1.0, 2.0, 3.0], "exposureValue": [-1.0, None, 1.0]})
+    photos = plan["sequences"][0]["brackets"][0]["photos"]
+    assert [p.get("exposureValue") for p in photos] == [-1.0, None, 1.0]
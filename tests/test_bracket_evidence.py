@@ -0,0 +1,106 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+from PIL import Image  # noqa: E402
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import bracket_evidence  # noqa: E402
+from bracket_engine import SPLIT_SIMILARITY, confirm_brackets, plan_brackets  # noqa: E402
+from bracket_evidence import SignatureStore, gradient_signature, signature_similarity, signatures_for  # noqa: E402
+
+
+def _scene(seed, width=900, height=600):
+    """Linear-light landscape of soft blobs, wider than one frame so it can be panned."""
+    rng = np.random.default_rng(seed)
+    base = cv2.resize(rng.random((12, 18)).astype(np.float32), (width, height), interpolation=cv2.INTER_CUBIC)
+    base = cv2.GaussianBlur(base, (0, 0), 3)
+    for _ in range(20):
+        center = (int(rng.integers(0, width)), int(rng.integers(0, height)))
+        cv2.circle(base, center, int(rng.integers(10, 60)), float(rng.random()), -1)
+    return np.clip(base, 0.01, 1)
+
+
+def _expose(scene, ev, offset=0):
+    view = scene[:, offset:offset + 600]
+    return (255 * np.clip(view * 0.25 * 2.0 ** ev, 0, 1) ** (1 / 2.2)).astype(np.uint8)
+
+
+def _shoot(tmp_path, frames):
+    """Write (scene, ev, offset, timestamp) frames as JPEGs; returns a metadata table."""
+    table = {"uuid": [], "path": [], "timestamp": [], "exposureValue": []}
+    for i, (scene, ev, offset, timestamp) in enumerate(frames):
+        path = tmp_path / f"IMG_{i:04d}.jpg"
+        Image.fromarray(_expose(scene, ev, offset)).save(path, quality=90)
+        table["uuid"].append(f"p{i}")
+        table["path"].append(str(path))
+        table["timestamp"].append(timestamp)
+        table["exposureValue"].append(float(ev))
+    return table
+
+
+def test_signature_ignores_exposure_but_not_view():
+    scene = _scene(1)
+    reference = gradient_signature(_expose(scene, 0))
+    for ev in (-2, -1, 1, 2):
+        assert signature_similarity(reference, gradient_signature(_expose(scene, ev))) > 0.95
+    panned = gradient_signature(_expose(scene, 0, offset=200))
+    other = gradient_signature(_expose(_scene(2), 0))
+    assert signature_similarity(reference, panned) < SPLIT_SIMILARITY
+    assert signature_similarity(reference, other) < SPLIT_SIMILARITY
+
+
+def test_quick_pan_is_split(tmp_path):
+    scene = _scene(3)
+    frames = [(scene, ev, 0, 10 + 0.5 * k) for k, ev in enumerate((-1, 0, 1))]
+    frames += [(scene, ev, 250, 11.5 + 0.5 * k) for k, ev in enumerate((-1, 0, 1))]
+    table = _shoot(tmp_path, frames)
+    plan = plan_brackets(table)
+    assert [b["size"] for s in plan["sequences"] for b in s["brackets"]] == [6]
+
+    plan = confirm_brackets(plan)
+    brackets = [b for s in plan["sequences"] for b in s["brackets"]]
+    assert [[p["uuid"] for p in b["photos"]] for b in brackets] == [["p0", "p1", "p2"], ["p3", "p4", "p5"]]
+    assert all(b["imageConfidence"] >= 90 and b["exposureAnalysis"]["valid"] for b in brackets)
+    assert plan["stats"]["imageSplits"] == 1
+    assert plan["stats"]["totalStacks"] == 2
+
+
+def test_interrupted_bracket_is_merged(tmp_path):
+    scene = _scene(4)
+    frames = [(scene, ev, 0, 10 + 0.5 * k) for k, ev in enumerate((-2, -1, 0))]
+    # A long exposure opens a gap wider than withinBracketInterval
+    frames += [(scene, ev, 0, 18 + 0.5 * k) for k, ev in enumerate((1, 2, 3))]
+    table = _shoot(tmp_path, frames)
+    prefs = {"defaultBracketSize": 7}
+    plan = plan_brackets(table, prefs)
+    assert [b["size"] for s in plan["sequences"] for b in s["brackets"]] == [3, 3]
+
+    plan = confirm_brackets(plan, prefs)
+    brackets = [b for s in plan["sequences"] for b in s["brackets"]]
+    assert [p["uuid"] for p in brackets[0]["photos"]] == [f"p{i}" for i in range(6)]
+    assert brackets[0]["exposureAnalysis"]["exposureRange"] == 5.0
+    assert plan["stats"]["imageMerges"] == 1
+
+
+def test_photos_without_previews_are_left_alone(tmp_path):
+    table = {"uuid": list("abc"), "path": [str(tmp_path / f"{c}.jpg") for c in "abc"],
+             "timestamp": [1.0, 1.5, 2.0], "exposureValue": [-1.0, 0.0, 1.0]}
+    plan = confirm_brackets(plan_brackets(table))
+    bracket = plan["sequences"][0]["brackets"][0]
+    assert bracket["size"] == 3 and "imageConfidence" not in bracket
+
+
+def test_signatures_are_cached(tmp_path, monkeypatch):
+    table = _shoot(tmp_path, [(_scene(5), 0, 0, 1.0), (_scene(5), 1, 0, 1.5)])
+    store = SignatureStore(tmp_path / "signatures.sqlite")
+    first = signatures_for(table["path"], store)
+    assert len(first) == 2
+
+    monkeypatch.setattr(bracket_evidence, "compute_signature", lambda p: pytest.fail("recomputed"))
+    second = signatures_for(table["path"], store)
+    assert all(np.array_equal(first[p], second[p]) for p in table["path"])
+    store.close()
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from runner_stubs import WhiteBirdDetector, make_runner  # noqa: E402
+from wildlifeai_runner import burst_roi  # noqa: E402
+
+
+def _burst(folder: Path, positions):
+    rng = np.random.default_rng(7)
+    background = cv2.GaussianBlur(rng.integers(0, 240, (1600, 2400, 3), dtype=np.uint8), (3, 3), 0)
+    paths = []
+    for k, (x, y) in enumerate(positions):
+        img = background.copy()
+        cv2.circle(img, (x, y), 60, (255, 255, 255), -1)
+        cv2.line(img, (x - 40, y), (x + 40, y), (0, 0, 0), 3)
+        path = folder / f"burst_{k}.png"
+        Image.fromarray(img).save(path)
+        paths.append(str(path))
+    return paths
+
+
+def _run(tmp_path, name, paths, burst):
+    runner = make_runner(tmp_path, name, detector=WhiteBirdDetector(), burst_roi=burst)
+    (tmp_path / name).mkdir()
+    results = runner.process_batch(paths, tmp_path / name, generate_crops=False)
+    return runner, results
+
+
+def test_burst_frames_detect_in_previous_region(tmp_path):
+    # The bird drifts, then jumps out of the search region
+    paths = _burst(tmp_path, [(1200, 800), (1215, 805), (1230, 800), (400, 300)])
+    full_runner, full = _run(tmp_path, "full", paths, burst=False)
+    burst_runner, burst = _run(tmp_path, "burst", paths, burst=True)
+
+    assert len(set(r["scene_count"] for r in burst)) == 1
+    assert burst_runner.burst_stats == {"roi": 2, "full_frame": 1}
+    assert full_runner.mask_rcnn.shapes == [(1600, 2400, 3)] * 4
+    # Frames 2-4 searched a small region first; frame 4 then fell back to the full frame
+    inputs = [shape[:2] for shape in burst_runner.mask_rcnn.shapes]
+    assert len(inputs) == 5 and inputs[0] == inputs[4] == (1600, 2400)
+    assert all(h * w < 0.15 * 1600 * 2400 for h, w in inputs[1:4])
+
+    keys = ["species", "quality", "detection_score", "subject_sharpness", "scene_count"]
+    assert [{k: r[k] for k in keys} for r in burst] == [{k: r[k] for k in keys} for r in full]
+
+    # predict_single keeps its four-value contract; detection details stay internal
+    species, confidence, quality, similarity = full_runner.predict_single(paths[0])
+    assert isinstance(similarity, dict) and quality == full_runner._predict(paths[0])[2]
+
+
+def test_burst_roi_region():
+    box = [(np.float32(100), np.float32(100)), (np.float32(200), np.float32(150))]
+    assert burst_roi(box, (4000, 6000, 3)) == (0, 0, 470, 445)
+    # Regions covering most of the frame are not worth a separate pass
+    assert burst_roi(box, (500, 600, 3)) is None
@@ -0,0 +1,155 @@
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from wildlifeai_runner import (  # noqa: E402
+    EnhancedModelRunner,
+    ThreadBudget,
+    compute_image_similarity_akaze,
+    resize_for_similarity,
+)
+from result_cache import ResultCache  # noqa: E402
+from runner_stubs import make_runner  # noqa: E402
+from scene_index import SceneIndex  # noqa: E402
+
+
+def _make_scene_images(folder: Path):
+    """Write two short 'bursts' of JPEGs with different content."""
+    rng = np.random.default_rng(42)
+    paths = []
+    for scene in range(2):
+        base = cv2.GaussianBlur(rng.integers(0, 255, (600, 900, 3), dtype=np.uint8), (3, 3), 0)
+        for frame in range(3):
+            img = base.copy()
+            cv2.circle(img, (200 + frame * 20, 300), 60, (255, 255, 255), -1)
+            path = folder / f"scene{scene}_{frame}.jpg"
+            Image.fromarray(img).save(path, quality=95)
+            paths.append(str(path))
+    return paths
+
+
+def test_thread_budget_thread_mode():
+    layout = ThreadBudget(4, cpu_threads=32).layout()
+    assert layout["torch_intra_op"] == 8
+    assert layout["opencv"] == 8
+    # TensorFlow and ONNX Runtime pools are shared by the four worker threads
+    assert layout["tensorflow_intra_op"] == 32
+    assert layout["onnxruntime_intra_op"] == 32
+    assert layout["torch_inter_op"] == layout["tensorflow_inter_op"] == 1
+
+
+def test_thread_budget_process_mode():
+    layout = ThreadBudget(4, workers_per_process=1, cpu_threads=32).layout()
+    assert layout["torch_intra_op"] == 8
+    assert layout["tensorflow_intra_op"] == 8
+    assert layout["onnxruntime_intra_op"] == 8
+
+
+def test_thread_budget_never_exceeds_cores():
+    budget = ThreadBudget(64, cpu_threads=8)
+    assert budget.per_worker == 1
+    assert budget.per_process == 8
+    assert ThreadBudget(2, cpu_threads=8, intra_op_threads=16).per_process == 8
+
+
+def test_resize_for_similarity_is_idempotent():
+    img = np.zeros((4000, 3000, 3), dtype=np.uint8)
+    small = resize_for_similarity(img)
+    assert max(small.shape[:2]) == 1600
+    assert resize_for_similarity(small) is small
+
+
+def test_similarity_matches_on_reduced_frames():
+    rng = np.random.default_rng(1)
+    img1 = cv2.GaussianBlur(rng.integers(0, 255, (2400, 3600, 3), dtype=np.uint8), (3, 3), 0)
+    img2 = np.roll(img1, 5, axis=1)
+    full = compute_image_similarity_akaze(img1, img2)
+    reduced = compute_image_similarity_akaze(resize_for_similarity(img1), resize_for_similarity(img2))
+    assert full == reduced
+
+
+def test_result_cache_skips_analysed_photos(tmp_path):
+    paths = _make_scene_images(tmp_path)[:2]
+    cache = ResultCache(tmp_path / "cache.sqlite", "test")
+    cached = {"filename": Path(paths[0]).name, "species": "Cached Bird", "scene_count": 7}
+    cache.put(paths[0], cached)
+
+    runner = make_runner(tmp_path, result_cache=cache)
+    results = runner.process_batch(paths, tmp_path, generate_crops=False)
+
+    assert results[0] == dict(cached, cluster_id=7, scene_rank=1, rank_margin=None)
+    assert results[1]["filename"] == Path(paths[1]).name
+    # The freshly analysed photo is now cached too; ranks and timings depend on the run and are not
+    per_run = {"scene_rank", "rank_margin", "stage_times"}
+    assert cache.get(paths[1]) == {k: v for k, v in results[1].items() if k not in per_run}
+    cache.close()
+
+
+def test_cached_batch_writes_its_results_once(tmp_path):
+    paths = _make_scene_images(tmp_path)
+    cache = ResultCache(tmp_path / "cache.sqlite", "test")
+    for k, path in enumerate(paths):
+        cache.put(path, {"filename": Path(path).name, "species": "Cached Bird", "scene_count": k})
+
+    runner = make_runner(tmp_path, result_cache=cache)
+    writes = []
+    write_json = runner._safe_write_json
+    runner._safe_write_json = lambda path, data: writes.append(path.name) or write_json(path, data)
+    progress = []
+    results = runner.process_batch(paths, tmp_path, generate_crops=False,
+                                   progress_callback=lambda *args: progress.append(args))
+
+    assert [r["scene_count"] for r in results] == list(range(len(paths)))
+    # One progress report for all the hits instead of rewriting results.json per photo
+    assert progress == [(len(paths), len(paths), Path(paths[-1]).name)]
+    assert writes.count("results.json") == 2 and writes.count("status.json") == 3
+    cache.close()
+
+
+@pytest.mark.slow
+def test_process_mode_matches_thread_mode():
+    with tempfile.TemporaryDirectory() as tmpdir:
+        tmp = Path(tmpdir)
+        paths = _make_scene_images(tmp)
+        (tmp / "thread").mkdir()
+        (tmp / "process").mkdir()
+
+        thread_runner = EnhancedModelRunner(max_workers=1, execution_mode="thread",
+                                            scene_index=SceneIndex(tmp / "thread.sqlite"))
+        thread_results = thread_runner.process_batch(paths, tmp / "thread", generate_crops=False)
+
+        process_runner = EnhancedModelRunner(max_workers=2, execution_mode="process",
+                                             scene_index=SceneIndex(tmp / "process.sqlite"))
+        try:
+            process_results = process_runner.process_batch(paths, tmp / "process", generate_crops=False)
+        finally:
+            process_runner.close()
+
+    keys = ["filename", "species", "scene_count", "feature_similarity", "feature_confidence",
+            "color_similarity", "color_confidence"]
+    assert [{k: r[k] for k in keys} for r in thread_results] == \
+        [{k: r[k] for k in keys} for r in process_results]
+
+
+@pytest.mark.slow
+def test_process_mode_keeps_the_last_frame_after_the_batch(tmp_path):
+    paths = _make_scene_images(tmp_path)
+    runner = make_runner(tmp_path, execution_mode="process")
+    try:
+        runner.process_batch(paths[:1], tmp_path, generate_crops=False)
+    finally:
+        runner.close()
+
+    # The frame was read from a shared memory slot that the batch released
+    assert runner.previous_signature.frame.base is None
+    result = runner.process_photo(paths[1], tmp_path, generate_crops=False)
+    assert result["scene_count"] == 1 and result["feature_similarity"] > 0
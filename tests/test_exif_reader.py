@@ -0,0 +1,131 @@
+import io
+import struct
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+from PIL import Image, TiffImagePlugin
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import exif_reader  # noqa: E402
+from bracket_engine import fill_from_exif  # noqa: E402
+from exif_reader import ExifCache, ExifFields, read_exif, read_exif_batch  # noqa: E402
+
+
+def _exif(orientation=6, stamp="2024:05:01 07:30:15", subsec="25"):
+    exif = Image.Exif()
+    exif[274] = orientation
+    exif[306] = "2000:01:01 00:00:00"
+    ifd = exif.get_ifd(0x8769)
+    ifd[36867] = stamp
+    ifd[37521] = subsec
+    ifd[33434] = TiffImagePlugin.IFDRational(1, 250)
+    ifd[33437] = TiffImagePlugin.IFDRational(56, 10)
+    ifd[34855] = 800
+    return exif
+
+
+def _jpeg(path, size=(64, 48), **kwargs):
+    pixels = np.random.default_rng(0).integers(0, 255, (size[1], size[0], 3), dtype=np.uint8)
+    Image.fromarray(pixels).save(path, "JPEG", exif=_exif(**kwargs), quality=95)
+    return path
+
+
+def _big_endian_tiff(path):
+    """Minimal Motorola-order TIFF, laid out like a NEF header."""
+    stamp = b"2023:12:24 18:00:00\x00"
+    ifd0_at, exif_at = 8, 8 + 2 + 2 * 12 + 4
+    data_at = exif_at + 2 + 3 * 12 + 4
+    ifd0 = struct.pack(">H", 2)
+    ifd0 += struct.pack(">HHIHH", 0x0112, 3, 1, 8, 0)
+    ifd0 += struct.pack(">HHII", 0x8769, 4, 1, exif_at) + struct.pack(">I", 0)
+    exif = struct.pack(">H", 3)
+    exif += struct.pack(">HHII", 0x829A, 5, 1, data_at)
+    exif += struct.pack(">HHIHH", 0x8827, 3, 1, 64, 0)
+    exif += struct.pack(">HHII", 0x9003, 2, len(stamp), data_at + 8) + struct.pack(">I", 0)
+    data = struct.pack(">II", 1, 30) + stamp
+    path.write_bytes(b"MM\x00\x2a" + struct.pack(">I", ifd0_at) + ifd0 + exif + data + b"\x00" * 4096)
+    return path
+
+
+def test_jpeg_fields_match_pil(tmp_path):
+    path = _jpeg(tmp_path / "a.jpg")
+    fields = read_exif(path)
+    expected = datetime(2024, 5, 1, 7, 30, 15).timestamp() + 0.25
+    assert fields == ExifFields(expected, 1 / 250, 5.6, 800, 6)
+    assert fields.vertical
+    with Image.open(path) as img:
+        assert fields.orientation == img.getexif()[274]
+
+
+def test_big_endian_tiff(tmp_path):
+    fields = read_exif(_big_endian_tiff(tmp_path / "b.nef"))
+    assert fields == ExifFields(datetime(2023, 12, 24, 18).timestamp(), 1 / 30, None, 64, 8)
+
+
+def test_missing_or_unsupported_headers(tmp_path):
+    Image.new("RGB", (8, 8)).save(tmp_path / "plain.jpg")
+    Image.new("RGB", (8, 8)).save(tmp_path / "plain.png")
+    (tmp_path / "junk.cr3").write_bytes(b"\x00\x00\x00\x18ftypcrx " + b"\x00" * 64)
+    for name in ("plain.jpg", "plain.png", "junk.cr3", "missing.jpg"):
+        assert read_exif(tmp_path / name) == ExifFields()
+
+
+def test_only_headers_are_read(tmp_path, monkeypatch):
+    path = _jpeg(tmp_path / "big.jpg", size=(2000, 1500))
+    assert path.stat().st_size > 500_000
+    read_bytes = []
+
+    class CountingFile(io.FileIO):
+        def read(self, size=-1):
+            data = super().read(size)
+            read_bytes.append(len(data))
+            return data
+
+    monkeypatch.setattr(exif_reader, "open", lambda p, mode: CountingFile(p, mode), raising=False)
+    assert read_exif(path).iso == 800
+    assert sum(read_bytes) < 4096
+
+
+def test_batch_reads_are_cached_by_file_identity(tmp_path, monkeypatch):
+    paths = [_jpeg(tmp_path / f"{i}.jpg", orientation=1 + i % 8) for i in range(20)]
+    cache = ExifCache()
+    fields = read_exif_batch(paths, max_workers=4, cache=cache)
+    assert [fields[str(p)].orientation for p in paths] == [1 + i % 8 for i in range(20)]
+    assert len(cache) == 20
+
+    calls = []
+    monkeypatch.setattr(exif_reader, "read_exif", lambda p: calls.append(p) or ExifFields())
+    read_exif_batch(paths, max_workers=4, cache=cache)
+    assert calls == []
+    _jpeg(paths[0], orientation=3, subsec="5")
+    assert read_exif_batch(paths[:1], cache=cache) == {str(paths[0]): ExifFields()}
+    assert calls == [str(paths[0])]
+
+
+def test_bracket_table_filled_from_exif(tmp_path):
+    path = _jpeg(tmp_path / "a.jpg")
+    columns = fill_from_exif({"path": [str(path), str(path)], "shutterSpeed": ["1/100", None]})
+    assert columns["shutterSpeed"] == ["1/100", 1 / 250]
+    assert columns["iso"] == [800, 800]
+    assert columns["orientation"] == ["vertical", "vertical"]
+
+
+def test_complete_bracket_rows_are_not_read(tmp_path):
+    columns = {"path": [str(tmp_path / "gone.jpg")], "timestamp": [1.0], "orientation": ["AB"], "ev": [0.5]}
+    assert fill_from_exif(columns) is columns
+
+
+def test_embedded_thumbnail(tmp_path):
+    buffer = io.BytesIO()
+    Image.new("RGB", (16, 12), "red").save(buffer, "JPEG")
+    thumbnail = buffer.getvalue()
+    ifd0 = struct.pack("<H", 0) + struct.pack("<I", 14)
+    ifd1 = struct.pack("<H", 2)
+    ifd1 += struct.pack("<HHII", 0x0201, 4, 1, 14 + 2 + 24 + 4)
+    ifd1 += struct.pack("<HHII", 0x0202, 4, 1, len(thumbnail)) + struct.pack("<I", 0)
+    path = tmp_path / "c.arw"
+    path.write_bytes(b"II\x2a\x00" + struct.pack("<I", 8) + ifd0 + ifd1 + thumbnail)
+    assert exif_reader.read_thumbnail(path) == thumbnail
+    assert exif_reader.read_thumbnail(_jpeg(tmp_path / "a.jpg")) is None
@@ -0,0 +1,100 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from focus_gate import DEFAULT_GATE, focus_gate_report, focus_score, is_unambiguous  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from runner_stubs import make_runner  # noqa: E402
+from wildlifeai_runner import MaskRCNN, crop_artifacts  # noqa: E402
+
+
+def _bird(rng, blur=0.0, noise=2.0, size=1024):
+    """A textured ellipse on a smooth sky, and its mask."""
+    img = np.full((size, size, 3), (110, 150, 200), dtype=np.float32)
+    yy, xx = np.mgrid[:size, :size]
+    mask = ((xx - size / 2) / (size * 0.3)) ** 2 + ((yy - size / 2) / (size * 0.2)) ** 2 < 1
+    feathers = cv2.GaussianBlur(rng.normal(0, 1, (size, size)).astype(np.float32), (0, 0), 1.2) * 100
+    img[mask] = np.stack([90 + feathers, 70 + feathers, 50 + feathers], axis=-1)[mask]
+    if blur:
+        img = cv2.GaussianBlur(img, (0, 0), blur)
+    return np.clip(img + rng.normal(0, noise, img.shape), 0, 255).astype(np.uint8), mask
+
+
+def test_focus_score_separates_sharp_from_blurred_subjects():
+    rng = np.random.default_rng(0)
+    sharp, mask = _bird(rng)
+    blurred, _ = _bird(rng, blur=5)
+    assert focus_score(sharp, mask) >= DEFAULT_GATE[1]
+    assert focus_score(blurred, mask) < DEFAULT_GATE[0]
+    # Sensor noise on a blurred bird must not pass for detail, nor make it look blurred either
+    noisy_blurred, _ = _bird(rng, blur=5, noise=6)
+    assert not is_unambiguous(focus_score(noisy_blurred, mask))
+    # Blanking the background, as the stage cache does, leaves the score unchanged
+    blanked = crop_artifacts(sharp, mask.astype(np.uint8))
+    assert focus_score(blanked["crop"], blanked["mask"]) == pytest.approx(focus_score(sharp, mask), abs=1e-6)
+    assert focus_score(sharp, np.zeros_like(mask)) == -1
+
+
+def test_gate_report():
+    report = focus_gate_report([0.05, 0.5, 0.95, 0.92, -1], [0.1, 0.4, 0.95, 0.7, 0.5], gate=(0.1, 0.9))
+    assert report["photos"] == 4 and report["skipped"] == 3
+    assert report["blurry"] == 1 and report["sharp"] == 2
+    assert report["rating_agreement"] == pytest.approx(2 / 3)
+    assert report["mean_quality_difference"] == pytest.approx((0.05 + 0 + 0.22) / 3)
+
+
+class MaskDetector(MaskRCNN):
+    """Stands in for Mask R-CNN: finds the ellipse drawn by ``_bird``."""
+
+    def __init__(self, mask):
+        self.model = object()
+        self.mask = mask
+
+    def get_prediction(self, image_data, threshold=0.2):
+        ys, xs = np.nonzero(self.mask)
+        box = [(np.float32(xs.min()), np.float32(ys.min())), (np.float32(xs.max() + 1), np.float32(ys.max() + 1))]
+        return self.mask[None], [box], ["bird"], [np.float32(0.9)]
+
+
+class CountingQuality:
+    def __init__(self):
+        self.calls = 0
+
+    def classify_quality(self, crop, mask):
+        self.calls += 1
+        return np.float32(0.5)
+
+
+def test_runner_skips_the_quality_model_on_clear_frames(tmp_path):
+    rng = np.random.default_rng(1)
+    paths = []
+    for k, blur in enumerate([0, 2.5, 12]):
+        # Twice the crop size, so the quality crop is shrunk like a real photo's
+        img, mask = _bird(rng, blur=blur, size=2048)
+        paths.append(str(tmp_path / f"frame_{k}.png"))
+        Image.fromarray(img).save(paths[-1])
+    cache = ResultCache(tmp_path / "cache.sqlite", fingerprint="test")
+    runner = make_runner(tmp_path, detector=MaskDetector(mask), quality=CountingQuality(),
+                         focus_gate=DEFAULT_GATE, result_cache=cache)
+    (tmp_path / "out").mkdir()
+    sharp, unclear, blurred = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+
+    assert runner.quality_classifier.calls == 1
+    assert sharp["quality_gated"] and sharp["rating"] == 5 and sharp["quality"] >= 90
+    assert "quality_gated" not in unclear and unclear["quality"] == 50
+    assert blurred["quality_gated"] and blurred["rating"] == 1
+    assert sharp["focus_score"] > unclear["focus_score"] > blurred["focus_score"]
+
+    # Gated results are served from the cache only while the gate is on
+    runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+    assert runner.quality_classifier.calls == 1
+    runner.focus_gate = None
+    again = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+    assert runner.quality_classifier.calls == 3
+    assert not any(r.get("quality_gated") for r in again) and again[1]["quality"] == 50
@@ -0,0 +1,73 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import jpeg_outputs  # noqa: E402
+import wildlifeai_runner  # noqa: E402
+from jpeg_outputs import JpegWriter, crop_image, export_image, subject_box  # noqa: E402
+from runner_stubs import WhiteBirdDetector, make_runner  # noqa: E402
+
+
+def test_crop_is_a_square_around_the_bird():
+    assert subject_box([(100, 200), (300, 300)], (1000, 1500)) == (70, 120, 260)
+    # Squares near the edge are pushed inside the frame, and never exceed it
+    assert subject_box([(0, 0), (50, 40)], (1000, 1500)) == (0, 0, 65)
+    assert subject_box([(0, 0), (1500, 1000)], (1000, 1500)) == (250, 0, 1000)
+    assert subject_box(None, (1000, 1500)) == (250, 0, 1000)
+
+    frame = np.zeros((1000, 1500, 3), dtype=np.uint16)
+    frame[400:500, 1200:1300] = 65535
+    crop = crop_image(frame, [(1200, 400), (1300, 500)])
+    assert crop.shape == (300, 300, 3) and crop.dtype == np.uint8
+    assert crop[150, 150].tolist() == [255, 255, 255] and crop[5, 5].tolist() == [0, 0, 0]
+    assert export_image(frame).shape == (1000, 1500, 3)
+    assert export_image(np.zeros((3000, 2000), dtype=np.uint8)).shape == (1920, 1280, 3)
+
+
+def test_writer_bounds_the_queue_and_reports_failures(tmp_path, monkeypatch):
+    release = threading.Event()
+    write_jpeg = jpeg_outputs.write_jpeg
+    monkeypatch.setattr(jpeg_outputs, "write_jpeg", lambda path, rgb: release.wait() and write_jpeg(path, rgb))
+    writer = JpegWriter(max_workers=1, max_pending=2)
+    image = np.zeros((8, 8, 3), dtype=np.uint8)
+    writer.submit(tmp_path / "a.jpg", image)
+    writer.submit(tmp_path / "b.jpg", image)
+    third = threading.Thread(target=writer.submit, args=(tmp_path / "missing" / "c.jpg", image))
+    third.start()
+    third.join(0.2)
+    assert third.is_alive()
+    release.set()
+    third.join(5)
+    assert writer.wait() == 1
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["a.jpg", "b.jpg"]
+    writer.close()
+
+
+def test_runner_crops_the_bird_from_the_analysed_frame(tmp_path, monkeypatch):
+    img = np.full((800, 1200, 3), 40, dtype=np.uint8)
+    cv2.circle(img, (1000, 150), 60, (255, 255, 255), -1)
+    photo = tmp_path / "bird.png"
+    Image.fromarray(img).save(photo)
+    decoded = []
+    read_image = wildlifeai_runner.read_image
+    monkeypatch.setattr(wildlifeai_runner, "read_image", lambda p: decoded.append(p) or read_image(p))
+
+    runner = make_runner(tmp_path, detector=WhiteBirdDetector())
+    (tmp_path / "out").mkdir()
+    result, = runner.process_batch([str(photo)], tmp_path / "out", generate_crops=True)
+    runner.close()
+
+    assert len(decoded) == 1
+    crop = np.asarray(Image.open(result["crop_path"]))
+    assert crop.shape == (300, 300, 3)
+    # The bird fills the middle of the crop rather than the photo's centre
+    assert crop[150, 150].min() > 230 and crop[5, 5].max() < 70
+    with Image.open(result["export_path"]) as export:
+        assert export.size == (1200, 800)
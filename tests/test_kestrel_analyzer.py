@@ -0,0 +1,96 @@
+import csv
+import importlib
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from runner_stubs import StubQuality, StubSpecies, WhiteBirdDetector  # noqa: E402
+
+# Model frameworks the analyzer imports at load time; folder discovery and the
+# batch loop run without them
+FRAMEWORKS = ("torchvision", "torchvision.transforms", "onnxruntime", "wand", "wand.image", "keras")
+
+
+@pytest.fixture
+def analyzer(monkeypatch):
+    missing = {name for name in FRAMEWORKS if "." not in name and importlib.util.find_spec(name) is None}
+    for name in FRAMEWORKS:
+        if name.split(".")[0] in missing:
+            stub = types.ModuleType(name)
+            stub.Image = None
+            monkeypatch.setitem(sys.modules, name, stub)
+    monkeypatch.delitem(sys.modules, "project_kestrel_analyzer", raising=False)
+    module = importlib.import_module("project_kestrel_analyzer")
+    yield module
+    sys.modules.pop("project_kestrel_analyzer", None)
+
+
+def _shoot(root: Path):
+    """An archive of shoot folders, with an analyzer output folder and an empty folder."""
+    rng = np.random.default_rng(5)
+    folders = {"2024-05-01": ["b.jpg", "a.jpg"], "2024-06-12/morning": ["c.jpg"], "2024-06-12/.kestrel": ["x.jpg"]}
+    for folder, names in folders.items():
+        (root / folder).mkdir(parents=True)
+        for name in names:
+            img = cv2.GaussianBlur(rng.integers(0, 200, (240, 320, 3), dtype=np.uint8), (5, 5), 0)
+            cv2.circle(img, (160, 120), 30, (255, 255, 255), -1)
+            Image.fromarray(img).save(root / folder / name)
+    (root / "2024-07-04").mkdir()
+    (root / "notes.txt").write_text("not a folder")
+
+
+def test_folders_are_discovered_from_paths_and_globs(analyzer, tmp_path):
+    _shoot(tmp_path)
+    (tmp_path / "2024-05-01" / "a.NEF").write_bytes(b"raw")
+
+    found = [Path(f).relative_to(tmp_path).as_posix() for f in analyzer.iter_image_folders([str(tmp_path)], True)]
+    assert found == [".", "2024-05-01", "2024-06-12", "2024-06-12/morning", "2024-07-04"]
+    assert list(analyzer.iter_image_folders([str(tmp_path)])) == [str(tmp_path)]
+
+    # Globs match folders only; a folder matched twice is analyzed once
+    matched = analyzer.iter_image_folders([str(tmp_path / "2024-0[56]*"), str(tmp_path / "*")])
+    assert [Path(f).name for f in matched] == ["2024-05-01", "2024-06-12", "2024-07-04"]
+
+    # RAW files take precedence over the JPEGs of a folder
+    assert analyzer.find_image_files(tmp_path / "2024-05-01") == ["a.NEF"]
+    assert analyzer.find_image_files(tmp_path / "2024-06-12" / "morning") == ["c.jpg"]
+
+
+def test_batch_writes_one_database_per_folder(analyzer, tmp_path, monkeypatch, capsys):
+    _shoot(tmp_path)
+    monkeypatch.setattr(analyzer, "read_image", lambda path: np.asarray(Image.open(path).convert("RGB")))
+    runner = types.SimpleNamespace(mask_rcnn=WhiteBirdDetector(), species_classifier=StubSpecies(0.8),
+                                   quality_classifier=StubQuality(0.5), max_workers=2)
+
+    # A dry run only lists the folders with photos
+    assert analyzer.main([str(tmp_path), "--recursive", "--dry-run"]) == 0
+    listed = capsys.readouterr().out.splitlines()
+    assert sorted(listed) == [f"{tmp_path / '2024-05-01'}: 2 files", f"{tmp_path / '2024-06-12' / 'morning'}: 1 files"]
+    assert not list(tmp_path.rglob("kestrel_database.csv"))
+
+    assert analyzer.run_batch([str(tmp_path)], recursive=True, runner=runner) == 0
+    databases = sorted(p.relative_to(tmp_path).as_posix() for p in tmp_path.rglob("kestrel_database.csv"))
+    assert databases == ["2024-05-01/.kestrel/kestrel_database.csv",
+                         "2024-06-12/morning/.kestrel/kestrel_database.csv"]
+    with open(tmp_path / databases[0], newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["filename"] for r in rows] == ["a.jpg", "b.jpg"]
+    assert all(r["species"] == "Cliff Swallow" and r["rating"] == "3" for r in rows)
+    assert (tmp_path / "2024-05-01" / ".kestrel" / "crop" / "a_crop.jpg").exists()
+
+    # A second run finds nothing new; without the models nothing runs at all
+    capsys.readouterr()
+    assert analyzer.run_batch([str(tmp_path)], recursive=True, runner=runner) == 0
+    assert "Processed 0 new files." in capsys.readouterr().out
+    runner.quality_classifier = None
+    assert analyzer.run_batch([str(tmp_path)], recursive=True, runner=runner) == 1
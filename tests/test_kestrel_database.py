@@ -0,0 +1,76 @@
+import csv
+import sys
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from kestrel_database import COLUMNS, KestrelDatabase  # noqa: E402
+
+
+def _entry(name, scene, confidence=0.5):
+    return {
+        "filename": name,
+        "species": "Cliff Swallow",
+        "species_confidence": np.float32(confidence),
+        "quality": 0.25,
+        "export_path": f"/tmp/{name}_export.jpg",
+        "crop_path": f"/tmp/{name}_crop.jpg",
+        "rating": 2,
+        "scene_count": scene,
+        "feature_similarity": -1,
+        "feature_confidence": -1,
+        "color_similarity": -1,
+        "color_confidence": -1,
+    }
+
+
+def test_append_writes_csv_schema(tmp_path):
+    path = tmp_path / "kestrel_database.csv"
+    with KestrelDatabase(path) as db:
+        db.append(_entry("a.ARW", 1))
+        db.append(_entry("b.ARW", 2))
+
+    with open(path, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+    assert reader.fieldnames == COLUMNS
+    assert [r["filename"] for r in rows] == ["a.ARW", "b.ARW"]
+    assert rows[0]["quality"] == "0.2500000000000000"
+    assert rows[0]["rating"] == "2"
+
+
+def test_reopen_tracks_processed_files_and_scene_count(tmp_path):
+    path = tmp_path / "kestrel_database.csv"
+    with KestrelDatabase(path) as db:
+        db.append(_entry("a.ARW", 1))
+        db.append(_entry("b.ARW", 3))
+
+    db = KestrelDatabase(path)
+    assert "a.ARW" in db
+    assert db.max_scene_count == 3
+    assert db.new_files(["a.ARW", "b.ARW", "c.ARW"]) == ["c.ARW"]
+
+    db.append(_entry("c.ARW", 4))
+    assert db.max_scene_count == 4
+    assert [r["filename"] for r in db.iter_rows()] == ["a.ARW", "b.ARW", "c.ARW"]
+    db.close()
+
+    # The header is written once
+    assert path.read_text().count("filename,") == 1
+
+
+def test_existing_column_order_is_kept(tmp_path):
+    path = tmp_path / "kestrel_database.csv"
+    columns = list(reversed(COLUMNS))
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=columns)
+        writer.writeheader()
+        writer.writerow({k: v for k, v in _entry("a.ARW", 7).items()})
+
+    with KestrelDatabase(path) as db:
+        assert db.max_scene_count == 7
+        db.append(_entry("b.ARW", 8))
+        rows = list(db.iter_rows())
+    assert rows[1]["filename"] == "b.ARW"
+    assert rows[1]["scene_count"] == "8"
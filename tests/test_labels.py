@@ -3,15 +3,24 @@ import types
 import importlib.util
 from pathlib import Path
 
-# Provide stub for cv2 to avoid system dependency issues during import
-sys.modules['cv2'] = types.ModuleType('cv2')
-
 spec = importlib.util.spec_from_file_location(
     'wai_runner',
     Path(__file__).resolve().parents[1] / 'python' / 'runner' / 'wai_runner.py'
 )
 wai_runner = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(wai_runner)
+# Stub cv2 only where it is not installed, and only while the module loads,
+# so test modules that need OpenCV skip instead of importing the stub
+try:
+    import cv2  # noqa: F401
+    stub_cv2 = False
+except ImportError:
+    sys.modules['cv2'] = types.ModuleType('cv2')
+    stub_cv2 = True
+try:
+    spec.loader.exec_module(wai_runner)
+finally:
+    if stub_cv2:
+        sys.modules.pop('cv2', None)
 
 
 def test_first_label_utf8_sig():
@@ -0,0 +1,85 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from mask_rle import MaskStore, area, bbox, crop, decode, encode, to_json  # noqa: E402
+
+
+def _masks():
+    rng = np.random.default_rng(0)
+    yy, xx = np.mgrid[:300, :400]
+    blob = (xx - 250) ** 2 / 60 ** 2 + (yy - 120) ** 2 / 40 ** 2 < 1
+    noise = rng.random((37, 53)) > 0.5
+    corner = np.zeros((20, 30), dtype=bool)
+    corner[0, 0] = corner[-1, -1] = True
+    return [blob, noise, corner, np.zeros((5, 7), dtype=bool), np.ones((4, 3), dtype=bool)]
+
+
+def test_round_trip_area_and_bounds():
+    # COCO's column-major runs, starting with background
+    mask = np.array([[0, 1, 1], [0, 1, 0]], dtype=bool)
+    assert to_json(encode(mask)) == {"size": [2, 3], "counts": [2, 3, 1]}
+    assert encode(np.ones((2, 2), dtype=bool))["counts"].tolist() == [0, 4]
+
+    for mask in _masks():
+        rle = encode(mask)
+        assert np.array_equal(decode(rle), mask)
+        assert area(rle) == mask.sum()
+        ys, xs = np.nonzero(mask)
+        expected = (xs.min(), ys.min(), xs.max() + 1, ys.max() + 1) if mask.any() else None
+        assert bbox(rle) == expected
+    blob = _masks()[0]
+    assert encode(blob)["counts"].nbytes < blob.size / 100
+
+
+def test_crop_matches_the_inflated_mask():
+    rng = np.random.default_rng(1)
+    for mask in _masks():
+        rle = encode(mask)
+        height, width = mask.shape
+        for _ in range(20):
+            x0, x1 = sorted(rng.integers(-5, width + 5, 2))
+            y0, y1 = sorted(rng.integers(-5, height + 5, 2))
+            expected = mask[max(y0, 0):max(y1, 0), max(x0, 0):max(x1, 0)]
+            assert np.array_equal(crop(rle, (x0, y0, x1, y1)), expected)
+        box = bbox(rle)
+        if box is not None:
+            assert crop(rle, box).sum() == mask.sum()
+
+
+def test_store_keeps_one_folder_of_masks_in_one_file(tmp_path):
+    store = MaskStore(tmp_path / ".wildlifeai" / "masks.sqlite")
+    masks = _masks()
+    for k, mask in enumerate(masks):
+        photo = tmp_path / f"frame_{k}.png"
+        Image.fromarray(mask.astype(np.uint8) * 255).save(photo)
+        assert store.put(photo, encode(mask))
+    assert len(store) == len(masks) and store.names()[0] == "frame_0.png"
+    assert np.array_equal(decode(store.get(tmp_path / "frame_1.png")), masks[1])
+
+    # A changed photo no longer matches its stored mask
+    Image.fromarray(np.zeros((5, 5), dtype=np.uint8)).save(tmp_path / "frame_1.png")
+    assert store.get(tmp_path / "frame_1.png") is None
+    assert store.get(tmp_path / "missing.png") is None
+    assert [p.name for p in (tmp_path / ".wildlifeai").iterdir() if p.suffix == ".sqlite"] == ["masks.sqlite"]
+
+
+def test_runner_saves_the_detected_mask(tmp_path):
+    pytest.importorskip("cv2")
+    from runner_stubs import WhiteBirdDetector, make_runner
+
+    blob = _masks()[0]
+    photo = tmp_path / "shoot" / "bird.png"
+    photo.parent.mkdir()
+    Image.fromarray(np.repeat(blob[..., None], 3, axis=2).astype(np.uint8) * 200).save(photo)
+    runner = make_runner(tmp_path, detector=WhiteBirdDetector(level=129), save_masks=True)
+    (tmp_path / "out").mkdir()
+    runner.process_batch([str(photo)], tmp_path / "out", generate_crops=False)
+    runner.close()
+
+    store = MaskStore(photo.parent / ".wildlifeai" / "masks.sqlite")
+    assert np.array_equal(decode(store.get(photo)), blob)
@@ -0,0 +1,115 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from memory_budget import (  # noqa: E402
+    BYTES_PER_PIXEL, MB, MemoryGovernor, MemoryWatermarks, memory_lines, process_rss,
+)
+from runner_stubs import WhiteBirdDetector, make_runner  # noqa: E402
+from stage_timing import StageTimer  # noqa: E402
+
+
+class FakeRss:
+    """RSS readings set by the test."""
+
+    def __init__(self, value):
+        self.value = value
+
+    def __call__(self):
+        return self.value
+
+
+def test_watermarks_follow_stages():
+    rss = FakeRss(500 * MB)
+    memory = MemoryWatermarks(rss)
+    timer = StageTimer(trace=True, memory=memory)
+    with timer.stage("decode"):
+        rss.value = 700 * MB
+    with timer.stage("detection"):
+        rss.value = 900 * MB
+    rss.value = 600 * MB
+    with timer.stage("decode"):
+        rss.value = 650 * MB
+
+    summary = memory.summary()
+    assert summary["rss_start_mb"] == 500 and summary["rss_peak_mb"] == 900
+    assert summary["stages"]["decode"] == {"rss_peak_mb": 700, "max_growth_mb": 200}
+    assert summary["stages"]["detection"] == {"rss_peak_mb": 900, "max_growth_mb": 200}
+    # Each stage also leaves an RSS counter on the trace
+    assert sum(1 for e in timer._events if e["ph"] == "C") == 3
+
+    # A worker process reports its own watermarks
+    memory.merge({"detection": {"rss_peak_mb": 1200.0, "max_growth_mb": 50.0}})
+    assert memory.summary()["stages"]["detection"] == {"rss_peak_mb": 1200, "max_growth_mb": 200}
+    assert memory_lines(memory.summary())[0] == "peak RSS 900 MB (started at 500 MB)"
+
+    # Where RSS cannot be read nothing is sampled
+    blind = MemoryWatermarks(FakeRss(None))
+    assert StageTimer(memory=blind).memory is None and blind.summary()["rss_peak_mb"] is None
+    assert process_rss() > 0
+
+
+def test_governor_throttles_admission_to_the_budget():
+    rss = FakeRss(1000 * MB)
+    frame = (1000, 2000, 3)  # 48 MB per photo in flight
+    photo = 1000 * 2000 * BYTES_PER_PIXEL
+    governor = MemoryGovernor(1000 * MB + 2 * photo + MB, rss)
+
+    # The default guess is larger than the headroom: only one photo until a frame is decoded
+    first = governor.admit()
+    assert governor.admit(block=False) is None
+    governor.allocated(frame, first)
+    second = governor.admit(block=False)
+    assert second is not None and governor.admit(block=False) is None
+
+    # A blocked admission resumes once a photo finishes
+    admitted = []
+    waiter = threading.Thread(target=lambda: admitted.append(governor.admit()))
+    waiter.start()
+    time.sleep(0.1)
+    assert not admitted
+    governor.release(first)
+    waiter.join(2)
+    assert len(admitted) == 1 and governor.in_flight == 2
+
+    # Over budget, nothing more is admitted; a lone photo always is
+    governor.release(second)
+    rss.value = 3000 * MB
+    assert governor.admit(block=False) is None
+    governor.release(admitted[0])
+    assert governor.admit(block=False) is not None
+
+    summary = governor.summary()
+    assert summary["peak_in_flight"] == 2 and summary["throttled"] == 1
+    assert summary["photo_estimate_mb"] == round(photo / MB, 1)
+
+
+def test_runner_keeps_photos_in_flight_under_the_budget(tmp_path):
+    paths = []
+    for k in range(4):
+        img = np.full((600, 900, 3), 40, dtype=np.uint8)
+        cv2.circle(img, (300 + 100 * k, 300), 80, (255, 255, 255), -1)
+        paths.append(str(tmp_path / f"bird{k}.png"))
+        Image.fromarray(img).save(paths[-1])
+    # Room for a single 600x900 photo beside what the process already holds
+    budget = process_rss() + 600 * 900 * BYTES_PER_PIXEL + MB
+    runner = make_runner(tmp_path, detector=WhiteBirdDetector(), max_workers=3, memory_budget=budget)
+    out = tmp_path / "out"
+    out.mkdir()
+    results = runner.process_batch(paths, out, generate_crops=False)
+    runner.close()
+
+    assert len(results) == 4 and not any("error" in r for r in results)
+    memory = json.loads((out / "status.json").read_text())["memory"]
+    assert memory["governor"]["peak_in_flight"] == 1
+    assert memory["rss_peak_mb"] >= memory["rss_start_mb"] > 0
+    assert {"decode", "detection"} <= set(memory["stages"])
@@ -0,0 +1,64 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from profiles import PROFILES, read_preview, satisfies  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from runner_stubs import WhiteBirdDetector, make_runner  # noqa: E402
+
+
+def _photo(path, size=(4000, 3000)):
+    img = np.full((size[1], size[0], 3), 60, dtype=np.uint8)
+    cv2.circle(img, (size[0] // 2, size[1] // 2), size[1] // 8, (255, 255, 255), -1)
+    Image.fromarray(img).save(path, quality=90)
+    return str(path)
+
+
+def test_previews_and_fidelity(tmp_path):
+    # JPEGs decode at a reduced scale that still covers the requested edge
+    preview = read_preview(_photo(tmp_path / "bird.jpg"), 1600)
+    assert preview.shape == (1500, 2000, 3)
+    # Formats without a cheap preview are decoded by the caller
+    assert read_preview(_photo(tmp_path / "bird.png", (400, 300)), 1600) is None
+
+    triage, full = PROFILES["triage"], PROFILES["full"]
+    assert satisfies({"profile": "full"}, triage) and satisfies({}, full)
+    assert not satisfies({"profile": "triage"}, full)
+    assert full.fingerprint == () and triage.fingerprint
+
+
+def _runner(tmp_path, profile, cache):
+    # JPEG previews soften the white of the bird
+    return make_runner(tmp_path, profile, WhiteBirdDetector(level=250), result_cache=cache, profile=profile)
+
+
+def test_triage_results_are_upgraded_by_a_full_run(tmp_path):
+    photo = _photo(tmp_path / "bird.jpg")
+    cache = ResultCache(tmp_path / "cache.sqlite", fingerprint="test")
+    out = tmp_path / "out"
+    out.mkdir()
+
+    triage = _runner(tmp_path, "triage", cache)
+    assert triage.scene_detector.name == "tiered"
+    result, = triage.process_batch([photo], out, generate_crops=True)
+    triage.close()
+    assert triage.mask_rcnn.shapes == [(1200, 1600, 3)]
+    assert result["profile"] == "triage" and result["species"] != "No Bird"
+    # Triage never writes crops
+    assert result["crop_path"] == "" and not (out / "crop").exists()
+
+    full = _runner(tmp_path, "full", cache)
+    result, = full.process_batch([photo], out, generate_crops=False)
+    assert full.mask_rcnn.shapes == [(3000, 4000, 3)]
+    assert result["profile"] == "full"
+
+    # The full result now stands in for a later triage run
+    triage = _runner(tmp_path, "triage", cache)
+    result, = triage.process_batch([photo], out, generate_crops=False)
+    assert triage.mask_rcnn.shapes == [] and result["profile"] == "full"
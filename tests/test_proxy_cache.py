@@ -0,0 +1,84 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import wildlifeai_runner  # noqa: E402
+from proxy_cache import ProxyCache, make_proxy  # noqa: E402
+from runner_stubs import StubQuality, WhiteBirdDetector, make_runner  # noqa: E402
+
+
+def test_proxy_is_8_bit_and_limited_to_the_edge():
+    img = np.full((1000, 1500, 3), 65535, dtype=np.uint16)
+    proxy = make_proxy(img, edge=600)
+    assert proxy.dtype == np.uint8 and proxy.shape == (400, 600, 3) and proxy.min() == 255
+    small = np.zeros((300, 200, 3), dtype=np.uint8)
+    assert make_proxy(small, edge=600).shape == (300, 200, 3)
+    assert make_proxy(img, edge=0).shape == img.shape
+
+
+def test_cache_maps_proxies_and_evicts_the_least_recently_used(tmp_path):
+    photos = []
+    for k in range(3):
+        photo = tmp_path / f"p{k}.jpg"
+        photo.write_bytes(bytes([k]) * 10)
+        photos.append(photo)
+    decoded = []
+
+    def decode(path):
+        decoded.append(Path(path).name)
+        return np.full((200, 300, 3), 10 * len(decoded), dtype=np.uint8)
+
+    # Room for two 100x150 proxies
+    cache = ProxyCache(tmp_path / "proxies", edge=150, max_bytes=2 * (100 * 150 * 3 + 128))
+    first = cache.load(photos[0], decode)
+    assert first.shape == (100, 150, 3)
+    again = cache.load(photos[0], decode)
+    assert isinstance(again, np.memmap) and not again.flags.writeable
+    assert np.array_equal(again, first) and decoded == ["p0.jpg"]
+
+    cache.load(photos[1], decode)
+    os.utime(cache._file(photos[1]), ns=(0, 0))
+    cache.load(photos[0], decode)
+    cache.load(photos[2], decode)
+    assert len(cache) == 2 and cache.get(photos[1]) is None and cache.get(photos[0]) is not None
+
+    # An edited photo gets a new proxy
+    photos[0].write_bytes(b"edited")
+    cache.load(photos[0], decode)
+    assert decoded == ["p0.jpg", "p1.jpg", "p2.jpg", "p0.jpg"]
+
+
+def test_runner_analyses_proxies_without_decoding_again(tmp_path, monkeypatch):
+    rng = np.random.default_rng(3)
+    paths = []
+    for k in range(3):
+        img = cv2.GaussianBlur(rng.integers(0, 240, (1200, 1800, 3), dtype=np.uint8), (3, 3), 0)
+        cv2.circle(img, (600 + 100 * k, 500), 80, (255, 255, 255), -1)
+        paths.append(str(tmp_path / f"frame_{k}.png"))
+        Image.fromarray(img).save(paths[-1])
+    decoded = []
+    read_image = wildlifeai_runner.read_image
+    monkeypatch.setattr(wildlifeai_runner, "read_image", lambda p: decoded.append(p) or read_image(p))
+
+    def run(name):
+        runner = make_runner(tmp_path, name, WhiteBirdDetector(score=0.87), quality=StubQuality(),
+                             proxy_cache=ProxyCache(tmp_path / "proxies", edge=900))
+        (tmp_path / name).mkdir()
+        return runner.process_batch(paths, tmp_path / name, generate_crops=True)
+
+    first = run("first")
+    assert len(decoded) == 3
+    second = run("second")
+    assert len(decoded) == 3
+    keys = ["species", "quality", "detection_score", "subject_sharpness", "scene_count"]
+    assert [{k: r[k] for k in keys} for r in second] == [{k: r[k] for k in keys} for r in first]
+    assert first[0]["detection_score"] == 87
+    with Image.open(second[0]["export_path"]) as export:
+        assert export.size == (900, 600)
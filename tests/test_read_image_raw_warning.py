@@ -4,15 +4,24 @@ from pathlib import Path
 import sys
 import types
 
-# Stub cv2 to avoid dependency during import
-sys.modules["cv2"] = types.ModuleType("cv2")
-
 spec = importlib.util.spec_from_file_location(
     "wildlifeai_runner",
     Path(__file__).resolve().parents[1] / "python" / "runner" / "wildlifeai_runner.py",
 )
 wildlifeai_runner = importlib.util.module_from_spec(spec)
-spec.loader.exec_module(wildlifeai_runner)
+# Stub cv2 only where it is not installed, and only while the module loads,
+# so test modules that need OpenCV skip instead of importing the stub
+try:
+    import cv2  # noqa: F401
+    stub_cv2 = False
+except ImportError:
+    sys.modules["cv2"] = types.ModuleType("cv2")
+    stub_cv2 = True
+try:
+    spec.loader.exec_module(wildlifeai_runner)
+finally:
+    if stub_cv2:
+        sys.modules.pop("cv2", None)
 
 def test_warns_when_rawpy_missing(monkeypatch, caplog):
     monkeypatch.setattr(wildlifeai_runner, "rawpy", None)
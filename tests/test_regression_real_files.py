@@ -4,6 +4,8 @@ from pathlib import Path
 
 import pytest
 
+pytest.importorskip("cv2")
+
 # Ensure runner module on path
 sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
 from wildlifeai_runner import EnhancedModelRunner  # type: ignore
@@ -0,0 +1,99 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from rescoring import RATING_THRESHOLDS, check_thresholds, rate_quality, rescore  # noqa: E402
+from result_cache import ResultCache  # noqa: E402
+from runner_stubs import StubQuality, StubSpecies, make_runner  # noqa: E402
+from wildlifeai_runner import MaskRCNN  # noqa: E402
+
+
+def _original_rating(quality):
+    if quality == -1:
+        return 0
+    for stars, threshold in enumerate(RATING_THRESHOLDS, 1):
+        if quality < threshold:
+            return stars
+    return 5
+
+
+def test_rating_matches_the_original_cut_points():
+    quality = [-1, 0.0, 0.1499, 0.15, 0.29, 0.3, 0.5999, 0.6, 0.8999, 0.9, 1.0]
+    assert rate_quality(quality).tolist() == [_original_rating(q) for q in quality]
+    assert rate_quality(quality, (0.1, 0.2, 0.3, 0.4)).tolist() == [0, 1, 2, 2, 3, 4, 5, 5, 5, 5, 5]
+    with pytest.raises(ValueError):
+        check_thresholds((0.3, 0.15, 0.6, 0.9))
+    with pytest.raises(ValueError):
+        check_thresholds((0.15, 0.3, 0.6))
+
+
+class ScoreDetector(MaskRCNN):
+    """Stands in for Mask R-CNN: a bird in the centre, scored by the frame's brightness."""
+
+    def __init__(self):
+        self.model = object()
+
+    def get_prediction(self, image_data, threshold=0.2):
+        mask = np.zeros(image_data.shape[:2], dtype=bool)
+        mask[40:80, 60:120] = True
+        box = [(np.float32(60), np.float32(40)), (np.float32(120), np.float32(80))]
+        return mask[None], [box], ["bird"], [np.float32(image_data.mean() / 255)]
+
+
+def test_rescore_applies_new_thresholds_to_stored_results(tmp_path):
+    paths = []
+    for k, level in enumerate([60, 100, 200]):
+        path = tmp_path / f"frame_{k}.png"
+        Image.fromarray(np.full((120, 180, 3), level, dtype=np.uint8)).save(path)
+        paths.append(str(path))
+    cache = ResultCache(tmp_path / "cache.sqlite", fingerprint="test")
+    runner = make_runner(tmp_path, detector=ScoreDetector(), species=StubSpecies(0.61), quality=StubQuality(),
+                         result_cache=cache, cluster_window=0)
+    (tmp_path / "out").mkdir()
+    results = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+
+    assert [r["rating"] for r in results] == [2, 3, 4]
+    assert results[0]["raw"]["quality"] == pytest.approx(60 / 255)
+    assert results[0]["raw"]["species_top_k"] == [["Cliff Swallow", pytest.approx(0.61)],
+                                                  ["Barn Swallow", pytest.approx(0.2)]]
+
+    # The runner's own thresholds change nothing
+    assert rescore(results) == []
+
+    changed = rescore(results, thresholds=(0.1, 0.2, 0.3, 0.8))
+    assert [(r["filename"], r["rating"]) for r in changed] == [("frame_0.png", 3), ("frame_1.png", 4)]
+
+    # A stricter detection cut-off turns the dim frames into No Bird, and relaxing it restores them
+    changed = rescore(results, min_detection=0.5)
+    assert [r["filename"] for r in changed] == ["frame_0.png", "frame_1.png"]
+    assert changed[0]["species"] == "No Bird" and changed[0]["quality"] == -1 and changed[0]["rating"] == 0
+    assert [r["species"] for r in rescore(results)] == ["Cliff Swallow", "Cliff Swallow"]
+
+    # Cached results are read back with the runner's current thresholds
+    runner.rating_thresholds = (0.1, 0.2, 0.3, 0.8)
+    again = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+    assert [r["rating"] for r in again] == [3, 4, 4]
+
+
+def test_corrupt_photos_stay_failed_and_uncached(tmp_path):
+    good = tmp_path / "good.png"
+    Image.fromarray(np.full((120, 180, 3), 200, dtype=np.uint8)).save(good)
+    corrupt = tmp_path / "corrupt.jpg"
+    corrupt.write_bytes(b"\xff\xd8\xff\xe0 not a jpeg")
+    paths = [str(good), str(corrupt)]
+    cache = ResultCache(tmp_path / "cache.sqlite", fingerprint="test")
+    runner = make_runner(tmp_path, detector=ScoreDetector(), species=StubSpecies(0.61), quality=StubQuality(),
+                         result_cache=cache, cluster_window=0)
+    (tmp_path / "out").mkdir()
+    results = runner.process_batch(paths, tmp_path / "out", generate_crops=False)
+
+    assert [r["species"] for r in results] == ["Cliff Swallow", "Failed to Read"]
+    assert cache.get(str(good)) is not None and cache.get(str(corrupt)) is None
+    # Rescoring leaves the failure alone
+    assert rescore(results, min_detection=0.5) == [] and results[1]["species"] == "Failed to Read"
@@ -0,0 +1,160 @@
+import csv
+import json
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from kestrel_database import COLUMNS  # noqa: E402
+from kestrel_parser import import_kestrel_databases, kestrel_row_to_result  # noqa: E402
+from result_cache import ResultCache, model_fingerprint  # noqa: E402
+from scene_index import SceneIndex  # noqa: E402
+
+
+def _row(name, **overrides):
+    row = {
+        "filename": name,
+        "species": "Cliff Swallow",
+        "species_confidence": "0.6532806158065796",
+        "quality": "0.0445917211472988",
+        "export_path": "export.jpg",
+        "crop_path": "crop.jpg",
+        "rating": "1",
+        "scene_count": "3",
+        "feature_similarity": "0.0033333333333333",
+        "feature_confidence": "1.0000000000000000",
+        "color_similarity": "0",
+        "color_confidence": "-1",
+    }
+    row.update(overrides)
+    return row
+
+
+def _write_database(folder: Path, rows):
+    kestrel = folder / ".kestrel"
+    kestrel.mkdir(parents=True)
+    with open(kestrel / "kestrel_database.csv", "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def test_cache_invalidates_on_change(tmp_path):
+    photo = tmp_path / "a.ARW"
+    photo.write_bytes(b"raw")
+    cache = ResultCache(tmp_path / "cache.sqlite", "models-v1")
+    cache.put(photo, {"filename": "a.ARW", "quality": 42})
+    assert cache.get(photo) == {"filename": "a.ARW", "quality": 42}
+
+    assert ResultCache(tmp_path / "cache.sqlite", "models-v2").get(photo) is None
+
+    st = photo.stat()
+    os.utime(photo, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert cache.get(photo) is None
+    assert cache.get(tmp_path / "missing.ARW") is None
+    cache.close()
+
+
+def test_imported_results_serve_any_settings(tmp_path):
+    photo = tmp_path / "a.ARW"
+    photo.write_bytes(b"raw")
+    imported = model_fingerprint(tmp_path)
+    importer = ResultCache(tmp_path / "cache.sqlite", imported, imported_fingerprint=imported)
+    importer.put(photo, {"filename": "a.ARW", "quality": 42})
+    importer.close()
+
+    for settings in ({"proxy_edge": None, "burst_roi": False}, {"proxy_edge": 2048, "burst_roi": True}):
+        cache = ResultCache(tmp_path / "cache.sqlite", model_fingerprint(tmp_path, settings),
+                            imported_fingerprint=imported)
+        assert cache.get(photo) == {"filename": "a.ARW", "quality": 42}
+        cache.close()
+    # Results of an analysis still belong to its settings
+    cache = ResultCache(tmp_path / "cache.sqlite", model_fingerprint(tmp_path, {"proxy_edge": 2048}),
+                        imported_fingerprint=imported)
+    cache.put(photo, {"filename": "a.ARW", "quality": 7})
+    cache.close()
+    other = ResultCache(tmp_path / "cache.sqlite", model_fingerprint(tmp_path, {"proxy_edge": None}),
+                        imported_fingerprint=imported)
+    assert other.get(photo) is None
+    other.close()
+
+
+def test_model_fingerprint_tracks_model_files(tmp_path):
+    before = model_fingerprint(tmp_path)
+    (tmp_path / "model.onnx").write_bytes(b"1234")
+    first = model_fingerprint(tmp_path)
+    assert first != before
+
+    model = tmp_path / "model.onnx"
+    mtime = model.stat().st_mtime_ns
+    # A retrained model of the same size is a different model
+    model.write_bytes(b"5678")
+    os.utime(model, ns=(mtime, mtime + 1_000_000_000))
+    assert model_fingerprint(tmp_path) not in (before, first)
+    # An identical reinstall, newer on disk, keeps the cached results
+    model.write_bytes(b"1234")
+    os.utime(model, ns=(mtime, mtime + 2_000_000_000))
+    assert model_fingerprint(tmp_path) == first
+    # Settings that change a fresh analysis are part of the fingerprint
+    assert model_fingerprint(tmp_path, {"proxy_edge": None, "burst_roi": False}) != first
+    assert (model_fingerprint(tmp_path, {"proxy_edge": 2048, "burst_roi": False})
+            != model_fingerprint(tmp_path, {"proxy_edge": 1024, "burst_roi": False}))
+
+
+def test_kestrel_row_scaling():
+    result = kestrel_row_to_result(_row("a.ARW"))
+    assert result["species_confidence"] == 65
+    assert result["quality"] == 4
+    assert result["feature_similarity"] == 0
+    assert result["feature_confidence"] == 100
+    assert result["color_confidence"] == -1
+    assert kestrel_row_to_result(_row("b.ARW", quality="-1"))["quality"] == -1
+
+
+def test_import_writes_sidecars_and_cache(tmp_path):
+    shoot = tmp_path / "2024" / "shoot1"
+    shoot.mkdir(parents=True)
+    (shoot / "a.ARW").write_bytes(b"raw")
+    _write_database(shoot, [_row("a.ARW"), _row("gone.ARW")])
+
+    cache = ResultCache(tmp_path / "cache.sqlite", "models-v1")
+    summary = import_kestrel_databases([tmp_path], cache)
+    assert summary == {"databases": 1, "imported": 1, "skipped": 1}
+
+    sidecar = json.loads((shoot / ".wildlifeai" / "a.ARW.json").read_text())
+    assert sidecar["detected_species"] == "Cliff Swallow"
+    assert sidecar["species_confidence"] == 65
+    assert sidecar["feature_confidence"] == 100
+    assert sidecar["photo_path"] == str(shoot / "a.ARW")
+
+    assert cache.get(shoot / "a.ARW")["quality"] == 4
+    assert not (shoot / ".wildlifeai" / "gone.ARW.json").exists()
+    cache.close()
+
+
+def test_import_allocates_scene_ids_from_the_index(tmp_path):
+    index = SceneIndex(tmp_path / "scenes.sqlite", seed=40)
+    folders = [tmp_path / "2024" / name for name in ("shoot1", "shoot2")]
+    for folder in folders:
+        folder.mkdir(parents=True)
+        for name in ("a.ARW", "b.ARW", "c.ARW"):
+            (folder / name).write_bytes(b"raw")
+        # Both databases number their scenes from 1
+        _write_database(folder, [_row("a.ARW", scene_count="1"), _row("b.ARW", scene_count="1"),
+                                 _row("c.ARW", scene_count="2")])
+
+    cache = ResultCache(tmp_path / "cache.sqlite", "models-v1")
+    import_kestrel_databases([tmp_path], cache, scene_index=index)
+    scenes = [[cache.get(folder / name)["scene_count"] for name in ("a.ARW", "b.ARW", "c.ARW")]
+              for folder in folders]
+    assert scenes == [[41, 41, 42], [43, 43, 44]]
+    assert cache.get(folders[1] / "c.ARW")["cluster_id"] == 44
+    assert index.scene_of(folders[1] / "c.ARW") == 44 and index.last_scene_id() == 44
+    sidecar = json.loads((folders[0] / ".wildlifeai" / "c.ARW.json").read_text())
+    assert sidecar["scene_count"] == sidecar["cluster_id"] == 42
+
+    # Importing again keeps the scenes the photos already have
+    import_kestrel_databases([tmp_path], cache, overwrite=True, scene_index=index)
+    assert cache.get(folders[1] / "a.ARW")["scene_count"] == 43 and index.last_scene_id() == 44
+    cache.close()
+    index.close()
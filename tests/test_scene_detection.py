@@ -0,0 +1,111 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from wildlifeai_runner import (  # noqa: E402
+    ClusterFrame,
+    SceneDetector,
+    TieredSceneDetector,
+    cluster_frames,
+    frame_signature,
+    resize_for_similarity,
+    scene_boundary_agreement,
+)
+
+
+def _burst(seed, frames=4, shift=4):
+    """Frames of a textured static background with a small moving subject."""
+    rng = np.random.default_rng(seed)
+    base = cv2.GaussianBlur(rng.integers(0, 255, (800, 1200, 3), dtype=np.uint8), (5, 5), 0)
+    base = (base * np.linspace(0.4, 1.0, 1200)[None, :, None]).astype(np.uint8)
+    out = []
+    for i in range(frames):
+        img = np.roll(base, i * shift, axis=1)
+        cv2.circle(img, (400 + i * 10, 400), 40, (250, 250, 250), -1)
+        out.append(img)
+    return out
+
+
+def _run(detector, frames, times=None):
+    previous = None
+    decisions = []
+    for i, img in enumerate(frames):
+        sig = detector.signature(resize_for_similarity(img), img.shape, times[i] if times else None)
+        decisions.append(detector.compare(previous, sig))
+        previous = sig
+    return decisions
+
+
+def test_tiered_detector_agrees_with_akaze():
+    frames = _burst(1) + _burst(2) + _burst(3)
+    akaze = _run(SceneDetector(), frames)
+    tiered_detector = TieredSceneDetector()
+    tiered = _run(tiered_detector, frames)
+
+    assert [d["similar"] for d in tiered] == [d["similar"] for d in akaze]
+    # Clear-cut pairs are settled without feature matching
+    assert tiered_detector.tier_counts["signature"] > tiered_detector.tier_counts.get("akaze", 0)
+    assert abs(sum(tiered_detector.tier_fractions().values()) - 1.0) < 1e-9
+
+
+def test_capture_time_gap_starts_new_scene():
+    frames = _burst(4, frames=2)
+    detector = TieredSceneDetector(time_gap=5)
+    decisions = _run(detector, frames, times=[100.0, 160.0])
+    assert decisions[1]["similar"] is False
+    assert decisions[1]["tier"] == "time"
+
+
+def test_shape_change_is_new_scene():
+    detector = TieredSceneDetector()
+    a = np.zeros((600, 900, 3), dtype=np.uint8)
+    b = np.zeros((900, 600, 3), dtype=np.uint8)
+    decisions = _run(detector, [a, b])
+    assert decisions[1]["similar"] is False
+    assert decisions[1]["tier"] == "shape"
+
+
+def test_scene_boundary_agreement():
+    expected = {"a": {"scene_count": 1}, "b": {"scene_count": 1}, "c": {"scene_count": 2}}
+    actual = [
+        {"filename": "a", "scene_count": 10},
+        {"filename": "b", "scene_count": 11},
+        {"filename": "c", "scene_count": 12},
+    ]
+    assert scene_boundary_agreement(actual, expected) == (1, 2)
+
+
+def _signature(seed):
+    rng = np.random.default_rng(seed)
+    frame = cv2.GaussianBlur(rng.integers(0, 255, (400, 600, 3), dtype=np.uint8), (31, 31), 0)
+    return frame_signature(frame)
+
+
+def test_cluster_joins_returning_subject():
+    a, b = _signature(1), _signature(2)
+    frames = [
+        ClusterFrame(0.0, 5, a[0], a[1]),
+        ClusterFrame(30.0, 6, b[0], b[1]),
+        # The first view comes back, out of the adjacent-frame detector's reach
+        ClusterFrame(60.0, 7, a[0], a[1]),
+        ClusterFrame(61.0, 7),
+        ClusterFrame(5000.0, 8, a[0], a[1]),
+    ]
+    assert cluster_frames(frames) == [5, 6, 5, 5, 8]
+    assert cluster_frames(frames, time_window=0) == [5, 6, 7, 7, 8]
+
+
+def test_cluster_chains_repeats_through_long_shoot():
+    signatures = [_signature(seed) for seed in range(50)]
+    frames = [ClusterFrame(float(i), i, *signatures[i % 50][:2]) for i in range(20000)]
+    clusters = cluster_frames(frames, time_window=100.0)
+    # Every frame joins the first frame with the same signature in its time window
+    assert clusters[:50] == list(range(50))
+    assert clusters[50] == 0
@@ -0,0 +1,87 @@
+import sys
+import threading
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from scene_index import SceneIndex  # noqa: E402
+
+
+def test_allocation_is_unique_across_connections(tmp_path):
+    indexes = [SceneIndex(tmp_path / "scenes.sqlite") for _ in range(4)]
+    allocated = []
+
+    def allocate(index):
+        for _ in range(50):
+            allocated.append(index.allocate_scene())
+
+    threads = [threading.Thread(target=allocate, args=(index,)) for index in indexes]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sorted(allocated) == list(range(1, 201))
+    assert indexes[0].last_scene_id() == 200
+    for index in indexes:
+        index.close()
+
+
+def test_new_index_continues_legacy_counter(tmp_path):
+    index = SceneIndex(tmp_path / "scenes.sqlite", seed=41)
+    assert index.allocate_scene() == 42
+    index.close()
+    # The seed only applies to a new index
+    reopened = SceneIndex(tmp_path / "scenes.sqlite", seed=7)
+    assert reopened.last_scene_id() == 42
+    reopened.close()
+
+
+def test_predecessor_is_previous_frame_of_same_folder(tmp_path):
+    index = SceneIndex(tmp_path / "scenes.sqlite")
+    a, b = tmp_path / "a", tmp_path / "b"
+    index.record(a / "1.jpg", 10.0, 1)
+    index.record(a / "2.jpg", 20.0, 2)
+    index.record(b / "3.jpg", 25.0, 3)
+
+    assert index.predecessor(a / "new.jpg", 30.0).scene_id == 2
+    assert index.predecessor(a / "new.jpg", 15.0).scene_id == 1
+    assert index.predecessor(a / "new.jpg", 5.0) is None
+    assert index.predecessor(b / "new.jpg", 30.0).scene_id == 3
+
+    # Re-recording a frame moves it rather than duplicating it
+    index.record(a / "2.jpg", 20.0, 5)
+    assert index.scene_of(a / "2.jpg") == 5
+    index.close()
+
+
+def test_runner_stitches_batches_onto_indexed_scenes(tmp_path):
+    cv2 = pytest.importorskip("cv2")
+    if not hasattr(cv2, "AKAZE_create"):
+        pytest.skip("OpenCV build without AKAZE")
+    from wildlifeai_runner import EnhancedModelRunner
+
+    rng = np.random.default_rng(3)
+    paths = []
+    for scene in range(2):
+        base = cv2.GaussianBlur(rng.integers(0, 255, (600, 900, 3), dtype=np.uint8), (3, 3), 0)
+        for frame in range(2):
+            img = base.copy()
+            cv2.circle(img, (200 + frame * 20, 300), 60, (255, 255, 255), -1)
+            path = tmp_path / f"scene{scene}_{frame}.jpg"
+            Image.fromarray(img).save(path, quality=95)
+            paths.append(str(path))
+
+    index = SceneIndex(tmp_path / "scenes.sqlite")
+    first = EnhancedModelRunner(max_workers=1, scene_index=index).process_batch(paths[:1], tmp_path)
+    # A later run continues the burst it left off in, then starts a new scene
+    second = EnhancedModelRunner(max_workers=1, scene_index=index).process_batch(paths[1:], tmp_path)
+
+    scenes = [r["scene_count"] for r in first + second]
+    assert scenes[0] == scenes[1]
+    assert scenes[2] == scenes[3] != scenes[1]
+    assert index.scene_of(paths[3]) == scenes[3]
+    index.close()
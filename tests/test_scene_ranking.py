@@ -0,0 +1,50 @@
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from scene_ranking import rank_scenes  # noqa: E402
+
+
+def _result(name, scene, quality, detection=90, sharpness=100.0, **extra):
+    return {"filename": name, "scene_count": scene, "cluster_id": scene, "quality": quality,
+            "detection_score": detection, "subject_sharpness": sharpness, **extra}
+
+
+def test_scenes_are_ranked_best_first():
+    results = [
+        _result("a", 1, 60), _result("b", 1, 80), _result("c", 1, 70),
+        _result("d", 2, 50),
+        # Equal quality: the sharper subject wins
+        _result("e", 3, 75, sharpness=40.0), _result("f", 3, 75, sharpness=200.0),
+    ]
+    scenes = rank_scenes(results)
+    assert [(s["scene_id"], s["photos"]) for s in scenes] == [(1, ["b", "c", "a"]), (2, ["d"]), (3, ["f", "e"])]
+    assert [r["scene_rank"] for r in results] == [3, 1, 2, 1, 2, 1]
+    assert scenes[0]["margin"] == 7.0 and results[1]["rank_margin"] == 7.0
+    assert scenes[1]["margin"] is None
+    assert scenes[2]["margin"] == 12.0
+
+
+def test_clusters_take_precedence_and_missing_fields_rank_last():
+    results = [
+        {"filename": "old", "scene_count": 4},
+        _result("new", 5, 40, cluster_id=4),
+        {"filename": "failed", "species": "Unknown", "error": "boom"},
+    ]
+    scenes = rank_scenes(results)
+    assert scenes == [{"scene_id": 4, "photos": ["new", "old"], "best": "new", "margin": 56.5}]
+    assert "scene_rank" not in results[2]
+
+
+def test_thousands_of_scenes_rank_quickly():
+    rng = np.random.default_rng(0)
+    results = [_result(f"p{i}", i // 5, int(q), int(d), float(s))
+               for i, (q, d, s) in enumerate(rng.uniform(0, 100, (50_000, 3)))]
+    start = time.perf_counter()
+    scenes = rank_scenes(results)
+    assert time.perf_counter() - start < 1.0
+    assert len(scenes) == 10_000
+    assert sorted(r["scene_rank"] for r in results[:5]) == [1, 2, 3, 4, 5]
@@ -0,0 +1,106 @@
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+if not hasattr(cv2, "AKAZE_create"):
+    pytest.skip("OpenCV build without AKAZE", allow_module_level=True)
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+import wildlifeai_runner  # noqa: E402
+from runner_stubs import StubQuality, StubSpecies, WhiteBirdDetector, make_runner  # noqa: E402
+from stage_cache import StageCache, pack_mask, unpack_mask  # noqa: E402
+
+
+def test_artifacts_are_invalidated_by_fingerprint_and_file(tmp_path):
+    photo = tmp_path / "a.jpg"
+    photo.write_bytes(b"x" * 10)
+    mask = np.random.default_rng(0).random((37, 53)) > 0.5
+    cache = StageCache(tmp_path / "stages.sqlite")
+    assert cache.put(photo, {"detection": ("d1", {"score": np.float32(0.8), **pack_mask(mask)}),
+                             "quality": ("q1", {"score": np.float32(0.3)})}) == 2
+
+    found = cache.get(photo, {"detection": "d1", "quality": "q2"})
+    assert list(found) == ["detection"]
+    assert found["detection"]["score"] == np.float32(0.8)
+    assert np.array_equal(unpack_mask(found["detection"]), mask)
+
+    photo.write_bytes(b"y" * 11)
+    assert cache.get(photo, {"detection": "d1"}) == {}
+    assert len(cache) == 1
+
+
+def _photos(folder: Path):
+    rng = np.random.default_rng(3)
+    background = cv2.GaussianBlur(rng.integers(0, 240, (800, 1200, 3), dtype=np.uint8), (3, 3), 0)
+    paths = []
+    for k, centre in enumerate([(600, 400), (610, 405), None, (300, 200)]):
+        img = np.roll(background, 5 * k, axis=1)
+        if centre is not None:
+            x, y = centre
+            cv2.circle(img, (x, y), 50, (255, 255, 255), -1)
+            cv2.line(img, (x - 30, y), (x + 30, y), (0, 0, 0), 3)
+        path = folder / f"frame_{k}.png"
+        Image.fromarray(img).save(path)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def models(tmp_path, monkeypatch):
+    """A model directory the runner fingerprints its stages from."""
+    folder = tmp_path / "models"
+    folder.mkdir()
+    for name in ("model.onnx", "quality.keras", "labels.txt"):
+        (folder / name).write_bytes(name.encode() * 8)
+    monkeypatch.setattr(wildlifeai_runner, "find_model_directory", lambda: folder)
+    return folder
+
+
+def _run(tmp_path, name, paths, stage_cache, quality_scale):
+    runner = make_runner(tmp_path, name, WhiteBirdDetector(score=0.87), StubSpecies(), StubQuality(quality_scale),
+                         stage_cache=stage_cache)
+    (tmp_path / name).mkdir()
+    return runner, runner.process_batch(paths, tmp_path / name, generate_crops=False)
+
+
+def test_quality_update_reruns_only_the_quality_stage(tmp_path, monkeypatch, models):
+    paths = _photos(tmp_path)
+    stage_cache = StageCache(tmp_path / "stages.sqlite")
+    first, before = _run(tmp_path, "first", paths, stage_cache, quality_scale=1)
+    assert first.mask_rcnn.calls == 4 and first.quality_classifier.calls == 3
+
+    # A retrained quality.keras of exactly the same size
+    keras = models / "quality.keras"
+    size, mtime = keras.stat().st_size, keras.stat().st_mtime_ns
+    keras.write_bytes(b"r" * size)
+    os.utime(keras, ns=(mtime, mtime + 10**9))
+    decoded = []
+    read_image = wildlifeai_runner.read_image
+    monkeypatch.setattr(wildlifeai_runner, "read_image", lambda p: decoded.append(p) or read_image(p))
+    second, after = _run(tmp_path, "second", paths, stage_cache, quality_scale=0.5)
+
+    assert [stage for stage in first.stage_fingerprints
+            if first.stage_fingerprints[stage] != second.stage_fingerprints[stage]] == ["quality"]
+    assert decoded == []
+    assert second.mask_rcnn.calls == 0 and second.species_classifier.calls == 0
+    assert second.quality_classifier.calls == 3
+    unchanged = ["species", "species_confidence", "detection_score", "subject_sharpness", "scene_count",
+                 "feature_similarity", "feature_confidence", "color_similarity", "color_confidence"]
+    assert [{k: r[k] for k in unchanged} for r in after] == [{k: r[k] for k in unchanged} for r in before]
+    assert [r["quality"] for r in after] == [int(r["quality"] / 2) if r["quality"] > 0 else r["quality"]
+                                             for r in before]
+
+
+def test_edited_photo_runs_every_stage_again(tmp_path, models):
+    paths = _photos(tmp_path)
+    stage_cache = StageCache(tmp_path / "stages.sqlite")
+    _run(tmp_path, "first", paths, stage_cache, quality_scale=1)
+    stat = os.stat(paths[0])
+    os.utime(paths[0], ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    second, _ = _run(tmp_path, "second", paths, stage_cache, quality_scale=1)
+    assert second.mask_rcnn.calls == 1 and second.quality_classifier.calls == 1
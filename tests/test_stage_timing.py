@@ -0,0 +1,84 @@
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+from PIL import Image
+
+cv2 = pytest.importorskip("cv2")
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "python" / "runner"))
+from runner_stubs import WhiteBirdDetector, make_runner  # noqa: E402
+from stage_timing import StageTimer  # noqa: E402
+
+
+def test_timer_collects_stages_per_photo_and_thread(tmp_path):
+    timer = StageTimer(trace=True)
+    photo_times = {}
+
+    def analyse(name):
+        timer.begin_photo(f"/shoot/{name}.jpg")
+        with timer.stage("decode"):
+            time.sleep(0.02)
+        for _ in range(2):
+            with timer.stage("detection"):
+                time.sleep(0.01)
+        photo_times[name] = timer.end_photo()
+
+    threads = [threading.Thread(target=analyse, args=(f"photo{k}",), name=f"worker-{k}") for k in range(2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    with timer.stage("jpeg_encode"):
+        pass
+
+    for times in photo_times.values():
+        assert set(times) == {"decode", "detection"}
+        assert times["decode"] >= 20 and times["detection"] >= 20
+    summary = timer.summary()
+    assert summary["decode"]["count"] == 2 and summary["detection"]["count"] == 4
+    assert summary["jpeg_encode"]["count"] == 1
+    assert summary["detection"]["p50"] <= summary["detection"]["p99"] <= summary["detection"]["max"]
+
+    assert timer.write_trace(tmp_path / "trace.json") == 7
+    trace = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    names = {e["args"]["name"] for e in trace if e["ph"] == "M"}
+    assert {"worker-0", "worker-1", "MainThread"} <= names
+    spans = [e for e in trace if e["ph"] == "X"]
+    assert all(e["ts"] >= 0 and e["dur"] >= 0 for e in spans)
+    assert {e["args"]["photo"] for e in spans if "args" in e} == {"photo0.jpg", "photo1.jpg"}
+
+    # Without tracing only the durations are kept
+    quiet = StageTimer()
+    with quiet.stage("decode"):
+        pass
+    assert quiet.write_trace(tmp_path / "empty.json") == 0 and quiet.summary()["decode"]["count"] == 1
+
+
+def test_runner_reports_stage_timings(tmp_path):
+    paths = []
+    for k in range(3):
+        img = np.full((600, 900, 3), 40, dtype=np.uint8)
+        cv2.circle(img, (300 + 100 * k, 300), 80, (255, 255, 255), -1)
+        paths.append(str(tmp_path / f"bird{k}.png"))
+        Image.fromarray(img).save(paths[-1])
+    runner = make_runner(tmp_path, detector=WhiteBirdDetector(), max_workers=2, trace=True)
+    out = tmp_path / "out"
+    out.mkdir()
+    results = runner.process_batch(paths, out, generate_crops=True)
+    runner.close()
+
+    for result in results:
+        assert {"decode", "scene", "detection", "crop", "focus", "outputs"} <= set(result["stage_times"])
+    status = json.loads((out / "status.json").read_text())
+    assert status["stage_times"]["decode"]["count"] == 3
+    assert status["stage_times"]["jpeg_encode"]["count"] == 6
+
+    runner.timer.write_trace(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())["traceEvents"]
+    rows = {e["args"]["name"] for e in trace if e["ph"] == "M"}
+    assert any(name.startswith("jpeg") for name in rows) and len(rows) >= 2